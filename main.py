@@ -8,9 +8,9 @@ from datetime import datetime
 from pathlib import Path
 import cv2
 import numpy as np
-from picamera2 import Picamera2
+from picamera2 import Picamera2, MappedArray
 from picamera2.encoders import H264Encoder
-from picamera2.outputs import FfmpegOutput
+from picamera2.outputs import FfmpegOutput, Output
 from gpiozero import Button
 import RPi.GPIO as GPIO
 import signal
@@ -19,8 +19,14 @@ import time
 import json
 from PIL import Image, ImageDraw, ImageFont
 import threading
+import select
+import fcntl
+import tempfile
 import math
+import bisect
 import re
+from collections import OrderedDict, deque, namedtuple
+from contextlib import contextmanager
 from INA219 import INA219
 import pyaudio
 import wave
@@ -34,6 +40,7 @@ import struct
 THUMBNAIL_DIR = Path("/home/pi/camera_project/thumbnails")  # Lokalny dysk - miniaturki
 THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
 CONFIG_FILE = Path("/home/pi/camera_project/camera_config.json")  # Lokalny dysk - config
+VIDEO_INDEX_FILE = Path("/home/pi/camera_project/video_index.jsonl")  # Lokalny dysk - indeks metadanych filmów
 
 # VIDEO_DIR będzie ustawiony dynamicznie przez find_sd_card()
 VIDEO_DIR = None
@@ -85,6 +92,23 @@ ORANGE = (255, 165, 0)
 LIGHT_BLUE = (173, 216, 230)
 GRID_COLOR = (255, 255, 255, 80)
 
+# Znacznik daty: kolory (ustawienie "date_color") i rozmiary czcionki w pikselach klatki nagrania
+# ("date_font_size") - wspólne dla podglądu, znacznika na żywo i filtra drawtext
+DATE_COLORS = {
+    "yellow": YELLOW,
+    "white": WHITE,
+    "red": RED,
+    "green": GREEN,
+    "blue": BLUE,
+    "orange": ORANGE
+}
+DATE_FONT_SIZES = {
+    "small": 24,
+    "medium": 40,
+    "large": 56,
+    "extra_large": 72
+}
+
 # Stany
 STATE_MAIN = 0
 STATE_VIDEOS = 1
@@ -101,6 +125,7 @@ recording = False
 recording_start_time = None
 current_file = None
 current_recording_fps = None
+current_recording_date_stamped = False  # Czy data jest wypalana w klatkach podczas nagrywania
 encoder = None
 running = True
 screen = None
@@ -110,16 +135,48 @@ fake_battery_level = None  # None = użyj rzeczywistego poziomu, lub wartość 0
 
 # Audio - mikrofon
 audio = None
-audio_stream = None
 audio_recording = False
+audio_recording_subscriber = None  # Odbiorca bloków mikrofonu zapisujący bieżące nagranie
+audio_recording_ready = None  # Condition kolejki bloków nagrania (budzi wątek zapisu)
 audio_file = None
 audio_thread = None
-audio_level = 0.0  # Aktualny poziom głośności (0.0 - 1.0)
-audio_level_right = 0.0
+audio_meter = None  # AudioMeter - pomiar poziomu mikrofonu (dBFS, balistyka, peak-hold)
+audio_meter_snapshot = None  # Ostatni AudioMeterSnapshot (None = cisza / brak strumienia)
+METER_FLOOR_DB = -60.0  # Dolna granica skali wskaźnika (dBFS)
+METER_ATTACK_TIME = 0.005  # Stała czasowa narastania wskaźnika (s)
+METER_RELEASE_RATE = 20.0  # Opadanie wskaźnika (dB/s)
+METER_PEAK_HOLD = 1.5  # Czas trzymania szczytu (s)
+METER_CLIP_HOLD = 2.0  # Czas świecenia wskaźnika przesterowania (s)
+# Progi 15 segmentów (dBFS): 10 zielonych, 3 pomarańczowe, 2 czerwone (ostatni = przesterowanie)
+METER_SEGMENT_DB = (-48, -42, -36, -30, -26, -22, -19, -16, -13, -10, -8, -6, -4, -2, -0.1)
+audio_alc = None  # AudioALC - automatyczna regulacja poziomu (AGC + limiter), ustawienie "audio_alc"
+audio_alc_latency = 0.0  # Bieżące opóźnienie toru mikrofonu wnoszone przez ALC (s)
+ALC_TARGET_DB = -18.0  # Docelowy poziom RMS (dBFS)
+ALC_MIN_GAIN_DB = -12.0
+ALC_MAX_GAIN_DB = 24.0
+ALC_GATE_DB = -55.0  # Poniżej tego poziomu wzmocnienie stoi (nie podbijaj szumu w ciszy)
+ALC_ATTACK_TIME = 0.05  # Stała czasowa ściszania AGC (s)
+ALC_RELEASE_TIME = 2.0  # Stała czasowa podgłaśniania AGC (s)
+ALC_LIMITER_CEILING_DB = -1.0  # Maksymalny szczyt na wyjściu (dBFS)
+ALC_LIMITER_RELEASE_TIME = 0.3  # Powrót limitera do wzmocnienia 1 (s)
+ALC_BENCHMARK_MAX_LOAD = 0.25  # Maksymalne dopuszczalne obciążenie rdzenia (48 kHz stereo)
 audio_device_index = None
-audio_monitoring_stream = None  # NOWY: Stream do ciągłego monitoringu poziomu
-audio_monitoring_thread = None  # NOWY: Wątek monitorujący poziom audio
-audio_monitoring_active = False  # NOWY: Czy monitoring jest aktywny
+audio_redetect_thread = None  # Wątek wykrywania mikrofonu w tle
+audio_redetect_lock = threading.Lock()
+AUDIO_REDETECT_INTERVAL = 5.0  # Co ile sekund ponawiać wykrywanie mikrofonu
+audio_monitoring_stream = None  # Jedyny, stale otwarty strumień mikrofonu
+audio_monitoring_thread = None  # Wątek przechwytujący bloki mikrofonu
+audio_monitoring_active = False  # Czy strumień mikrofonu jest otwarty
+audio_subscribers = []  # Odbiorcy bloków PCM (wskaźnik VU, zapis nagrania, analizatory)
+audio_subscribers_lock = threading.Lock()
+audio_ring = None  # AudioRingBuffer - callback PortAudio -> wątek rozsyłający
+AUDIO_RING_SECONDS = 5.0  # Pojemność bufora pierścieniowego mikrofonu
+AUDIO_WRITE_INTERVAL = 0.5  # Zapis nagrania na kartę blokami co tyle sekund
+LIVE_MUX_WRITE_TIMEOUT = 1.0  # Maksymalny czas oczekiwania na zapis PCM do FIFO muxera (s)
+# Liczniki strumienia mikrofonu: przepełnienia/niedobory PortAudio i bloki odrzucone przy pełnym buforze
+audio_capture_stats = {"input_overflows": 0, "input_underflows": 0, "ring_overflows": 0, "writer_backlog_max": 0}
+audio_recording_stats_start = None  # Stan liczników na starcie bieżącego nagrania
+audio_recording_latency = 0.0  # Opóźnienie ALC na starcie nagrania - kompensowane przy muxowaniu
 AUDIO_CHUNK = 1024
 AUDIO_FORMAT = pyaudio.paInt16
 AUDIO_CHANNELS = 1
@@ -149,6 +206,8 @@ ir_mode_day = True  # True = dzień (filtr IR ON), False = noc (filtr IR OFF)
 
 # Video Player
 video_capture = None
+video_decoder = None  # PlaybackDecoder - wątek dekodujący z wyprzedzeniem
+PLAYBACK_QUEUE_SIZE = 6  # Liczba klatek przeskalowanych do ekranu dekodowanych z wyprzedzeniem
 video_paused = False
 video_current_frame = 0
 video_total_frames = 0
@@ -159,6 +218,26 @@ video_last_surface = None
 video_audio_ready = False  # NOWY: Czy audio jest gotowe do odtwarzania
 playback_loading_start_time = 0  # Czas rozpoczęcia ładowania wideo
 video_current_volume = 1.0  # Zachowana głośność (0.0 - 1.0)
+video_keyframes = []  # Numery klatek kluczowych odtwarzanego filmu (z indeksu metadanych)
+video_scrubbing = False  # Przewijanie z przytrzymanym przyciskiem w toku
+video_scrub_frame = None  # Docelowa (dokładna) pozycja przewijania
+video_sprite_sheet = None  # Arkusz podglądów odtwarzanego filmu (pygame Surface) - podgląd przy przewijaniu
+video_sprite_preview = None  # Powiększony kafel arkusza (bufor wielokrotnego użytku)
+SPRITE_SUFFIX = "_sprite.jpg"  # Arkusz podglądów obok miniaturki: THUMBNAIL_DIR/<stem>_sprite.jpg
+SPRITE_COLUMNS = 10
+SPRITE_ROWS = 10  # 10x10 = 100 równo rozłożonych klatek filmu
+SPRITE_TILE_WIDTH = 160
+SPRITE_TILE_HEIGHT = 90
+SPRITE_FILMSTRIP_TILES = 7  # Kafle na pasku filmowym nad paskiem postępu
+playback_audio = None  # PlaybackAudioStream - dźwięk odtwarzanego filmu (ffmpeg -> kanał miksera)
+PLAYBACK_AUDIO_START_TIMEOUT = 3.0  # Maksymalne oczekiwanie na pierwszy kawałek dźwięku (s)
+video_av_offset = 0.0  # Uśrednione przesunięcie obrazu względem dźwięku (s, >0 = obraz przed dźwiękiem)
+video_av_measured_offset = 0.0  # Ostatnie uśrednione przesunięcie przed korektą (diagnostyka)
+video_av_last_log_time = 0
+AV_SYNC_THRESHOLD = 0.04  # Korekta gdy przesunięcie przekroczy 40 ms
+AV_SYNC_RESYNC = 0.25  # Przesunięcie korygowane natychmiast (bez uśredniania)
+AV_SYNC_SMOOTHING = 0.1  # Współczynnik średniej kroczącej pomiaru przesunięcia
+AV_SYNC_LOG_INTERVAL = 10.0  # Co ile sekund logować zmierzone przesunięcie A/V
 last_ui_interaction_time = 0  # Czas ostatniej interakcji z UI (do auto-ukrywania)
 UI_HIDE_DELAY = 3.0  # Sekundy bezczynności przed ukryciem UI
 last_volume_change_time = 0  # Czas ostatniej zmiany głośności (do pokazania wskaźnika)
@@ -167,13 +246,53 @@ VOLUME_INDICATOR_DURATION = 2.0  # Sekundy wyświetlania wskaźnika głośności
 # Video Manager
 videos = []
 selected_index = 0
-thumbnails = {}
+thumbnails = OrderedDict()  # Cache LRU miniaturek: stem -> pygame Surface
+THUMBNAIL_CACHE_SIZE = 60  # Maksymalna liczba miniaturek w pamięci
+THUMBNAIL_PREFETCH_ROWS = 2  # Wiersze wczytywane z wyprzedzeniem nad i pod widokiem
 videos_scroll_offset = 0
 selected_videos = set()  # Multi-select: zestaw indeksów zaznaczonych filmów
 video_context_menu_selection = 0  # Wybór w menu kontekstowym
 video_info_index = 0  # Indeks filmu do wyświetlenia informacji
 multi_select_mode = False  # Tryb zaznaczania wielu filmów
 
+# Indeks metadanych filmów (czas trwania, FPS, rozdzielczość, rozmiar, miniaturka)
+video_index = {}  # str(ścieżka) -> wpis z pliku VIDEO_INDEX_FILE
+video_index_lock = threading.Lock()
+video_index_pending = set()  # Filmy czekające na zbadanie w tle
+video_index_worker = None
+
+# Przyrostowe skanowanie katalogu filmów
+video_dir_snapshot = {}  # nazwa pliku -> (rozmiar, mtime) z ostatniego skanu
+video_dir_snapshot_root = None  # VIDEO_DIR, dla którego zrobiono snapshot
+thumbnails_generating = set()  # Stemy filmów, dla których trwa generowanie miniaturki
+
+# Leniwe wczytywanie miniaturek
+thumbnails_lock = threading.Lock()
+thumbnails_missing = set()  # Stemy filmów bez pliku JPG (czekają na wygenerowanie)
+thumbnail_load_queue = []  # Filmy do wczytania w kolejności priorytetu (widok, potem prefetch)
+thumbnail_loader_thread = None
+thumbnail_generate_queue = []
+thumbnail_generate_workers = 0  # Liczba działających wątków generujących miniaturki
+THUMBNAIL_WORKERS = 2  # Limit równoległych generatorów (każdy to ffmpeg -threads 1)
+THUMBNAIL_CANDIDATE_POSITIONS = (0.1, 0.3, 0.5, 0.7)  # Ułamki długości filmu - kandydaci na miniaturkę
+THUMBNAIL_MIN_BRIGHTNESS = 30  # Średnia jasność poniżej/powyżej = klatka niedo-/prześwietlona
+THUMBNAIL_MAX_BRIGHTNESS = 225
+
+# Animowany podgląd wybranego kafelka galerii (mikroklipy MJPEG w THUMBNAIL_DIR)
+PREVIEW_CLIP_SUFFIX = "_preview.mjpeg"
+PREVIEW_CLIP_SECONDS = 3.0  # Długość mikroklipu
+PREVIEW_CLIP_FPS = 8
+PREVIEW_CLIP_WIDTH = 320
+PREVIEW_CLIP_HEIGHT = 180
+PREVIEW_CLIP_BUDGET = 150 * 1024 * 1024  # Limit miejsca na mikroklipy (najdawniej używane są usuwane)
+PREVIEW_CLIP_DELAY = 0.6  # Sekundy na kafelku przed startem podglądu (szybka nawigacja nic nie wczytuje)
+preview_clip_lock = threading.Lock()
+preview_clip_wanted = None  # (film, rozmiar kafelka) - najnowsze zlecenie dla wątku
+preview_clip_frames = None  # (stem, rozmiar, [Surface], czas startu) - klatki w pamięci
+preview_clip_thread = None
+preview_clip_selected = None  # Stem wybranego kafelka
+preview_clip_selected_time = 0
+
 # Komunikaty błędów
 error_message = None
 error_message_time = 0
@@ -197,6 +316,25 @@ steadyhand_icon = None  # Obrazek ikony steadyhand
 brightness_icon = None  # Obrazek ikony brightness
 film_icon = None  # Obrazek ikony filmu
 pause_icon = None  # Obrazek ikony pauzy
+scaled_asset_cache = OrderedDict()  # (zasób, rozmiar, odbicie) -> przeskalowany Surface
+scaled_asset_lock = threading.Lock()  # Miniaturki są usuwane z cache także z wątku wczytującego
+SCALED_ASSET_CACHE_SIZE = 128
+text_cache = OrderedDict()  # (tekst, czcionka, kolor, obrys, grubość) -> wyrenderowany Surface
+TEXT_CACHE_SIZE = 512
+background_cache = {}  # Statyczne tła (gradienty, paski paneli) renderowane raz dla danego rozmiaru
+hud_static_layer = None  # (klucz ustawień, Surface, Rect) - siatka, ramka środkowa, P-MENU
+hud_widget_layers = {}  # funkcja rysująca -> (klucz stanu, Surface, Rect)
+hud_scratch_surface = None  # Przezroczysta warstwa robocza do renderowania elementów HUD
+camera_frame_lock = threading.Lock()
+camera_latest_frame = None  # Skrzynka na jedną (najnowszą) klatkę podglądu
+camera_frames_dropped = 0  # Klatki nadpisane zanim UI je odebrało
+camera_capture_active = False
+camera_capture_thread = None
+camera_preview_format = None  # Format strumienia lores ("XBGR8888"/"YUV420") lub None gdy podgląd z main
+hud_preview_surface = None  # Ostatnia klatka podglądu przeskalowana do ekranu
+hud_screen_valid = False  # Czy ekran zawiera aktualną kompozycję ekranu głównego
+hud_time_estimate = {"time": 0.0, "text": None}
+HUD_TIME_ESTIMATE_INTERVAL = 2.0  # Co ile sekund odświeżać szacowany czas nagrywania
 
 # Menu System
 menu_tiles = []
@@ -224,6 +362,7 @@ popup_tile_id = None
 # SD Card Icons - REMOVED (replaced with zoom indicator)
 
 # Camera Settings
+config_lock = threading.Lock()  # Zapis konfiguracji także z wątków w tle (np. wykrywanie mikrofonu)
 camera_settings = {
     "video_resolution": "1080p30",
     "white_balance": "auto",
@@ -247,6 +386,8 @@ camera_settings = {
     "show_grid": True,
     "font_family": "DigitalPixel2",
     "audio_recording": True,  
+    "live_audio_mux": True,
+    "audio_alc": True,
     "show_center_frame": True,  
     "night_vision_mode": False,  
     "ir_filter_day_mode": True,  
@@ -320,6 +461,9 @@ BITRATE_MAP = {
     "4K30": 25000000,      # 25 Mbps
 }
 
+# Znacznik daty w czasie rzeczywistym - bitmapa renderowana tylko przy zmianie tekstu
+date_stamp_cache = {"second": None, "text": None, "bgr": None, "alpha": None, "inv_alpha": None}
+
 # Zoom
 last_zoom_time = 0
 last_zoom_change_time = 0
@@ -387,12 +531,18 @@ def sync_thumbnails_with_videos():
     print("[SYNC] SYNCHRONIZACJA MINIATUREK")
     print("="*70)
 
-    # Pobierz listę filmów i miniaturek
-    video_files = set(VIDEO_DIR.glob("*.mp4"))
+    # Pobierz listę filmów (skan przyrostowy, używany później przez galerię) i miniaturek
+    scan_video_dir()
+    video_files = {VIDEO_DIR / name for name in video_dir_snapshot}
     video_stems = {v.stem for v in video_files}
 
-    thumbnail_files = set(THUMBNAIL_DIR.glob("*.jpg"))
-    thumbnail_stems = {t.stem for t in thumbnail_files}
+    with os.scandir(str(THUMBNAIL_DIR)) as entries:
+        names = [entry.name for entry in entries]
+    jpg_files = [name for name in names if name.endswith(".jpg")]
+    thumbnail_files = {name for name in jpg_files if not name.endswith(SPRITE_SUFFIX)}
+    thumbnail_stems = {name[:-4] for name in thumbnail_files}
+    sprite_stems = {name[:-len(SPRITE_SUFFIX)] for name in jpg_files if name.endswith(SPRITE_SUFFIX)}
+    preview_stems = {name[:-len(PREVIEW_CLIP_SUFFIX)] for name in names if name.endswith(PREVIEW_CLIP_SUFFIX)}
 
     print(f"[INFO] Filmów: {len(video_files)}, Miniaturek: {len(thumbnail_files)}")
 
@@ -410,17 +560,35 @@ def sync_thumbnails_with_videos():
     else:
         print("[OK] Brak osieroconych miniaturek")
 
-    # Znajdź filmy bez miniaturek
+    # Usuń osierocone arkusze podglądów i mikroklipy (brakujące generują się przy użyciu)
+    orphaned_files = [f"{stem}{SPRITE_SUFFIX}" for stem in sprite_stems - video_stems]
+    orphaned_files += [f"{stem}{PREVIEW_CLIP_SUFFIX}" for stem in preview_stems - video_stems]
+    for name in orphaned_files:
+        try:
+            (THUMBNAIL_DIR / name).unlink()
+            print(f"  - Usunięto: {name}")
+        except Exception as e:
+            print(f"  - Błąd usuwania {name}: {e}")
+
+    # Znajdź filmy bez miniaturek - generowanie w tle (ograniczona pula wątków, start nie czeka)
     missing = video_stems - thumbnail_stems
     if missing:
-        print(f"[SYNC] Generuję {len(missing)} brakujących miniaturek...")
-        for stem in missing:
-            video_path = VIDEO_DIR / f"{stem}.mp4"
-            print(f"  - Generowanie: {stem}.mp4")
-            generate_thumbnail(video_path)
+        print(f"[SYNC] Zlecam {len(missing)} brakujących miniaturek...")
+        for stem in sorted(missing, reverse=True):
+            queue_thumbnail_generation(VIDEO_DIR / f"{stem}.mp4")
     else:
         print("[OK] Wszystkie miniaturki istnieją")
 
+    # Usuń z indeksu metadanych wpisy filmów, których już nie ma na karcie
+    video_paths = {str(v) for v in video_files}
+    with video_index_lock:
+        stale = [p for p in video_index if Path(p).parent == VIDEO_DIR and p not in video_paths]
+        for p in stale:
+            del video_index[p]
+    if stale:
+        print(f"[SYNC] Usunięto {len(stale)} nieaktualnych wpisów indeksu metadanych")
+        save_video_index()
+
     print("="*70 + "\n")
 
 
@@ -514,7 +682,7 @@ def draw_recording_time_remaining():
     top_margin = 20
 
     # Pobierz szacowany czas nagrywania
-    time_remaining = get_recording_time_estimate()
+    time_remaining = get_hud_time_remaining()
 
     # Pobierz aktualną rozdzielczość
     resolution = camera_settings.get("video_resolution", "1080p30")
@@ -530,7 +698,7 @@ def draw_recording_time_remaining():
     format_name = format_map.get(resolution, "FHD")
 
     # Tekst formatu dla obliczenia rozmiaru owalu - UŻYWAMY NOWEJ CZCIONKI font_mediumXL
-    format_text_surface = font_mediumXL.render(format_name, True, BLACK)
+    format_text_surface = get_text_surface(format_name, font_mediumXL, BLACK)
     format_text_width = format_text_surface.get_width()
     format_text_height = format_text_surface.get_height()
 
@@ -542,7 +710,7 @@ def draw_recording_time_remaining():
 
     # Tekst czasu z nawiasami
     time_text = f"[{time_remaining}]"
-    time_text_surface = menu_font.render(time_text, True, WHITE)
+    time_text_surface = get_text_surface(time_text, menu_font, WHITE)
     time_text_width = time_text_surface.get_width()
 
     # Oblicz całkowitą szerokość (owal + spacja + [czas])
@@ -592,14 +760,14 @@ def draw_zoom_indicator():
     brightness_value_text = f"{brightness_value:+.1f}"
 
     # Wyrenderuj tekst wartości
-    brightness_value_surface = font_large.render(brightness_value_text, True, WHITE)
+    brightness_value_surface = get_text_surface(brightness_value_text, font_large, WHITE)
     brightness_value_width = brightness_value_surface.get_width()
 
     if brightness_icon is not None:
         # Skaluj ikonę - rozmiar jak tekst
         icon_height = 50  # Wysokość ikony dostosowana do tekstu
         icon_width = int(icon_height * (brightness_icon.get_width() / brightness_icon.get_height()))
-        scaled_brightness = pygame.transform.scale(brightness_icon, (icon_width + 10, icon_height))
+        scaled_brightness = get_scaled_asset("brightness_icon", brightness_icon, (icon_width + 10, icon_height))
 
         # Oblicz całkowitą szerokość (ikona + odstęp + wartość)
         total_width = icon_width + 5 + brightness_value_width
@@ -615,7 +783,7 @@ def draw_zoom_indicator():
     else:
         # Fallback - jeśli ikona się nie załadowała, użyj tekstu
         brightness_text = f"B {brightness_value:+.1f}"
-        brightness_text_surface = font_large.render(brightness_text, True, WHITE)
+        brightness_text_surface = get_text_surface(brightness_text, font_large, WHITE)
         brightness_text_width = brightness_text_surface.get_width()
         brightness_x = zoom_right_edge - brightness_text_width
         draw_text_with_outline(brightness_text, font_large, WHITE, BLACK, brightness_x, brightness_y)
@@ -631,7 +799,7 @@ def draw_zoom_indicator():
         iso_text = f"ISO {iso_mode}"
 
     # Oblicz pozycję x aby wyrównać do prawej
-    iso_text_surface = font_large.render(iso_text, True, WHITE)
+    iso_text_surface = get_text_surface(iso_text, font_large, WHITE)
     iso_text_width = iso_text_surface.get_width()
     iso_x = zoom_right_edge - iso_text_width
 
@@ -659,7 +827,7 @@ def draw_zoom_indicator():
         wb_text = f"P{wb_temp}K"
 
     # Oblicz pozycję x aby wyrównać do prawej
-    wb_text_surface = font_large.render(wb_text, True, WHITE)
+    wb_text_surface = get_text_surface(wb_text, font_large, WHITE)
     wb_text_width = wb_text_surface.get_width()
     wb_x = zoom_right_edge - wb_text_width
 
@@ -668,7 +836,7 @@ def draw_zoom_indicator():
     # AF AUTO powyżej white balance
     af_y = wb_y - 75
     af_auto_text = "AF AUTO"
-    af_auto_text_surface = font_large.render(af_auto_text, True, WHITE)
+    af_auto_text_surface = get_text_surface(af_auto_text, font_large, WHITE)
     af_auto_text_width = af_auto_text_surface.get_width()
     af_auto_x = zoom_right_edge - af_auto_text_width
     draw_text_with_outline(af_auto_text, font_large, WHITE, BLACK, af_auto_x, af_y)
@@ -679,8 +847,7 @@ def draw_zoom_indicator():
         # Skaluj ikonę - rozmiar jak wcześniej
         icon_height = 90  # Wysokość ikony
         icon_width = int(icon_height + 10)
-        scaled_steadyhand = pygame.transform.scale(steadyhand_icon, (icon_width, icon_height))
-        scaled_steadyhand = pygame.transform.flip(scaled_steadyhand, True, False)
+        scaled_steadyhand = get_scaled_asset("steadyhand_icon", steadyhand_icon, (icon_width, icon_height), flip_x=True)
 
         # Wyrównaj do prawej krawędzi
         steadyhand_x = zoom_right_edge - icon_width
@@ -697,7 +864,7 @@ def draw_zoom_indicator():
     zoom_text = f"Z{zoom_percent:02d}"
 
     # Oblicz pozycję x aby wyrównać do prawej
-    zoom_text_surface = font_large.render(zoom_text, True, WHITE)
+    zoom_text_surface = get_text_surface(zoom_text, font_large, WHITE)
     zoom_text_width = zoom_text_surface.get_width()
     zoom_x = zoom_right_edge - zoom_text_width
 
@@ -705,6 +872,247 @@ def draw_zoom_indicator():
     draw_text_with_outline(zoom_text, font_large, WHITE, BLACK, zoom_x, zoom_y)
 
 
+# ============================================================================
+# INDEKS METADANYCH FILMÓW
+# ============================================================================
+
+def load_video_index():
+    """Wczytaj indeks metadanych z pliku JSON-lines (ostatni wpis dla ścieżki wygrywa)"""
+    global video_index
+
+    loaded = {}
+    line_count = 0
+    try:
+        if VIDEO_INDEX_FILE.exists():
+            with open(VIDEO_INDEX_FILE, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    line_count += 1
+                    try:
+                        entry = json.loads(line)
+                        loaded[entry["path"]] = entry
+                    except Exception:
+                        continue
+    except Exception as e:
+        print(f"[WARN] Błąd wczytywania indeksu metadanych: {e}")
+
+    with video_index_lock:
+        video_index = loaded
+
+    print(f"[INDEX] Wczytano metadane {len(loaded)} filmów")
+
+    # Kompaktuj plik jeśli narosło dużo nadpisanych wpisów
+    if line_count > 2 * len(loaded) + 50:
+        save_video_index()
+
+
+def save_video_index():
+    """Zapisz cały indeks (kompaktowanie) - zapis atomowy przez plik tymczasowy"""
+    try:
+        with video_index_lock:
+            entries = list(video_index.values())
+            temp_file = VIDEO_INDEX_FILE.with_suffix('.tmp')
+            with open(temp_file, 'w') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(str(temp_file), str(VIDEO_INDEX_FILE))
+        print(f"[INDEX] Indeks zapisany ({len(entries)} wpisów)")
+    except Exception as e:
+        print(f"[WARN] Błąd zapisu indeksu metadanych: {e}")
+
+
+def probe_video_metadata(video_path):
+    """Odczytaj metadane filmu jednym wywołaniem ffprobe (fallback: OpenCV)"""
+    metadata = {"duration": 0.0, "fps": 0.0, "frames": 0, "width": 0, "height": 0}
+
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "v:0",
+             "-show_entries", "stream=width,height,r_frame_rate,nb_frames:format=duration",
+             "-of", "json", str(video_path)],
+            capture_output=True, text=True, timeout=10
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            info = json.loads(result.stdout)
+            stream = info.get("streams", [{}])[0] if info.get("streams") else {}
+            metadata["width"] = int(stream.get("width", 0))
+            metadata["height"] = int(stream.get("height", 0))
+
+            # ffprobe zwraca FPS jako ułamek (np. "30/1" lub "50/1")
+            fps_str = stream.get("r_frame_rate", "0/1")
+            if '/' in fps_str:
+                num, denom = fps_str.split('/')
+                metadata["fps"] = float(num) / float(denom) if float(denom) > 0 else 0.0
+            else:
+                metadata["fps"] = float(fps_str)
+
+            metadata["duration"] = float(info.get("format", {}).get("duration", 0.0))
+            nb_frames = stream.get("nb_frames")
+            if nb_frames and str(nb_frames).isdigit():
+                metadata["frames"] = int(nb_frames)
+            elif metadata["fps"] > 0:
+                metadata["frames"] = int(round(metadata["duration"] * metadata["fps"]))
+            return metadata
+    except Exception as e:
+        print(f"[WARN] Błąd ffprobe ({video_path.name}): {e}")
+
+    # Fallback - OpenCV
+    try:
+        cap = cv2.VideoCapture(str(video_path))
+        if cap.isOpened():
+            metadata["fps"] = cap.get(cv2.CAP_PROP_FPS)
+            metadata["frames"] = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            metadata["width"] = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            metadata["height"] = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            if metadata["fps"] > 0:
+                metadata["duration"] = metadata["frames"] / metadata["fps"]
+        cap.release()
+    except Exception as e:
+        print(f"[WARN] Błąd OpenCV ({video_path.name}): {e}")
+
+    return metadata
+
+
+def update_video_metadata(video_path, **extra):
+    """Zbadaj film i zapisz/odśwież jego wpis w indeksie (dopisanie linii do pliku)"""
+    try:
+        stat = video_path.stat()
+    except Exception as e:
+        print(f"[WARN] Nie można odczytać pliku {video_path.name}: {e}")
+        return None
+
+    entry = {
+        "path": str(video_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+    }
+    entry.update(probe_video_metadata(video_path))
+    entry["thumbnail"] = (THUMBNAIL_DIR / f"{video_path.stem}.jpg").exists()
+
+    with video_index_lock:
+        # Zachowaj dodatkowe pola (np. indeks klatek kluczowych) jeśli plik się nie zmienił
+        old = video_index.get(entry["path"])
+        if old and old.get("size") == entry["size"] and old.get("mtime") == entry["mtime"]:
+            for key, value in old.items():
+                entry.setdefault(key, value)
+        entry.update(extra)
+        video_index[entry["path"]] = entry
+        try:
+            with open(VIDEO_INDEX_FILE, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            print(f"[WARN] Błąd zapisu indeksu metadanych: {e}")
+
+    return entry
+
+
+def get_video_metadata(video_path, probe=True):
+    """
+    Pobierz metadane filmu z indeksu (klucz: ścieżka + rozmiar + mtime).
+    Jeśli wpisu brak lub jest nieaktualny: probe=True bada plik od razu,
+    probe=False zleca badanie w tle i zwraca None.
+    """
+    try:
+        stat = video_path.stat()
+    except Exception:
+        return None
+
+    with video_index_lock:
+        entry = video_index.get(str(video_path))
+    if entry and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+        return entry
+
+    # Nie badaj pliku, który jest jeszcze przetwarzany
+    if video_path.with_suffix('.processing').exists():
+        return None
+
+    if probe:
+        return update_video_metadata(video_path)
+
+    schedule_video_metadata(video_path)
+    return None
+
+
+def schedule_video_metadata(video_path):
+    """Zleć zbadanie filmu w tle (jeden wątek roboczy, bez duplikatów w kolejce)"""
+    global video_index_worker
+
+    with video_index_lock:
+        if video_path in video_index_pending:
+            return
+        video_index_pending.add(video_path)
+        if video_index_worker is not None:
+            return
+
+        def index_worker():
+            global video_index_worker
+            while True:
+                with video_index_lock:
+                    if not video_index_pending:
+                        video_index_worker = None
+                        return
+                    path = video_index_pending.pop()
+                if path.exists():
+                    update_video_metadata(path)
+
+        video_index_worker = threading.Thread(target=index_worker, daemon=True)
+        video_index_worker.start()
+
+
+def probe_keyframe_times(video_path):
+    """Czasy klatek kluczowych (s) z nagłówków pakietów strumienia video - ffprobe bez dekodowania"""
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "v:0",
+             "-show_entries", "packet=pts_time,flags",
+             "-of", "csv=p=0", str(video_path)],
+            capture_output=True, text=True, timeout=60
+        )
+        keyframes = []
+        for line in result.stdout.splitlines():
+            parts = line.strip().split(',')
+            if len(parts) >= 2 and 'K' in parts[1] and parts[0] not in ('', 'N/A'):
+                keyframes.append(round(float(parts[0]), 3))
+        keyframes.sort()
+        return keyframes
+    except Exception as e:
+        print(f"[WARN] Błąd indeksu klatek kluczowych ({video_path.name}): {e}")
+        return []
+
+
+def set_video_metadata_fields(video_path, **fields):
+    """Dopisz pola do aktualnego wpisu indeksu (bez ponownego ffprobe); nieaktualny wpis - pełne badanie"""
+    try:
+        stat = video_path.stat()
+    except Exception:
+        return None
+
+    with video_index_lock:
+        entry = video_index.get(str(video_path))
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+            entry = dict(entry)
+            entry.update(fields)
+            video_index[entry["path"]] = entry
+            try:
+                with open(VIDEO_INDEX_FILE, 'a') as f:
+                    f.write(json.dumps(entry) + "\n")
+            except Exception as e:
+                print(f"[WARN] Błąd zapisu indeksu metadanych: {e}")
+            return entry
+
+    return update_video_metadata(video_path, **fields)
+
+
+def remove_video_metadata(video_path):
+    """Usuń wpis filmu z indeksu (po usunięciu pliku)"""
+    with video_index_lock:
+        removed = video_index.pop(str(video_path), None)
+    if removed:
+        save_video_index()
+
+
 # ============================================================================
 # FUNKCJE POMOCNICZE FPS
 # ============================================================================
@@ -731,229 +1139,532 @@ def extract_fps_from_filename(filename):
 # FUNKCJE AUDIO - MIKROFON
 # ============================================================================
 
-def init_audio():
-    """Inicjalizuj PyAudio i wykryj mikrofon"""
+@contextmanager
+def suppress_alsa_errors():
+    """Tymczasowo wycisz błędy ALSA (przekierowanie stderr na poziomie deskryptora)"""
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    old_stderr = os.dup(2)
+    sys.stderr.flush()
+    os.dup2(devnull, 2)
+    os.close(devnull)
+    try:
+        yield
+    finally:
+        os.dup2(old_stderr, 2)
+        os.close(old_stderr)
+
+
+def use_audio_device(pa, index, name, channels):
+    """
+    Ustaw wybrane urządzenie jako aktywne i zapamiętaj je w konfiguracji (szybki start następnym razem).
+    Podczas nagrywania odmawia (zmiana AUDIO_CHANNELS w trakcie zapisu psuje plik) - zwraca False.
+    """
     global audio, audio_device_index, AUDIO_CHANNELS
 
-    # Wycisz ostrzeżenia ALSA
-    import os
-    os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+    if recording or audio_recording:
+        print(f"[AUDIO] Trwa nagrywanie - nie przełączam na urządzenie {index}: {name}")
+        return False
 
-    # Przekieruj stderr ALSA do /dev/null (wycisza ostrzeżenia ALSA)
-    import sys
-    from contextlib import contextmanager
-
-    @contextmanager
-    def suppress_alsa_errors():
-        """Tymczasowo wycisz błędy ALSA"""
-        devnull = os.open(os.devnull, os.O_WRONLY)
-        old_stderr = os.dup(2)
-        sys.stderr.flush()
-        os.dup2(devnull, 2)
-        os.close(devnull)
-        try:
-            yield
-        finally:
-            os.dup2(old_stderr, 2)
-            os.close(old_stderr)
+    audio = pa
+    audio_device_index = index
+    AUDIO_CHANNELS = channels
+    print(f"[AUDIO] Używam urządzenia {index}: {name} ({channels} kan.)")
+
+    cached = {"name": name, "index": index, "channels": channels, "rate": AUDIO_RATE}
+    with config_lock:
+        changed = camera_settings.get("audio_device") != cached
+        if changed:
+            camera_settings["audio_device"] = cached
+    if changed:
+        save_config()
+    return True
 
-    try:
-        print("[AUDIO] Inicjalizacja PyAudio...")
 
-        # Inicjalizuj PyAudio z wyciszonymi ostrzeżeniami ALSA
+def try_cached_audio_device(pa):
+    """
+    Sprawdź zapamiętane urządzenie (nazwa pod tym samym indeksem, kanały, częstotliwość) -
+    bez wyliczania wszystkich urządzeń i bez strumienia testowego.
+    """
+    cached = camera_settings.get("audio_device")
+    if not cached or cached.get("rate") != AUDIO_RATE:
+        return False
+
+    try:
         with suppress_alsa_errors():
-            audio = pyaudio.PyAudio()
+            info = pa.get_device_info_by_index(cached["index"])
+    except Exception:
+        print("[AUDIO] Zapamiętane urządzenie niedostępne")
+        return False
 
-        print("[AUDIO] PyAudio OK")
+    if info["name"] != cached["name"] or int(info["maxInputChannels"]) < cached["channels"]:
+        print(f"[AUDIO] Pod indeksem {cached['index']} jest inne urządzenie: {info['name']}")
+        return False
 
-        # Wyświetl dostępne urządzenia
-        device_count = audio.get_device_count()
-        print(f"[AUDIO] Znaleziono {device_count} urządzeń audio")
+    print(f"[AUDIO] Zapamiętane urządzenie: {info['name']}")
+    return use_audio_device(pa, cached["index"], info["name"], cached["channels"])
 
-        # Wyświetl wszystkie urządzenia wejściowe
-        input_devices = []
-        for i in range(device_count):
-            try:
-                with suppress_alsa_errors():
-                    info = audio.get_device_info_by_index(i)
-                print(f"[AUDIO] Device {i}: {info['name']}")
-                print(f"        Input channels: {info['maxInputChannels']}")
-                if info['maxInputChannels'] > 0:
-                    input_devices.append((i, info))
-                    print(f"        >>> MIKROFON <<<")
-            except Exception as e:
-                print(f"[AUDIO] Błąd odczytu urządzenia {i}: {e}")
 
-        if not input_devices:
-            print("[WARN] Nie znaleziono żadnych urządzeń wejściowych!")
-            audio = None
-            audio_device_index = None
-            return False
+def probe_audio_devices(pa):
+    """Pełne wykrywanie: wylicz urządzenia wejściowe i otwórz strumień testowy (domyślne, potem kolejne)"""
+    # Wyświetl dostępne urządzenia
+    device_count = pa.get_device_count()
+    print(f"[AUDIO] Znaleziono {device_count} urządzeń audio")
 
-        # Spróbuj najpierw domyślnego urządzenia
+    # Wyświetl wszystkie urządzenia wejściowe
+    input_devices = []
+    for i in range(device_count):
         try:
             with suppress_alsa_errors():
-                default_input = audio.get_default_input_device_info()
-            if default_input['maxInputChannels'] > 0:
-                audio_device_index = default_input['index']
-                device_channels = int(default_input['maxInputChannels'])
-                print(f"[AUDIO] Domyślne urządzenie: {default_input['name']}")
-                print(f"[AUDIO] Device index: {audio_device_index}")
-                print(f"[AUDIO] Kanały urządzenia: {device_channels}")
-
-                # AUTO-DETECT: Ustaw liczbę kanałów na podstawie możliwości urządzenia
-                # Większość mikrofonów to mono (1), niektóre to stereo (2)
-                AUDIO_CHANNELS = min(device_channels, 2)  # Użyj 1 lub 2, zależnie od urządzenia
-                print(f"[AUDIO] Używam {AUDIO_CHANNELS} kanałów")
-
-                # TEST - Spróbuj otworzyć stream aby sprawdzić czy działa
-                try:
-                    with suppress_alsa_errors():
-                        test_stream = audio.open(
-                            format=AUDIO_FORMAT,
-                            channels=AUDIO_CHANNELS,
-                            rate=AUDIO_RATE,
-                            input=True,
-                            input_device_index=audio_device_index,
-                            frames_per_buffer=AUDIO_CHUNK
-                        )
-                        test_stream.close()
-                    print("[AUDIO] ✓ Test stream OK - urządzenie działa!")
-                    return True
-                except Exception as e:
-                    print(f"[AUDIO] ✗ Test stream FAILED: {e}")
+                info = pa.get_device_info_by_index(i)
+            print(f"[AUDIO] Device {i}: {info['name']}")
+            print(f"        Input channels: {info['maxInputChannels']}")
+            if info['maxInputChannels'] > 0:
+                input_devices.append((i, info))
+                print(f"        >>> MIKROFON <<<")
         except Exception as e:
-            print(f"[AUDIO] Nie można użyć domyślnego urządzenia: {e}")
+            print(f"[AUDIO] Błąd odczytu urządzenia {i}: {e}")
 
-        # Jeśli domyślne nie działa, testuj wszystkie dostępne urządzenia
-        print("[AUDIO] Testuję wszystkie dostępne urządzenia wejściowe...")
-        for idx, info in input_devices:
-            device_channels = int(info['maxInputChannels'])
-            print(f"[AUDIO] Próba {idx}: {info['name']} ({device_channels} kanałów)")
+    if not input_devices:
+        print("[WARN] Nie znaleziono żadnych urządzeń wejściowych!")
+        return False
 
-            # AUTO-DETECT kanały dla tego urządzenia
-            test_channels = min(device_channels, 2)
+    # Najpierw domyślne urządzenie, potem wszystkie pozostałe
+    candidates = []
+    try:
+        with suppress_alsa_errors():
+            default_input = pa.get_default_input_device_info()
+        if default_input['maxInputChannels'] > 0:
+            print(f"[AUDIO] Domyślne urządzenie: {default_input['name']}")
+            candidates.append((default_input['index'], default_input))
+    except Exception as e:
+        print(f"[AUDIO] Nie można użyć domyślnego urządzenia: {e}")
+    candidates += [(idx, info) for idx, info in input_devices if not candidates or idx != candidates[0][0]]
 
-            try:
-                with suppress_alsa_errors():
-                    test_stream = audio.open(
-                        format=AUDIO_FORMAT,
-                        channels=test_channels,
-                        rate=AUDIO_RATE,
-                        input=True,
-                        input_device_index=idx,
-                        frames_per_buffer=AUDIO_CHUNK
-                    )
-                    test_stream.close()
-
-                # Jeśli test się powiódł, użyj tego urządzenia
-                audio_device_index = idx
-                AUDIO_CHANNELS = test_channels
-                print(f"[AUDIO] ✓ SUKCES! Używam urządzenia {idx}: {info['name']}")
-                print(f"[AUDIO] Używam {AUDIO_CHANNELS} kanałów")
-                return True
-            except Exception as e:
-                print(f"[AUDIO] ✗ Urządzenie {idx} nie działa: {e}")
-                continue
+    for idx, info in candidates:
+        # AUTO-DETECT: Większość mikrofonów to mono (1), niektóre to stereo (2)
+        test_channels = min(int(info['maxInputChannels']), 2)
+        print(f"[AUDIO] Próba {idx}: {info['name']} ({test_channels} kanałów)")
 
-        # Jeśli żadne urządzenie nie działa
-        print("[ERROR] Żadne urządzenie audio nie działa!")
-        audio = None
-        audio_device_index = None
-        return False
+        try:
+            with suppress_alsa_errors():
+                test_stream = pa.open(
+                    format=AUDIO_FORMAT,
+                    channels=test_channels,
+                    rate=AUDIO_RATE,
+                    input=True,
+                    input_device_index=idx,
+                    frames_per_buffer=AUDIO_CHUNK
+                )
+                test_stream.close()
+
+            print(f"[AUDIO] ✓ Test stream OK - urządzenie działa!")
+            return use_audio_device(pa, idx, info['name'], test_channels)
+        except Exception as e:
+            print(f"[AUDIO] ✗ Urządzenie {idx} nie działa: {e}")
+            continue
+
+    print("[ERROR] Żadne urządzenie audio nie działa!")
+    return False
+
+
+def init_audio():
+    """
+    Inicjalizuj PyAudio i użyj zapamiętanego mikrofonu. Bez zapamiętanego (lub gdy zniknął)
+    pełne wykrywanie rusza w tle - start aplikacji na nie nie czeka.
+    """
+    global audio, audio_device_index
+
+    # Wycisz ostrzeżenia ALSA
+    os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+
+    audio = None
+    audio_device_index = None
+    try:
+        print("[AUDIO] Inicjalizacja PyAudio...")
+
+        # Inicjalizuj PyAudio z wyciszonymi ostrzeżeniami ALSA
+        with suppress_alsa_errors():
+            pa = pyaudio.PyAudio()
+
+        print("[AUDIO] PyAudio OK")
+
+        if try_cached_audio_device(pa):
+            return True
 
     except Exception as e:
         print(f"[WARN] Błąd inicjalizacji audio: {e}")
         import traceback
         traceback.print_exc()
-        audio = None
-        audio_device_index = None
         return False
 
+    schedule_audio_redetect(pa)
+    return False
+
+
+def schedule_audio_redetect(pa=None):
+    """
+    Wykrywaj mikrofon w tle (start bez zapamiętanego urządzenia lub po odłączeniu).
+    Bez pa PortAudio jest inicjalizowane od nowa - tylko wtedy widzi podłączone urządzenia.
+    Po znalezieniu urządzenia uruchamia strumień mikrofonu.
+    """
+    global audio_redetect_thread
+
+    def redetect():
+        global audio, audio_redetect_thread
+        current = pa
+        while True:
+            # Nie przełączaj mikrofonu w trakcie nagrania - wykrywanie po jego zakończeniu
+            if recording or audio_recording:
+                time.sleep(AUDIO_REDETECT_INTERVAL)
+                continue
+            try:
+                if current is None:
+                    if audio is not None:
+                        audio.terminate()
+                        audio = None
+                    with suppress_alsa_errors():
+                        current = pyaudio.PyAudio()
+
+                print("[AUDIO] Wykrywanie mikrofonu w tle...")
+                if probe_audio_devices(current):
+                    # Wyrejestruj wątek PRZED startem strumienia - jeśli nowy strumień od razu padnie,
+                    # jego schedule_audio_redetect() musi uruchomić kolejne wykrywanie
+                    with audio_redetect_lock:
+                        audio_redetect_thread = None
+                    start_audio_monitoring()
+                    return
+            except Exception as e:
+                print(f"[AUDIO] Błąd wykrywania mikrofonu: {e}")
+
+            # Spróbuj ponownie za chwilę (np. mikrofon USB zostanie podłączony)
+            try:
+                current.terminate()
+            except:
+                pass
+            current = None
+            time.sleep(AUDIO_REDETECT_INTERVAL)
+
+    with audio_redetect_lock:
+        if audio_redetect_thread is not None:
+            return
+        audio_redetect_thread = threading.Thread(target=redetect, daemon=True)
+        audio_redetect_thread.start()
 
-def calculate_audio_level(data):
-    """Oblicz poziom głośności z danych audio (RMS) dla jednego lub dwóch kanałów"""
-    try:
-        # Konwertuj bajty na wartości int16
-        audio_data = np.frombuffer(data, dtype=np.int16)
 
-        if AUDIO_CHANNELS == 2:
-            # Stereo: Dane są przeplatane (L1, R1, L2, R2, ...)
-            # Oddziel kanał lewy (indeksy parzyste: 0, 2, 4, ...)
-            audio_data_left = audio_data[0::2].astype(np.float64)
-            # Oddziel kanał prawy (indeksy nieparzyste: 1, 3, 5, ...)
-            audio_data_right = audio_data[1::2].astype(np.float64)
+AudioMeterSnapshot = namedtuple("AudioMeterSnapshot", "level_db rms_db hold_db clipped")
+AudioMeterSnapshot.__doc__ = """Stan wskaźnika (krotki L/R): poziom szczytowy z balistyką, RMS, peak-hold (dBFS) i przesterowanie"""
 
-            # Oblicz RMS (Root Mean Square) dla kanału L
-            mean_square_left = np.mean(audio_data_left**2)
-            rms_left = np.sqrt(mean_square_left) if mean_square_left >= 0 else 0.0
 
-            # Oblicz RMS dla kanału R
-            mean_square_right = np.mean(audio_data_right**2)
-            rms_right = np.sqrt(mean_square_right) if mean_square_right >= 0 else 0.0
+class AudioMeter:
+    """
+    Pomiar poziomu mikrofonu w dBFS: szczyt i RMS na kanał liczone na widoku int16 bloku
+    (bez kopii) z prealokowanym buforem roboczym, balistyka attack/release i peak-hold.
+    Wywoływany z wątku rozsyłającego; wynik publikowany jako AudioMeterSnapshot.
+    """
 
-            # Normalizuj do zakresu 0.0 - 1.0 (max int16 to 32768)
-            normalized_left = min(1.0, rms_left / 32768.0)
-            normalized_right = min(1.0, rms_right / 32768.0)
+    def __init__(self, channels):
+        self.channels = channels
+        self.scratch = np.empty(AUDIO_CHUNK * 4, dtype=np.float32)
+        self.level_db = [METER_FLOOR_DB] * channels
+        self.rms_db = [METER_FLOOR_DB] * channels
+        self.hold_db = [METER_FLOOR_DB] * channels
+        self.hold_time = [0.0] * channels
+        self.clip_time = [0.0] * channels
+        self.last_time = None
+
+    def process(self, data):
+        """Zmierz blok PCM int16 (przeplatany) i zwróć nowy AudioMeterSnapshot"""
+        now = time.monotonic()
+        dt = 0.0 if self.last_time is None else now - self.last_time
+        self.last_time = now
+
+        samples = np.frombuffer(data, dtype=np.int16)
+        frames = len(samples) // self.channels
+        if frames == 0:
+            return self.snapshot(now)
+        samples = samples[:frames * self.channels].reshape(frames, self.channels)
+        if frames > len(self.scratch):
+            self.scratch = np.empty(frames, dtype=np.float32)
+        scratch = self.scratch[:frames]
+
+        attack = 1.0 - math.exp(-dt / METER_ATTACK_TIME) if dt > 0 else 1.0
+        release = METER_RELEASE_RATE * dt
+
+        for ch in range(self.channels):
+            channel = samples[:, ch]
+            # Szczyt z max/min (abs(-32768) przepełnia int16) - redukcje bez alokacji tablic
+            peak = max(int(channel.max()), -int(channel.min()))
+            np.copyto(scratch, channel, casting="unsafe")
+            mean_square = float(np.dot(scratch, scratch)) / frames
+
+            peak_db = 20.0 * math.log10(peak / 32768.0) if peak > 0 else METER_FLOOR_DB
+            peak_db = max(METER_FLOOR_DB, peak_db)
+            self.rms_db[ch] = max(METER_FLOOR_DB, 10.0 * math.log10(mean_square / (32768.0 * 32768.0))) \
+                if mean_square > 0 else METER_FLOOR_DB
+
+            # Balistyka: szybki wzrost (stała czasowa), opadanie liniowe w dB
+            if peak_db > self.level_db[ch]:
+                self.level_db[ch] += (peak_db - self.level_db[ch]) * attack
+            else:
+                self.level_db[ch] = max(peak_db, self.level_db[ch] - release)
 
-            # Zastosuj nieliniową skalę (logarytmiczną) dla lepszej wizualizacji
-            if normalized_left > 0:
-                normalized_left = min(1.0, normalized_left * 10)
-            if normalized_right > 0:
-                normalized_right = min(1.0, normalized_right * 10)
+            # Peak-hold: szczyt trzymany METER_PEAK_HOLD s, potem opada jak wskaźnik
+            if peak_db >= self.hold_db[ch]:
+                self.hold_db[ch] = peak_db
+                self.hold_time[ch] = now
+            elif now - self.hold_time[ch] > METER_PEAK_HOLD:
+                self.hold_db[ch] = max(self.level_db[ch], self.hold_db[ch] - release)
 
-            return normalized_left, normalized_right
+            if peak >= 32767:
+                self.clip_time[ch] = now
 
-        else:
-            # Mono: Tylko jeden kanał - użyj tego samego poziomu dla L i R
-            audio_data_mono = audio_data.astype(np.float64)
+        return self.snapshot(now)
 
-            # Oblicz RMS (Root Mean Square)
-            mean_square = np.mean(audio_data_mono**2)
-            rms = np.sqrt(mean_square) if mean_square >= 0 else 0.0
+    def snapshot(self, now):
+        """Bieżący stan jako krotki L/R (mono - ten sam kanał dla L i R)"""
+        clipped = [now - t < METER_CLIP_HOLD for t in self.clip_time]
+        if self.channels == 1:
+            return AudioMeterSnapshot((self.level_db[0],) * 2, (self.rms_db[0],) * 2,
+                                      (self.hold_db[0],) * 2, (clipped[0],) * 2)
+        return AudioMeterSnapshot(tuple(self.level_db[:2]), tuple(self.rms_db[:2]),
+                                  tuple(self.hold_db[:2]), tuple(clipped[:2]))
 
-            # Normalizuj do zakresu 0.0 - 1.0 (max int16 to 32768)
-            normalized = min(1.0, rms / 32768.0)
 
-            # Zastosuj nieliniową skalę (logarytmiczną) dla lepszej wizualizacji
-            if normalized > 0:
-                normalized = min(1.0, normalized * 10)
+def update_audio_level(data):
+    """Subskrybent wskaźnika VU - pomiar bloku mikrofonu i publikacja migawki"""
+    global audio_meter_snapshot
+    audio_meter_snapshot = audio_meter.process(data)
 
-            # Zwróć ten sam poziom dla L i R (mikrofon mono)
-            return normalized, normalized
 
-    except Exception as e:
-        # W przypadku błędu zwróć 0.0 dla obu
-        return 0.0, 0.0
+def get_meter_segments(snapshot, segment_count=15):
+    """
+    Stan segmentów wskaźnika na kanał: (zapalone, segment peak-hold, przesterowanie).
+    Próg segmentu i to METER_SEGMENT_DB[i]; ostatni segment to lampka przesterowania.
+    """
+    if snapshot is None:
+        return ((0, -1, False), (0, -1, False))
+
+    channels = []
+    for level_db, hold_db, clipped in zip(snapshot.level_db, snapshot.hold_db, snapshot.clipped):
+        lit = bisect.bisect_right(METER_SEGMENT_DB, level_db)
+        hold = bisect.bisect_right(METER_SEGMENT_DB, hold_db) - 1
+        if clipped:
+            # Ostatni segment świeci jako lampka przesterowania przez METER_CLIP_HOLD
+            hold = segment_count - 1
+        channels.append((min(lit, segment_count), min(hold, segment_count - 1), clipped))
+    return tuple(channels)
+
+
+def add_audio_subscriber(callback):
+    """
+    Dołącz odbiorcę bloków PCM ze wspólnego strumienia mikrofonu (callback(data) w wątku przechwytywania).
+    data może być widokiem na bufor wielokrotnego użytku (wyjście ALC) - ważny tylko w trakcie wywołania;
+    odbiorca przechowujący blok musi go skopiować (bytes(data)).
+    """
+    global audio_subscribers
+    with audio_subscribers_lock:
+        if callback in audio_subscribers:
+            return
+        # Kopia przy zapisie - wątek przechwytywania iteruje po liście bez blokady
+        audio_subscribers = audio_subscribers + [callback]
+
+
+def remove_audio_subscriber(callback):
+    """Odłącz odbiorcę bloków PCM"""
+    global audio_subscribers
+    with audio_subscribers_lock:
+        audio_subscribers = [s for s in audio_subscribers if s is not callback]
+
+
+class AudioRingBuffer:
+    """
+    Prealokowany bufor pierścieniowy PCM: jeden producent (callback PortAudio) i jeden
+    konsument (wątek rozsyłający). Każda strona zmienia tylko własny licznik, więc nie
+    ma blokad - callback nigdy nie czeka na konsumenta.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buffer = bytearray(capacity)
+        self.view = memoryview(self.buffer)
+        self.write_pos = 0  # Bajty zapisane od startu (tylko producent)
+        self.read_pos = 0  # Bajty odczytane od startu (tylko konsument)
+
+    def write(self, data):
+        """Dopisz blok w całości. Zwraca False (blok odrzucony) gdy brak miejsca."""
+        size = len(data)
+        if size > self.capacity - (self.write_pos - self.read_pos):
+            return False
+        start = self.write_pos % self.capacity
+        first = min(size, self.capacity - start)
+        self.view[start:start + first] = data[:first]
+        if first < size:
+            self.view[0:size - first] = data[first:]
+        self.write_pos += size
+        return True
+
+    def read(self, size):
+        """Pobierz dokładnie size bajtów (kopia) lub None gdy jeszcze ich nie ma"""
+        if self.write_pos - self.read_pos < size:
+            return None
+        start = self.read_pos % self.capacity
+        first = min(size, self.capacity - start)
+        data = bytes(self.view[start:start + first])
+        if first < size:
+            data += bytes(self.view[0:size - first])
+        self.read_pos += size
+        return data
+
+    def fill(self):
+        """Zajętość bufora (0.0 - 1.0)"""
+        return (self.write_pos - self.read_pos) / self.capacity
+
+
+class AudioALC:
+    """
+    Automatyczna regulacja poziomu (ALC) dla bloków AUDIO_CHUNK: wolne AGC do poziomu
+    ALC_TARGET_DB (RMS, kanały sprzężone) i limiter z wyprzedzeniem jednego bloku.
+    Stałe opóźnienie = AUDIO_CHUNK próbek; obliczenia w miejscu na prealokowanych buforach.
+    """
+
+    def __init__(self, channels, chunk=AUDIO_CHUNK):
+        self.channels = channels
+        self.chunk = chunk
+        self.latency = chunk / AUDIO_RATE  # Opóźnienie wyjścia względem wejścia (s)
+        self.current = np.zeros((chunk, channels), dtype=np.float32)
+        self.delayed = np.zeros((chunk, channels), dtype=np.float32)
+        self.output = np.empty((chunk, channels), dtype=np.int16)
+        self.output_view = memoryview(self.output.reshape(-1)).cast("B")  # Wyjście bez alokacji na blok
+        # Rampa wzmocnienia w obrębie bloku (bez skoków = bez trzasków)
+        self.ramp_base = (np.arange(1, chunk + 1, dtype=np.float32) / chunk).reshape(chunk, 1)
+        self.ramp = np.empty((chunk, 1), dtype=np.float32)
+
+        chunk_seconds = chunk / AUDIO_RATE
+        self.agc_attack = 1.0 - math.exp(-chunk_seconds / ALC_ATTACK_TIME)
+        self.agc_release = 1.0 - math.exp(-chunk_seconds / ALC_RELEASE_TIME)
+        self.limiter_release = 1.0 - math.exp(-chunk_seconds / ALC_LIMITER_RELEASE_TIME)
+        self.ceiling = 32767.0 * 10 ** (ALC_LIMITER_CEILING_DB / 20.0)
+        self.reset()
+
+    def reset(self):
+        """Wyzeruj stan (opóźniony blok, wzmocnienia)"""
+        self.delayed.fill(0.0)
+        self.delayed_peak = 0.0
+        self.agc_gain_db = 0.0
+        self.agc_gain = 1.0
+        self.limiter_gain = 1.0
+
+    def apply_ramp(self, block, start_gain, end_gain):
+        # Wzmocnienie liniowo od start_gain do end_gain wzdłuż bloku (w miejscu)
+        np.multiply(self.ramp_base, end_gain - start_gain, out=self.ramp)
+        self.ramp += start_gain
+        block *= self.ramp
+
+    def process(self, data):
+        """
+        Przetwórz blok PCM int16 (przeplatany) - zwraca blok opóźniony o jeden AUDIO_CHUNK.
+        Wynik to memoryview na stały bufor wyjściowy, nadpisywany przy następnym wywołaniu.
+        """
+        samples = np.frombuffer(data, dtype=np.int16)
+        if len(samples) != self.chunk * self.channels:
+            return data
+        np.copyto(self.current, samples.reshape(self.chunk, self.channels), casting="unsafe")
+
+        # AGC: wzmocnienie do poziomu docelowego; cisza poniżej bramki nie podbija szumu
+        flat = self.current.reshape(-1)
+        mean_square = float(np.dot(flat, flat)) / flat.size
+        if mean_square > 0:
+            rms_db = 10.0 * math.log10(mean_square / (32768.0 * 32768.0))
+            if rms_db > ALC_GATE_DB:
+                target_db = max(ALC_MIN_GAIN_DB, min(ALC_MAX_GAIN_DB, ALC_TARGET_DB - rms_db))
+                coef = self.agc_attack if target_db < self.agc_gain_db else self.agc_release
+                self.agc_gain_db += (target_db - self.agc_gain_db) * coef
+        agc_gain = 10 ** (self.agc_gain_db / 20.0)
+        self.apply_ramp(self.current, self.agc_gain, agc_gain)
+        self.agc_gain = agc_gain
+        peak = max(float(self.current.max()), -float(self.current.min()))
+
+        # Limiter: wzmocnienie bloku opóźnionego uwzględnia już szczyt bloku następnego,
+        # więc redukcja zaczyna się zanim szczyt dotrze do wyjścia
+        worst = max(self.delayed_peak, peak)
+        needed = min(1.0, self.ceiling / worst) if worst > 0 else 1.0
+        released = self.limiter_gain + (1.0 - self.limiter_gain) * self.limiter_release
+        limiter_gain = min(needed, released)
+        self.apply_ramp(self.delayed, self.limiter_gain, limiter_gain)
+        self.limiter_gain = limiter_gain
+
+        np.clip(self.delayed, -32768.0, 32767.0, out=self.delayed)
+        np.copyto(self.output, self.delayed, casting="unsafe")
+
+        # Bieżący blok staje się opóźnionym (zamiana buforów, bez kopiowania)
+        self.delayed, self.current = self.current, self.delayed
+        self.delayed_peak = peak
+        return self.output_view
+
+    def gain_db(self):
+        """Łączne wzmocnienie (AGC + redukcja limitera) w dB"""
+        return self.agc_gain_db + 20.0 * math.log10(max(self.limiter_gain, 1e-6))
+
+
+def benchmark_alc(seconds=60.0, channels=2):
+    """
+    Benchmark ALC (python3 main.py --benchmark-alc): przetwarza seconds sekund sygnału
+    48 kHz w blokach AUDIO_CHUNK na jednym wątku. Zwraca True jeśli obciążenie
+    rdzenia nie przekracza ALC_BENCHMARK_MAX_LOAD.
+    """
+    alc = AudioALC(channels)
+    rng = np.random.default_rng(0)
+
+    # Bloki testowe: cisza, mowa, głośne fragmenty i przesterowanie - pobudzają AGC i limiter
+    blocks = []
+    t = np.arange(AUDIO_CHUNK, dtype=np.float64) / AUDIO_RATE
+    for amplitude in (50, 800, 3000, 12000, 32767, 6000, 200, 20000):
+        tone = amplitude * np.sin(2 * np.pi * 440.0 * t)
+        noise = rng.normal(0.0, amplitude * 0.1, AUDIO_CHUNK)
+        mono = np.clip(tone + noise, -32768, 32767)
+        blocks.append(np.repeat(mono[:, None], channels, axis=1).astype(np.int16).tobytes())
+
+    chunk_count = int(seconds * AUDIO_RATE / AUDIO_CHUNK)
+    start = time.perf_counter()
+    for i in range(chunk_count):
+        alc.process(blocks[i % len(blocks)])
+    elapsed = time.perf_counter() - start
+
+    audio_seconds = chunk_count * AUDIO_CHUNK / AUDIO_RATE
+    load = elapsed / audio_seconds
+    print(f"[ALC] Benchmark: {audio_seconds:.0f} s audio ({channels} kan., {AUDIO_RATE} Hz) w {elapsed:.2f} s")
+    print(f"[ALC] {elapsed / chunk_count * 1e6:.0f} µs/blok, obciążenie rdzenia {load * 100:.1f}% "
+          f"(limit {ALC_BENCHMARK_MAX_LOAD * 100:.0f}%)")
+    return load <= ALC_BENCHMARK_MAX_LOAD
+
+
+def audio_capture_callback(in_data, frame_count, time_info, status):
+    """Callback PortAudio (wątek audio): tylko kopiuje blok do bufora pierścieniowego i liczy zdarzenia"""
+    if status & pyaudio.paInputOverflow:
+        audio_capture_stats["input_overflows"] += 1
+    if status & pyaudio.paInputUnderflow:
+        audio_capture_stats["input_underflows"] += 1
+    if not audio_ring.write(in_data):
+        audio_capture_stats["ring_overflows"] += 1
+    return (None, pyaudio.paContinue)
 
 
 def audio_monitoring_loop():
-    """NOWY: Ciągły monitoring poziomu audio - działa w tle ZAWSZE (nie tylko podczas nagrywania)"""
-    global audio_monitoring_stream, audio_monitoring_active, audio_level
-
-    # Wycisz błędy ALSA
-    import os
-    import sys
-    from contextlib import contextmanager
-
-    @contextmanager
-    def suppress_alsa_errors():
-        """Tymczasowo wycisz błędy ALSA"""
-        devnull = os.open(os.devnull, os.O_WRONLY)
-        old_stderr = os.dup(2)
-        sys.stderr.flush()
-        os.dup2(devnull, 2)
-        os.close(devnull)
-        try:
-            yield
-        finally:
-            os.dup2(old_stderr, 2)
-            os.close(old_stderr)
+    """
+    Jedyny, stale otwarty strumień mikrofonu - działa w tle ZAWSZE (także podczas nagrywania).
+    PortAudio w trybie callback wypełnia bufor pierścieniowy, a ta pętla rozsyła bloki
+    do wszystkich subskrybentów: wskaźnik VU, zapis nagrania, analizatory.
+    """
+    global audio_monitoring_stream, audio_monitoring_active, audio_ring, audio_alc_latency
 
+    device_lost = False
     try:
-        print(f"[AUDIO-MON] Start monitoringu poziomu dźwięku")
+        print(f"[AUDIO-MON] Start strumienia mikrofonu")
+
+        frame_bytes = 2 * AUDIO_CHANNELS
+        audio_ring = AudioRingBuffer(int(AUDIO_RING_SECONDS * AUDIO_RATE) * frame_bytes)
+        poll_interval = AUDIO_CHUNK / AUDIO_RATE / 2
 
-        # Otwórz stream audio TYLKO do odczytu poziomu (nie nagrywamy do pliku)
         with suppress_alsa_errors():
             audio_monitoring_stream = audio.open(
                 format=AUDIO_FORMAT,
@@ -961,38 +1672,59 @@ def audio_monitoring_loop():
                 rate=AUDIO_RATE,
                 input=True,
                 input_device_index=audio_device_index,
-                frames_per_buffer=AUDIO_CHUNK
+                frames_per_buffer=AUDIO_CHUNK,
+                stream_callback=audio_capture_callback
             )
+            audio_monitoring_stream.start_stream()
 
-        print("[AUDIO-MON] Stream monitoring otwarty")
+        print(f"[AUDIO-MON] Strumień mikrofonu otwarty (callback, bufor {AUDIO_RING_SECONDS:.0f} s)")
 
-        # Pętla monitorująca - działa dopóki audio_monitoring_active == True
+        # Pętla rozsyłająca - stałe bloki AUDIO_CHUNK (wymóg ALC), działa dopóki audio_monitoring_active == True
+        chunk_bytes = AUDIO_CHUNK * frame_bytes
+        alc_enabled = False
         while audio_monitoring_active:
-            try:
-                # Odczytaj dane audio (ale NIE zapisuj do pliku)
-                data = audio_monitoring_stream.read(AUDIO_CHUNK, exception_on_overflow=False)
-
-                # Oblicz poziom głośności
-                level_left, level_right = calculate_audio_level(data) # ZMIANA: odbierz dwa poziomy
-
-                # Thread-safe update zmiennej globalnej
-                globals()['audio_level'] = level_left           # ZMIANA
-                globals()['audio_level_right'] = level_right    # NOWY
+            data = audio_ring.read(chunk_bytes)
+            if data is None:
+                # Brak danych i zatrzymany strumień = mikrofon odłączony
+                if not audio_monitoring_stream.is_active():
+                    print("[AUDIO-MON] Strumień mikrofonu przerwany (urządzenie odłączone?)")
+                    device_lost = True
+                    audio_monitoring_active = False
+                    break
+                time.sleep(poll_interval)
+                continue
 
-            except Exception as e:
-                # Ignoruj błędy odczytu (przepełnienie bufora itp.)
-                pass
+            # ALC między mikrofonem a odbiorcami (wskaźnik pokazuje poziom po regulacji).
+            # W trakcie nagrania stan ALC jest zamrożony - zmiana opóźnienia przesunęłaby dźwięk
+            if not audio_recording:
+                alc_enabled_setting = camera_settings.get("audio_alc", True)
+                if alc_enabled_setting and not alc_enabled:
+                    audio_alc.reset()
+                alc_enabled = alc_enabled_setting
+                audio_alc_latency = audio_alc.latency if alc_enabled else 0.0
+            if alc_enabled:
+                data = audio_alc.process(data)
+
+            for subscriber in audio_subscribers:
+                try:
+                    subscriber(data)
+                except Exception as e:
+                    print(f"[AUDIO-MON] Błąd subskrybenta: {e}")
 
         # Zamknij stream po zakończeniu
         if audio_monitoring_stream:
-            audio_monitoring_stream.stop_stream()
+            try:
+                audio_monitoring_stream.stop_stream()
+            except:
+                pass
             audio_monitoring_stream.close()
             audio_monitoring_stream = None
 
-        print(f"[AUDIO-MON] Zatrzymano monitoring poziomu dźwięku")
+        print(f"[AUDIO-MON] Zatrzymano strumień mikrofonu")
 
     except Exception as e:
-        print(f"[ERROR] Błąd monitoringu audio: {e}")
+        print(f"[ERROR] Błąd strumienia mikrofonu: {e}")
+        device_lost = True
         audio_monitoring_active = False
         if audio_monitoring_stream:
             try:
@@ -1002,10 +1734,19 @@ def audio_monitoring_loop():
                 pass
             audio_monitoring_stream = None
 
+    # Urządzenie zniknęło lub nie daje się otworzyć - wykrywaj ponownie w tle (hot-plug)
+    if device_lost:
+        # Nagranie w toku kończy dźwięk w miejscu utraty - bez doklejania audio z nowego strumienia
+        subscriber = audio_recording_subscriber
+        if subscriber:
+            remove_audio_subscriber(subscriber)
+            print("[AUDIO] Mikrofon utracony w trakcie nagrania - dźwięk nagrania urwany w tym miejscu")
+        schedule_audio_redetect()
+
 
 def start_audio_monitoring():
-    """Uruchom ciągły monitoring poziomu audio"""
-    global audio_monitoring_active, audio_monitoring_thread
+    """Otwórz stały strumień mikrofonu (wskaźnik poziomu subskrybuje go od razu)"""
+    global audio_monitoring_active, audio_monitoring_thread, audio_meter, audio_meter_snapshot, audio_alc
 
     if not audio or audio_device_index is None:
         print("[WARN] Audio nie zainicjalizowane - brak monitoringu")
@@ -1016,8 +1757,12 @@ def start_audio_monitoring():
         return True
 
     audio_monitoring_active = True
+    audio_meter = AudioMeter(AUDIO_CHANNELS)
+    audio_alc = AudioALC(AUDIO_CHANNELS)
+    audio_meter_snapshot = None
+    add_audio_subscriber(update_audio_level)
 
-    # Uruchom wątek monitorujący
+    # Uruchom wątek przechwytywania
     audio_monitoring_thread = threading.Thread(target=audio_monitoring_loop, daemon=True)
     audio_monitoring_thread.start()
 
@@ -1026,11 +1771,12 @@ def start_audio_monitoring():
 
 
 def stop_audio_monitoring():
-    """NOWY: Zatrzymaj ciągły monitoring poziomu audio"""
-    global audio_monitoring_active, audio_monitoring_thread, audio_level
+    """Zamknij strumień mikrofonu (tylko przy zamykaniu aplikacji)"""
+    global audio_monitoring_active, audio_monitoring_thread, audio_meter_snapshot
 
     audio_monitoring_active = False
-    audio_level = 0.0
+    remove_audio_subscriber(update_audio_level)
+    audio_meter_snapshot = None
 
     # Poczekaj na zakończenie wątku
     if audio_monitoring_thread and audio_monitoring_thread.is_alive():
@@ -1040,110 +1786,95 @@ def stop_audio_monitoring():
     print("[AUDIO-MON] Monitoring poziomu audio zatrzymany")
 
 
-def audio_recording_thread(audio_filepath):
-    """Wątek nagrywający audio w tle"""
-    global audio_stream, audio_recording, audio_level
-
-    # Wycisz błędy ALSA podczas nagrywania
-    import os
-    import sys
-    from contextlib import contextmanager
-
-    @contextmanager
-    def suppress_alsa_errors():
-        """Tymczasowo wycisz błędy ALSA"""
-        devnull = os.open(os.devnull, os.O_WRONLY)
-        old_stderr = os.dup(2)
-        sys.stderr.flush()
-        os.dup2(devnull, 2)
-        os.close(devnull)
-        try:
-            yield
-        finally:
-            os.dup2(old_stderr, 2)
-            os.close(old_stderr)
+def audio_recording_thread(audio_filepath, mux_output, pending, pending_ready):
+    """
+    Wątek zapisu nagrania - bloki ze wspólnego strumienia mikrofonu (kolejka pending)
+    do pliku WAV lub na żywo do muxera (mux_output). Zapis dużymi blokami co AUDIO_WRITE_INTERVAL;
+    przestój karty tylko wydłuża kolejkę - przechwytywanie nie gubi próbek. Dopisuje zaległe bloki do końca.
+    """
+    global audio_recording
 
     try:
         print(f"[AUDIO] Start nagrywania: {audio_filepath}")
-        print(f"[AUDIO] Device index: {audio_device_index}")
         print(f"[AUDIO] Format: {AUDIO_FORMAT}, Channels: {AUDIO_CHANNELS}, Rate: {AUDIO_RATE}")
 
-        # Otwórz stream audio z wyciszonymi błędami ALSA
-        with suppress_alsa_errors():
-            audio_stream = audio.open(
-                format=AUDIO_FORMAT,
-                channels=AUDIO_CHANNELS,
-                rate=AUDIO_RATE,
-                input=True,
-                input_device_index=audio_device_index,
-                frames_per_buffer=AUDIO_CHUNK
-            )
-
-        print("[AUDIO] Stream otwarty pomyślnie")
+        wf = None
+        if mux_output is None:
+            # Otwórz plik WAV do zapisu
+            wf = wave.open(str(audio_filepath), 'wb')
+            wf.setnchannels(AUDIO_CHANNELS)
+            wf.setsampwidth(audio.get_sample_size(AUDIO_FORMAT))
+            wf.setframerate(AUDIO_RATE)
 
-        # Otwórz plik WAV do zapisu
-        wf = wave.open(str(audio_filepath), 'wb')
-        wf.setnchannels(AUDIO_CHANNELS)
-        wf.setsampwidth(audio.get_sample_size(AUDIO_FORMAT))
-        wf.setframerate(AUDIO_RATE)
-
-        print("[AUDIO] Plik WAV otwarty, rozpoczynam nagrywanie...")
+            print("[AUDIO] Plik WAV otwarty, rozpoczynam nagrywanie...")
+        else:
+            print("[AUDIO] Muxowanie na żywo, rozpoczynam nagrywanie...")
 
+        frame_bytes = 2 * AUDIO_CHANNELS
         frame_count = 0
-        # Nagrywaj dopóki audio_recording == True
-        while audio_recording:
-            try:
-                data = audio_stream.read(AUDIO_CHUNK, exception_on_overflow=False)
-                wf.writeframes(data)
-
-                # NAPRAWIONE: Oblicz poziom głośności i zapisz w zmiennej globalnej
-                level_left, level_right = calculate_audio_level(data) # ZMIANA: odbierz dwa poziomy
-
-                # Thread-safe update zmiennej globalnej
-                globals()['audio_level'] = level_left           # ZMIANA
-                globals()['audio_level_right'] = level_right    # NOWY
-
-                frame_count += 1
-                # Co sekundę wypisz diagnostykę
-                if frame_count % 43 == 0:  # ~1 sekunda przy 44100Hz / 1024
-                    print(f"[AUDIO] Nagrywanie... poziom L/R: {level_left:.3f}/{level_right:.3f}") # ZMIANA: diagnostyka L/R
-
-            except Exception as e:
-                print(f"[WARN] Błąd odczytu audio: {e}")
-                import traceback
-                traceback.print_exc()
-                break
+        last_log_time = time.time()
+        while True:
+            with pending_ready:
+                if audio_recording:
+                    pending_ready.wait(timeout=AUDIO_WRITE_INTERVAL)
+                if not pending and not audio_recording:
+                    break
+                chunks = list(pending)
+                pending.clear()
+
+            if not chunks:
+                continue
+            block = b"".join(chunks)
+            backlog = len(block) / frame_bytes / AUDIO_RATE
+            audio_capture_stats["writer_backlog_max"] = max(audio_capture_stats["writer_backlog_max"], backlog)
 
-        # Zamknij stream i plik
-        audio_stream.stop_stream()
-        audio_stream.close()
-        audio_stream = None
-        wf.close()
+            if mux_output is not None:
+                mux_output.write_audio(block)
+            else:
+                wf.writeframes(block)
+            frame_count += len(block) // frame_bytes
+
+            # Co sekundę wypisz diagnostykę
+            if time.time() - last_log_time >= 1.0:
+                last_log_time = time.time()
+                meter = audio_meter_snapshot
+                levels = f"{meter.rms_db[0]:.0f}/{meter.rms_db[1]:.0f} dBFS RMS" if meter else "brak"
+                if camera_settings.get("audio_alc", True) and audio_alc:
+                    levels += f", ALC {audio_alc.gain_db():+.1f} dB"
+                # Bufor może zniknąć lub zostać podmieniony (utrata/ponowne otwarcie mikrofonu)
+                ring = audio_ring
+                ring_fill = f"{ring.fill() * 100:.0f}%" if ring is not None else "brak"
+                print(f"[AUDIO] Nagrywanie... poziom L/R: {levels}, "
+                      f"bufor {ring_fill}, zaległość zapisu {backlog:.2f} s")
+
+        if wf:
+            wf.close()
 
         print(f"[AUDIO] Zatrzymano nagrywanie audio")
-        print(f"[AUDIO] Nagrano {frame_count} ramek")
+        print(f"[AUDIO] Nagrano {frame_count} próbek ({frame_count / AUDIO_RATE:.1f} s)")
 
         # Sprawdź rozmiar pliku
-        if audio_filepath.exists():
-            size = audio_filepath.stat().st_size
-            print(f"[AUDIO] Rozmiar pliku WAV: {size} bajtów")
-        else:
-            print("[ERROR] Plik audio nie został utworzony!")
+        if mux_output is None:
+            if audio_filepath.exists():
+                size = audio_filepath.stat().st_size
+                print(f"[AUDIO] Rozmiar pliku WAV: {size} bajtów")
+            else:
+                print("[ERROR] Plik audio nie został utworzony!")
 
     except Exception as e:
         print(f"[ERROR] Błąd nagrywania audio: {e}")
         import traceback
         traceback.print_exc()
         audio_recording = False
-        if audio_stream:
-            audio_stream.stop_stream()
-            audio_stream.close()
-            audio_stream = None
 
 
-def start_audio_recording(video_filepath):
-    """Rozpocznij nagrywanie audio"""
-    global audio_recording, audio_thread, audio_file, audio_level
+def start_audio_recording(video_filepath, mux_output=None):
+    """
+    Rozpocznij nagrywanie audio (mux_output - LiveMuxOutput dla muxowania na żywo, bez WAV).
+    Strumień mikrofonu jest już otwarty - zapis subskrybuje go natychmiast, bez luki na początku.
+    """
+    global audio_recording, audio_thread, audio_file, audio_recording_subscriber, audio_recording_ready
+    global audio_recording_stats_start, audio_recording_latency
 
     # Sprawdź czy nagrywanie dźwięku jest włączone w ustawieniach
     if not camera_settings.get("audio_recording", True):
@@ -1154,105 +1885,74 @@ def start_audio_recording(video_filepath):
         print("[WARN] Audio nie zainicjalizowane")
         return None
 
-    # Ścieżka do pliku audio (ten sam stem co video)
-    audio_file = video_filepath.parent / f"{video_filepath.stem}.wav"
+    # Strumień mógł paść (np. odłączony mikrofon) - otwórz ponownie
+    if not audio_monitoring_active:
+        start_audio_monitoring()
 
-    audio_level = 0.0
-    audio_recording = True
+    # Ścieżka do pliku audio (ten sam stem co video) - przy muxowaniu na żywo brak pliku WAV
+    if mux_output is None:
+        audio_file = video_filepath.parent / f"{video_filepath.stem}.wav"
+    else:
+        audio_file = None
 
-    # Uruchom wątek nagrywania
-    audio_thread = threading.Thread(target=audio_recording_thread, args=(audio_file,), daemon=True)
+    audio_recording = True
+    audio_recording_stats_start = dict(audio_capture_stats)
+    # Bloki z ALC są spóźnione o audio_alc_latency - muxer przesuwa audio o tyle wcześniej
+    audio_recording_latency = audio_alc_latency
+    if mux_output is not None:
+        mux_output.audio_latency = audio_recording_latency
+    audio_capture_stats["writer_backlog_max"] = 0
+
+    # Wątek przechwytywania tylko dokłada bloki do kolejki - zapis na kartę w wątku nagrywania
+    pending = deque()
+    pending_ready = threading.Condition()
+
+    def queue_recording_chunk(data):
+        # Bez notify - wątek zapisu budzi się co AUDIO_WRITE_INTERVAL i zapisuje jednym blokiem.
+        # Kopia - wyjście ALC to bufor nadpisywany przy kolejnym bloku (bytes z bufora pierścieniowego bez kopii)
+        block = bytes(data)
+        with pending_ready:
+            pending.append(block)
+
+    audio_recording_subscriber = queue_recording_chunk
+    audio_recording_ready = pending_ready
+    add_audio_subscriber(queue_recording_chunk)
+
+    # Uruchom wątek zapisu
+    audio_thread = threading.Thread(target=audio_recording_thread,
+                                    args=(audio_file, mux_output, pending, pending_ready), daemon=True)
     audio_thread.start()
 
     return audio_file
 
 
 def stop_audio_recording():
-    """Zatrzymaj nagrywanie audio"""
-    global audio_recording, audio_thread, audio_level, audio_level_right # ZMIANA: dodaj audio_level_right
+    """Zatrzymaj nagrywanie audio (strumień mikrofonu zostaje otwarty dla wskaźnika poziomu)"""
+    global audio_recording, audio_thread, audio_recording_subscriber, audio_recording_ready
+    global audio_recording_stats_start
 
+    if audio_recording_subscriber:
+        remove_audio_subscriber(audio_recording_subscriber)
+        audio_recording_subscriber = None
     audio_recording = False
-    audio_level = 0.0
-    audio_level_right = 0.0 # NOWY: reset prawego kanału
+    if audio_recording_ready:
+        with audio_recording_ready:
+            audio_recording_ready.notify()
+        audio_recording_ready = None
 
-    # Poczekaj na zakończenie wątku
+    # Poczekaj aż wątek zapisze zaległe bloki (przy wolnej karcie zaległość może trwać dłużej)
     if audio_thread and audio_thread.is_alive():
-        audio_thread.join(timeout=2.0)
+        audio_thread.join(timeout=5.0)
         audio_thread = None
 
-
-def merge_audio_video(video_path, audio_path):
-    """Połącz audio i video w jeden plik MP4"""
-    try:
-        print(f"[MERGE] Łączenie audio i video...")
-
-        if not audio_path.exists():
-            print("[WARN] Plik audio nie istnieje")
-            return False
-
-        if audio_path.stat().st_size < 1000:
-            print("[WARN] Plik audio zbyt mały, pomijam")
-            audio_path.unlink()
-            return True
-
-        # Plik tymczasowy dla video z audio (lokalny dysk, nie karta SD)
-        temp_output = THUMBNAIL_DIR / f"temp_merged_{video_path.name}"
-
-        # Użyj ffmpeg z precyzyjną synchronizacją audio-video
-        cmd = [
-            "ffmpeg",
-            "-i", str(video_path),              # Wejście video
-            "-itsoffset", "0.0",                # Ustaw offset audio na dokładnie 0
-            "-i", str(audio_path),              # Wejście audio
-            "-map", "0:v:0",                    # Mapuj pierwszy strumień video z pierwszego pliku
-            "-map", "1:a:0",                    # Mapuj pierwszy strumień audio z drugiego pliku
-            "-c:v", "copy",                     # Kopiuj video bez reenkodowania
-            "-c:a", "aac",                      # Enkoduj audio do AAC
-            "-b:a", "128k",                     # Bitrate audio 128kbps
-            "-ar", "48000",                     # Wymuś częstotliwość 48kHz na wyjściu
-            "-vsync", "cfr",                    # Constant Frame Rate dla video
-            "-af", "aresample=async=1:first_pts=0",  # Precyzyjna resampling z synchronizacją od 0
-            "-avoid_negative_ts", "make_zero",  # Upewnij się że timestampy startują od 0
-            "-fflags", "+genpts",               # Generuj presentation timestamps
-            # USUNIĘTO -shortest: Zachowaj pełną długość wideo, nawet jeśli audio jest krótsze
-            "-y",
-            str(temp_output)
-        ]
-
-        print(f"[MERGE] Uruchamiam ffmpeg...")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-
-        if result.returncode != 0:
-            print(f"[ERROR] Błąd ffmpeg: {result.stderr}")
-            if temp_output.exists():
-                temp_output.unlink()
-            return False
-
-        # Sprawdź czy plik został utworzony
-        if not temp_output.exists() or temp_output.stat().st_size < 1000:
-            print("[ERROR] Plik wyjściowy nieprawidłowy")
-            if temp_output.exists():
-                temp_output.unlink()
-            return False
-
-        # Zamień pliki - użyj shutil.move dla operacji między różnymi systemami plików
-        print(f"[MERGE] Przenoszenie {temp_output.stat().st_size / (1024*1024):.1f} MB na kartę SD...")
-        video_path.unlink()  # Usuń stary plik
-        shutil.move(str(temp_output), str(video_path))  # Przenieś nowy plik (działa między różnymi filesystemami)
-        print(f"[MERGE] Plik przeniesiony na kartę SD")
-
-        # Usuń plik audio
-        audio_path.unlink()
-        print(f"[MERGE] Plik audio usunięty")
-
-        print(f"[OK] Audio i video połączone")
-        return True
-
-    except Exception as e:
-        print(f"[ERROR] Błąd łączenia: {e}")
-        if 'temp_output' in locals() and temp_output.exists():
-            temp_output.unlink()
-        return False
+    # Zdarzenia strumienia w trakcie tego nagrania
+    if audio_recording_stats_start is not None:
+        delta = {key: audio_capture_stats[key] - audio_recording_stats_start[key]
+                 for key in ("input_overflows", "input_underflows", "ring_overflows")}
+        print(f"[AUDIO] Przepełnienia wejścia: {delta['input_overflows']}, "
+              f"niedobory: {delta['input_underflows']}, odrzucone bloki bufora: {delta['ring_overflows']}, "
+              f"maks. zaległość zapisu: {audio_capture_stats['writer_backlog_max']:.2f} s")
+        audio_recording_stats_start = None
 
 
 def draw_audio_level_indicator():
@@ -1260,9 +1960,8 @@ def draw_audio_level_indicator():
     if not audio or current_state != STATE_MAIN or recording:
         return
 
-    # Poziomy audio z globalnych zmiennych
-    level_left = globals().get('audio_level', 0.0)
-    level_right = globals().get('audio_level_right', 0.0)
+    # Segmenty z migawki pomiaru (poziom z balistyką, peak-hold, przesterowanie)
+    meter_left, meter_right = get_meter_segments(audio_meter_snapshot)
 
     # Pozycja nad przyciskiem P-MENU (lewy dolny róg)
     button_x = 20
@@ -1276,10 +1975,11 @@ def draw_audio_level_indicator():
     segment_height = 14  # Zmniejszone - mniej wysokie
     segment_spacing = 3  # Zwiększone z 2 na 3
 
-    # --- Napis "ALC" nad wskaźnikiem, wyrównany do lewej ---
-    alc_x = indicator_x + 8
-    alc_y = indicator_y - 25  # Nad wskaźnikiem
-    draw_text_with_outline("ALC", font_large, WHITE, BLACK, alc_x, alc_y)
+    # --- Napis "ALC" nad wskaźnikiem (tylko gdy regulacja poziomu włączona), wyrównany do lewej ---
+    if camera_settings.get("audio_alc", True):
+        alc_x = indicator_x + 8
+        alc_y = indicator_y - 25  # Nad wskaźnikiem
+        draw_text_with_outline("ALC", font_large, WHITE, BLACK, alc_x, alc_y)
 
     # --- "48K" label na początku (z czarnym outline, czcionka 70) ---
     label_48k_x = indicator_x + 8
@@ -1296,7 +1996,7 @@ def draw_audio_level_indicator():
     # --- Segmenty dla CH1 (górny rząd) - przesunięte jeszcze bardziej w prawo ---
     segments_start_x = ch_labels_x + 28 + 10 + 20  # Dodatkowe 20px przesunięcia
     bar_y_ch1 = ch1_y + 2
-    active_segments_left = int(level_left * segment_count)
+    active_segments_left, hold_segment_left, _ = meter_left
 
     for i in range(segment_count):
         segment_x = segments_start_x + i * (segment_width + segment_spacing)
@@ -1304,13 +2004,13 @@ def draw_audio_level_indicator():
         # Kolor segmentu: 10 białych (przyciemniony->zielony), 3 pomarańczowe (przyciemniony->intensywny), 2 czerwone (przyciemniony->intensywny)
         if i < 10:
             # Białe segmenty - nieaktywne przyciemnione, aktywne zielone
-            segment_color = GREEN if i < active_segments_left else (80, 80, 80)  # Przyciemniony biały
+            segment_color = GREEN if i < active_segments_left or i == hold_segment_left else (80, 80, 80)  # Przyciemniony biały
         elif i < 13:
             # Pomarańczowe segmenty - nieaktywne przyciemnione, aktywne intensywne
-            segment_color = ORANGE if i < active_segments_left else (100, 65, 0)  # Przyciemniony pomarańczowy
+            segment_color = ORANGE if i < active_segments_left or i == hold_segment_left else (100, 65, 0)  # Przyciemniony pomarańczowy
         else:
             # Czerwone segmenty - nieaktywne przyciemnione, aktywne intensywne
-            segment_color = RED if i < active_segments_left else (100, 0, 0)  # Przyciemniony czerwony
+            segment_color = RED if i < active_segments_left or i == hold_segment_left else (100, 0, 0)  # Przyciemniony czerwony
 
         # Rysuj segment z czarnym outlinem
         pygame.draw.rect(screen, segment_color, (segment_x, bar_y_ch1, segment_width, segment_height))
@@ -1318,7 +2018,7 @@ def draw_audio_level_indicator():
 
     # --- Segmenty dla CH2 (dolny rząd) ---
     bar_y_ch2 = ch2_y + 2
-    active_segments_right = int(level_right * segment_count)
+    active_segments_right, hold_segment_right, _ = meter_right
 
     for i in range(segment_count):
         segment_x = segments_start_x + i * (segment_width + segment_spacing)
@@ -1326,13 +2026,13 @@ def draw_audio_level_indicator():
         # Kolor segmentu: 10 białych (przyciemniony->zielony), 3 pomarańczowe (przyciemniony->intensywny), 2 czerwone (przyciemniony->intensywny)
         if i < 10:
             # Białe segmenty - nieaktywne przyciemnione, aktywne zielone
-            segment_color = GREEN if i < active_segments_right else (80, 80, 80)  # Przyciemniony biały
+            segment_color = GREEN if i < active_segments_right or i == hold_segment_right else (80, 80, 80)  # Przyciemniony biały
         elif i < 13:
             # Pomarańczowe segmenty - nieaktywne przyciemnione, aktywne intensywne
-            segment_color = ORANGE if i < active_segments_right else (100, 65, 0)  # Przyciemniony pomarańczowy
+            segment_color = ORANGE if i < active_segments_right or i == hold_segment_right else (100, 65, 0)  # Przyciemniony pomarańczowy
         else:
             # Czerwone segmenty - nieaktywne przyciemnione, aktywne intensywne
-            segment_color = RED if i < active_segments_right else (100, 0, 0)  # Przyciemniony czerwony
+            segment_color = RED if i < active_segments_right or i == hold_segment_right else (100, 0, 0)  # Przyciemniony czerwony
 
         # Rysuj segment z czarnym outlinem
         pygame.draw.rect(screen, segment_color, (segment_x, bar_y_ch2, segment_width, segment_height))
@@ -1359,10 +2059,17 @@ def load_config():
 
 
 def save_config():
-    """Zapisz konfigurację"""
+    """Zapisz konfigurację atomowo (plik tymczasowy + os.replace) - przerwany zapis nie psuje configu"""
     try:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(camera_settings, f, indent=2)
+        with config_lock:
+            # Kopia słownika - json.dump nie iteruje po słowniku zmienianym przez inny wątek
+            snapshot = dict(camera_settings)
+            temp_path = CONFIG_FILE.with_name(CONFIG_FILE.name + ".tmp")
+            with open(temp_path, 'w') as f:
+                json.dump(snapshot, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(str(temp_path), str(CONFIG_FILE))
         print("[OK] Konfiguracja zapisana")
     except Exception as e:
         print(f"[WARN] Błąd zapisu config: {e}")
@@ -1543,18 +2250,14 @@ def reconfigure_camera_resolution():
 
         print(f"[CAMERA] Rekonfiguracja na {resolution}...")
 
-        # Zatrzymaj kamerę
+        # Zatrzymaj wątek przechwytywania i kamerę
+        stop_camera_capture()
         camera.stop()
 
-        # Utwórz nową konfigurację
-        config = camera.create_video_configuration(
-            main={"size": res_config["size"], "format": "RGB888"},
-            controls={"FrameRate": res_config["fps"]}
-        )
-
-        # Zastosuj nową konfigurację
-        camera.configure(config)
+        # Utwórz i zastosuj nową konfigurację (main + lores)
+        create_camera_config(res_config)
         camera.start()
+        start_camera_capture()
 
         # Ponownie zastosuj ustawienia kamery (jasność, kontrast, itp.)
         apply_camera_settings()
@@ -1565,6 +2268,8 @@ def reconfigure_camera_resolution():
         print(f"[ERROR] Błąd rekonfiguracji kamery: {e}")
         import traceback
         traceback.print_exc()
+        # Wątek sam ponawia przechwytywanie po błędach
+        start_camera_capture()
 
 
 def apply_zoom(zoom_level):
@@ -1683,189 +2388,328 @@ def toggle_ir_cut():
     save_config()
 
 
-def add_date_overlay_to_video(video_path):
-    """Dodaj overlay daty do video - zachowuje FPS"""
-    if not camera_settings.get("show_date", False):
-        print("[DATE] Data wyłączona - pomijam overlay")
-        return True
-    
+# ============================================================================
+# POSTPROCESSING NAGRAŃ
+# ============================================================================
+
+def build_date_overlay_text(video_path):
+    """Przygotuj tekst daty dla nagrania (data z nazwy pliku lub data ręczna)"""
+    if camera_settings.get("manual_date"):
+        return camera_settings["manual_date"]
+
     try:
-        print(f"[DATE] Dodawanie daty do video...")
-        
-        # Pobierz FPS z nazwy pliku
-        original_fps = extract_fps_from_filename(video_path.name)
-        
-        # Jeśli nie ma w nazwie, spróbuj opencv
-        if not original_fps:
-            probe_cap = cv2.VideoCapture(str(video_path))
-            original_fps = probe_cap.get(cv2.CAP_PROP_FPS)
-            probe_cap.release()
-        
-        if not original_fps or original_fps <= 0 or original_fps > 50:
-            original_fps = get_current_fps()
-        
-        print(f"[VIDEO] Używam FPS: {original_fps}")
-        
-        # Przygotuj tekst daty
-        if camera_settings.get("manual_date"):
-            date_text = camera_settings["manual_date"]
-        else:
-            try:
-                filename_parts = video_path.stem.split('_')
-                if len(filename_parts) >= 3:
-                    date_part = filename_parts[1]
-                    time_part = filename_parts[2]
-                    date_obj = datetime.strptime(f"{date_part}_{time_part}", "%Y%m%d_%H%M%S")
-
-                    # Pobierz ustawienia formatu
-                    date_format = camera_settings.get("date_format", "DD/MM/YYYY")
-                    month_text = camera_settings.get("date_month_text", False)
-                    separator = camera_settings.get("date_separator", "/")
-                    show_time = camera_settings.get("show_time", False)
-
-                    # Skróty miesięcy
-                    month_names = ["STY", "LUT", "MAR", "KWI", "MAJ", "CZE",
-                                  "LIP", "SIE", "WRZ", "PAŹ", "LIS", "GRU"]
-
-                    # Pobierz komponenty daty
-                    day = date_obj.strftime("%d")
-                    month = month_names[date_obj.month - 1] if month_text else date_obj.strftime("%m")
-                    year = date_obj.strftime("%Y")
-                    time_str = date_obj.strftime("%H:%M:%S") if show_time else ""
-
-                    # Formatuj datę według wybranego formatu
-                    if date_format == "DD/MM/YYYY":
-                        date_text = f"{day}{separator}{month}{separator}{year}"
-                    elif date_format == "MM/DD/YYYY":
-                        date_text = f"{month}{separator}{day}{separator}{year}"
-                    elif date_format == "YYYY/MM/DD":
-                        date_text = f"{year}{separator}{month}{separator}{day}"
-                    else:
-                        date_text = f"{day}{separator}{month}{separator}{year}"
+        filename_parts = video_path.stem.split('_')
+        if len(filename_parts) >= 3:
+            date_part = filename_parts[1]
+            time_part = filename_parts[2]
+            date_obj = datetime.strptime(f"{date_part}_{time_part}", "%Y%m%d_%H%M%S")
 
-                    # Dodaj czas jeśli włączony
-                    if show_time:
-                        date_text = f"{date_text} {time_str}"
-                else:
-                    date_obj = datetime.fromtimestamp(video_path.stat().st_mtime)
-                    date_text = date_obj.strftime("%Y-%m-%d")
-            except:
-                date_text = datetime.now().strftime("%Y-%m-%d")
+            # Pobierz ustawienia formatu
+            date_format = camera_settings.get("date_format", "DD/MM/YYYY")
+            month_text = camera_settings.get("date_month_text", False)
+            separator = camera_settings.get("date_separator", "/")
+            show_time = camera_settings.get("show_time", False)
 
-        print(f"[DATE] Tekst overlay: {date_text}")
+            # Skróty miesięcy
+            month_names = ["STY", "LUT", "MAR", "KWI", "MAJ", "CZE",
+                          "LIP", "SIE", "WRZ", "PAŹ", "LIS", "GRU"]
 
-        # ESCAPOWANIE dla ffmpeg
-        date_text_escaped = date_text.replace('\\', '\\\\').replace(':', '\\:').replace("'", "\\'")
-
-        # Ustaw pozycję
-        position = camera_settings.get("date_position", "top_left")
-        margin = 30
-
-        if position == "top_left":
-            x, y = str(margin), str(margin)
-        elif position == "top_right":
-            x = f"w-text_w-{margin}"
-            y = str(margin)
-        elif position == "bottom_left":
-            x = str(margin)
-            y = f"h-text_h-{margin}"
-        elif position == "bottom_right":
-            x = f"w-text_w-{margin}"
-            y = f"h-text_h-{margin}"
-        else:
-            x, y = str(margin), str(margin)
+            # Pobierz komponenty daty
+            day = date_obj.strftime("%d")
+            month = month_names[date_obj.month - 1] if month_text else date_obj.strftime("%m")
+            year = date_obj.strftime("%Y")
+            time_str = date_obj.strftime("%H:%M:%S") if show_time else ""
 
-        # Pobierz kolor z ustawień
-        color_name = camera_settings.get("date_color", "yellow")
+            # Formatuj datę według wybranego formatu
+            if date_format == "DD/MM/YYYY":
+                date_text = f"{day}{separator}{month}{separator}{year}"
+            elif date_format == "MM/DD/YYYY":
+                date_text = f"{month}{separator}{day}{separator}{year}"
+            elif date_format == "YYYY/MM/DD":
+                date_text = f"{year}{separator}{month}{separator}{day}"
+            else:
+                date_text = f"{day}{separator}{month}{separator}{year}"
 
-        # Mapowanie rozmiarów czcionek na wartości FFmpeg
-        font_size_map = {
-            "small": 24,
-            "medium": 40,
-            "large": 56,
-            "extra_large": 72
-        }
+            # Dodaj czas jeśli włączony
+            if show_time:
+                date_text = f"{date_text} {time_str}"
+            return date_text
 
-        # Pobierz rozmiar czcionki z ustawień
-        font_size_name = camera_settings.get("date_font_size", "medium")
-        font_size = font_size_map.get(font_size_name, 40)
+        date_obj = datetime.fromtimestamp(video_path.stat().st_mtime)
+        return date_obj.strftime("%Y-%m-%d")
+    except:
+        return datetime.now().strftime("%Y-%m-%d")
+
+
+def build_drawtext_filter(date_text):
+    """Zbuduj filtr drawtext ffmpeg zgodnie z ustawieniami daty (pozycja, kolor, rozmiar, czcionka)"""
+    # ESCAPOWANIE dla ffmpeg
+    date_text_escaped = date_text.replace('\\', '\\\\').replace(':', '\\:').replace("'", "\\'")
+
+    # Ustaw pozycję
+    position = camera_settings.get("date_position", "top_left")
+    margin = 30
+
+    if position == "top_left":
+        x, y = str(margin), str(margin)
+    elif position == "top_right":
+        x = f"w-text_w-{margin}"
+        y = str(margin)
+    elif position == "bottom_left":
+        x = str(margin)
+        y = f"h-text_h-{margin}"
+    elif position == "bottom_right":
+        x = f"w-text_w-{margin}"
+        y = f"h-text_h-{margin}"
+    else:
+        x, y = str(margin), str(margin)
 
-        # Pobierz ścieżkę do wybranej czcionki z ustawień
-        font_family = camera_settings.get("font_family", "HomeVideo")
-        font_config = FONT_DEFINITIONS.get(font_family, FONT_DEFINITIONS["HomeVideo"])
-        font_path_ffmpeg = font_config["path"]
-
-        # Plik tymczasowy (lokalny dysk, nie karta SD)
-        temp_file = THUMBNAIL_DIR / f"temp_{video_path.name}"
-
-        # Filtr drawtext
-        drawtext_filter = (
-            f"drawtext="
-            f"fontfile={font_path_ffmpeg}:"
-            f"text='{date_text_escaped}':"
-            f"fontcolor={color_name}:"
-            f"fontsize={font_size}:"
-            f"borderw=3:"
-            f"bordercolor=black:"
-            f"x={x}:"
-            f"y={y}"
-        )
-        
-        print(f"[VIDEO] Filtr: {drawtext_filter}")
-        
-        # Komenda ffmpeg 
-        cmd = [
-            "ffmpeg",
-            "-i", str(video_path),
-            "-vf", drawtext_filter,
+    # Pobierz kolor z ustawień
+    color_name = camera_settings.get("date_color", "yellow")
+
+    # Pobierz rozmiar czcionki z ustawień
+    font_size_name = camera_settings.get("date_font_size", "medium")
+    font_size = DATE_FONT_SIZES.get(font_size_name, 40)
+
+    # Pobierz ścieżkę do wybranej czcionki z ustawień
+    font_family = camera_settings.get("font_family", "HomeVideo")
+    font_config = FONT_DEFINITIONS.get(font_family, FONT_DEFINITIONS["HomeVideo"])
+    font_path_ffmpeg = font_config["path"]
+
+    return (
+        f"drawtext="
+        f"fontfile={font_path_ffmpeg}:"
+        f"text='{date_text_escaped}':"
+        f"fontcolor={color_name}:"
+        f"fontsize={font_size}:"
+        f"borderw=3:"
+        f"bordercolor=black:"
+        f"x={x}:"
+        f"y={y}"
+    )
+
+
+def run_postprocess_ffmpeg(video_path, audio_path, burn_date, temp_output, audio_offset=0.0):
+    """Jedno uruchomienie ffmpeg postprocessingu do temp_output. Zwraca True przy sukcesie."""
+    cmd = ["ffmpeg", "-i", str(video_path)]
+
+    if audio_path:
+        cmd += ["-itsoffset", f"{audio_offset:.4f}", "-i", str(audio_path)]
+
+    cmd += ["-map", "0:v:0"]
+    if audio_path:
+        cmd += ["-map", "1:a:0"]
+
+    if burn_date:
+        # Data wymaga reenkodowania video - jedyny przebieg libx264
+        date_text = build_date_overlay_text(video_path)
+        print(f"[DATE] Tekst overlay: {date_text}")
+        cmd += [
+            "-vf", build_drawtext_filter(date_text),
             "-c:v", "libx264",
             "-preset", "ultrafast",
             "-crf", "23",
-            "-vsync", "0",  # Passthrough timing - NIE zmieniaj liczby klatek
-            "-c:a", "copy",
-            "-y",
-            str(temp_file)
+            "-vsync", "0",                  # Passthrough timing - NIE zmieniaj liczby klatek
         ]
-        
-        print(f"[VIDEO] Przetwarzanie ffmpeg...")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        
-        if result.returncode != 0:
-            print(f"[WARN] FFmpeg error: {result.stderr}")
-            if temp_file.exists():
-                temp_file.unlink()
-            return False
-        
-        if not temp_file.exists() or temp_file.stat().st_size < 1000:
-            print(f"[WARN] Plik tymczasowy nieprawidłowy")
-            if temp_file.exists():
-                temp_file.unlink()
+    else:
+        cmd += ["-c:v", "copy", "-vsync", "cfr"]
+
+    if audio_path:
+        cmd += [
+            "-c:a", "aac",
+            "-b:a", "128k",
+            "-ar", "48000",
+            "-af", "aresample=async=1:first_pts=0",  # Precyzyjna resampling z synchronizacją od 0
+        ]
+
+    cmd += [
+        "-avoid_negative_ts", "make_zero",
+        "-fflags", "+genpts",
+        "-f", "mp4",
+        "-y",
+        str(temp_output)
+    ]
+
+    print(f"[POST] Uruchamiam ffmpeg (audio: {bool(audio_path)}, data: {burn_date})...")
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+
+    if result.returncode != 0:
+        print(f"[ERROR] Błąd ffmpeg: {result.stderr}")
+        return False
+
+    if not temp_output.exists() or temp_output.stat().st_size < 1000:
+        print("[ERROR] Plik wyjściowy nieprawidłowy")
+        return False
+
+    return True
+
+
+def postprocess_video(video_path, audio_path=None, burn_date=None, audio_latency=0.0):
+    """
+    Jednoprzebiegowy postprocessing nagrania: muxowanie audio (AAC) i wypalenie daty
+    (drawtext) w JEDNYM uruchomieniu ffmpeg.
+    Plik tymczasowy powstaje obok nagrania (ten sam system plików), więc zamiana
+    to zwykły rename - bez kopiowania przez THUMBNAIL_DIR.
+    Gdy przebieg z datą się nie uda, audio jest muxowane bez daty (kopia video).
+    Plik WAV jest usuwany tylko po udanym muxowaniu.
+    audio_latency - opóźnienie toru audio (ALC), audio jest przesuwane o tyle wcześniej.
+    Zwraca True jeśli plik końcowy jest gotowy.
+    """
+    if burn_date is None:
+        burn_date = camera_settings.get("show_date", False)
+
+    # Audio tylko jeśli plik istnieje i nie jest pusty
+    use_audio = False
+    if audio_path and audio_path.exists():
+        if audio_path.stat().st_size < 1000:
+            print("[WARN] Plik audio zbyt mały, pomijam")
+            audio_path.unlink()
+        else:
+            use_audio = True
+
+    if not use_audio and not burn_date:
+        print("[POST] Brak audio i daty - plik jest gotowy")
+        return True
+
+    # Plik tymczasowy na tym samym nośniku - ukryty i bez .mp4, skan galerii go pomija
+    temp_output = video_path.with_name(f".{video_path.stem}.postprocess.tmp")
+
+    try:
+        success = run_postprocess_ffmpeg(video_path, audio_path if use_audio else None, burn_date, temp_output,
+                                         -audio_latency)
+        if not success and use_audio and burn_date:
+            # Nie trać dźwięku przez błąd drawtext - sam mux audio bez daty
+            print("[POST] Ponawiam muxowanie audio bez daty...")
+            success = run_postprocess_ffmpeg(video_path, audio_path, False, temp_output, -audio_latency)
+        if not success:
+            if use_audio:
+                print(f"[POST] Plik audio zachowany: {audio_path.name}")
             return False
-        
-        # Weryfikacja FPS
-        verify_cap = cv2.VideoCapture(str(temp_file))
-        output_fps = verify_cap.get(cv2.CAP_PROP_FPS)
-        verify_cap.release()
-        
-        print(f"[OK] FPS: {output_fps:.2f} (oczekiwano: {original_fps:.2f})")
-        
-        # Zamiana plików - użyj shutil.move dla operacji między różnymi systemami plików
-        print(f"[DATE] Przenoszenie {temp_file.stat().st_size / (1024*1024):.1f} MB na kartę SD...")
-        video_path.unlink()  # Usuń stary plik
-        shutil.move(str(temp_file), str(video_path))  # Przenieś nowy plik (działa między różnymi filesystemami)
-        print(f"[DATE] Plik przeniesiony na kartę SD")
 
-        print(f"[OK] Data dodana pomyślnie")
+        # Atomowa zamiana na tym samym systemie plików
+        os.replace(str(temp_output), str(video_path))
+        print(f"[POST] Plik gotowy: {video_path.stat().st_size / (1024*1024):.1f} MB")
+
+        if use_audio:
+            audio_path.unlink()
+            print(f"[POST] Plik audio usunięty")
+
         return True
-        
+
     except Exception as e:
-        print(f"[WARN] Błąd dodawania daty: {e}")
+        print(f"[ERROR] Błąd postprocessingu: {e}")
         import traceback
         traceback.print_exc()
-        if 'temp_file' in locals() and temp_file.exists():
-            temp_file.unlink()
         return False
 
+    finally:
+        if temp_output.exists():
+            try:
+                temp_output.unlink()
+            except:
+                pass
+
+
+# ============================================================================
+# ZNACZNIK DATY W CZASIE RZECZYWISTYM (pre_callback Picamera2)
+# ============================================================================
+
+def render_date_stamp_bitmap(date_text):
+    """
+    Wyrenderuj tekst daty (czcionka, kolor, rozmiar z ustawień, czarny obrys 3px) do bitmapy.
+    Zwraca (bgr uint8 HxWx3, alpha uint16 HxWx1 w zakresie 0-256).
+    """
+    color = DATE_COLORS.get(camera_settings.get("date_color", "yellow"), YELLOW)
+
+    # Te same rozmiary co w filtrze drawtext (piksele klatki nagrania)
+    font_size = DATE_FONT_SIZES.get(camera_settings.get("date_font_size", "medium"), 40)
+
+    font_family = camera_settings.get("font_family", "HomeVideo")
+    font_config = FONT_DEFINITIONS.get(font_family, FONT_DEFINITIONS["HomeVideo"])
+    try:
+        pil_font = ImageFont.truetype(font_config["path"], font_size)
+    except Exception:
+        pil_font = ImageFont.load_default()
+
+    stroke = 3
+    left, top, right, bottom = pil_font.getbbox(date_text, stroke_width=stroke)
+    width = max(1, right - left)
+    height = max(1, bottom - top)
+
+    image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    ImageDraw.Draw(image).text((-left, -top), date_text, font=pil_font, fill=color + (255,),
+                               stroke_width=stroke, stroke_fill=(0, 0, 0, 255))
+
+    rgba = np.asarray(image)
+    bgr = np.ascontiguousarray(rgba[:, :, 2::-1])
+    # Alfa 0-255 -> 0-256, aby mieszanie było przesunięciem bitowym
+    alpha = rgba[:, :, 3:4].astype(np.uint16)
+    alpha += alpha >> 7
+    return bgr, alpha
+
+
+def date_stamp_pre_callback(request):
+    """Wypal znacznik daty w klatce przed enkoderem H264 - bitmapa tylko przy zmianie tekstu"""
+    global date_stamp_cache
+
+    try:
+        # Tekst sprawdzaj raz na sekundę (tyle wynosi rozdzielczość wyświetlanego czasu)
+        now_second = int(time.time())
+        if date_stamp_cache["second"] != now_second:
+            date_stamp_cache["second"] = now_second
+            date_text = get_display_date()
+            if date_text != date_stamp_cache["text"]:
+                bgr, alpha = render_date_stamp_bitmap(date_text)
+                date_stamp_cache["text"] = date_text
+                date_stamp_cache["bgr"] = bgr
+                date_stamp_cache["alpha"] = alpha
+                date_stamp_cache["inv_alpha"] = 256 - alpha
+
+        bgr = date_stamp_cache["bgr"]
+        if bgr is None:
+            return
+
+        with MappedArray(request, "main") as m:
+            frame = m.array
+            frame_h, frame_w = frame.shape[:2]
+            text_h, text_w = bgr.shape[:2]
+            margin = 30
+
+            position = camera_settings.get("date_position", "top_left")
+            x = frame_w - text_w - margin if position in ("top_right", "bottom_right") else margin
+            y = frame_h - text_h - margin if position in ("bottom_left", "bottom_right") else margin
+            if x < 0 or y < 0:
+                return
+
+            roi = frame[y:y + text_h, x:x + text_w, :3]
+            blended = roi * date_stamp_cache["inv_alpha"]
+            blended += bgr * date_stamp_cache["alpha"]
+            roi[:] = blended >> 8
+
+    except Exception as e:
+        if not date_stamp_cache.get("error_reported"):
+            date_stamp_cache["error_reported"] = True
+            print(f"[DATE] Błąd znacznika daty w czasie rzeczywistym: {e}")
+
+
+def enable_date_stamp():
+    """Włącz wypalanie daty w klatkach nagrania. Zwraca True jeśli pre_callback aktywny."""
+    global date_stamp_cache
+
+    if not camera or not camera_settings.get("show_date", False):
+        return False
+
+    date_stamp_cache = {"second": None, "text": None, "bgr": None, "alpha": None, "inv_alpha": None}
+    camera.pre_callback = date_stamp_pre_callback
+    print("[DATE] Znacznik daty wypalany w czasie rzeczywistym")
+    return True
+
+
+def disable_date_stamp():
+    """Wyłącz wypalanie daty w klatkach"""
+    if camera:
+        camera.pre_callback = None
+
 
 # ============================================================================
 # MENU SYSTEM
@@ -1904,6 +2748,20 @@ def init_menu_tiles():
             "icon": "[VIDEO]",
             "section": "Image Quality/Size"
         },
+        {
+            "id": "live_audio_mux",
+            "label": "Dźwięk na żywo",
+            "value": lambda: "WŁ." if camera_settings.get("live_audio_mux", True) else "WYŁ.",
+            "icon": "[VIDEO]",
+            "section": "Image Quality/Size"
+        },
+        {
+            "id": "audio_alc",
+            "label": "Auto poziom (ALC)",
+            "value": lambda: "WŁ." if camera_settings.get("audio_alc", True) else "WYŁ.",
+            "icon": "[VIDEO]",
+            "section": "Image Quality/Size"
+        },
         {
             "id": "font",
             "label": "Czcionka",
@@ -2232,38 +3090,12 @@ def popup_confirm():
         close_popup()
 
 
-def draw_menu_tiles(frame):
+def draw_menu_tiles():
     """Rysuj menu z sekcjami pionowo po lewej stronie - ZMODYFIKOWANY UKŁAD"""
-    if frame is not None:
-        try:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_resized = cv2.resize(frame_rgb, (SCREEN_WIDTH, SCREEN_HEIGHT))
-            frame_surface = pygame.surfarray.make_surface(np.transpose(frame_resized, (1, 0, 2)))
-            screen.blit(frame_surface, (0, 0))
-        except:
-            screen.fill(BLACK)
-    else:
-        screen.fill(BLACK)
-
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-    overlay.set_alpha(220)
-    overlay.fill(BLACK)
-    screen.blit(overlay, (0, 0))
-
-    
+    # Tło menu jest nieprzezroczystym gradientem - klatka z kamery i tak byłaby zasłonięta
     blue_gray_top = (70, 90, 110)  # Niebiesko-szary kolor
 
-    gradient_height = SCREEN_HEIGHT
-    start_color = BLACK
-    end_color = blue_gray_top
-
-    for y in range(gradient_height):
-        ratio = y / gradient_height
-        r = int(start_color[0] * (1 - ratio) + end_color[0] * ratio)
-        g = int(start_color[1] * (1 - ratio) + end_color[1] * ratio) 
-        b = int(start_color[2] * (1 - ratio) + end_color[2] * ratio)
-        color = (r, g, b)
-        pygame.draw.line(screen, color, (0, y), (SCREEN_WIDTH, y))
+    screen.blit(get_vertical_gradient((SCREEN_WIDTH, SCREEN_HEIGHT), BLACK, blue_gray_top), (0, 0))
 
     
 
@@ -2284,40 +3116,8 @@ def draw_menu_tiles(frame):
     dark_blue_gray = (40, 50, 60)  # Ciemniejszy odcień niebiesko-szarego
     pygame.draw.rect(screen, dark_blue_gray, (list_panel_x, list_panel_y, list_panel_width, list_panel_height), border_radius=10)
 
-    # Dodaj liniowy gradient - co 15 pikseli jasność +2, grubość linii -1 (start: 10px)
-    # Cykl powtarza się gdy grubość dojdzie do 0
-    line_spacing = 15
-    brightness_increment = 2
-    initial_line_thickness = 10
-    cycle_length = initial_line_thickness + 1  # +1 żeby uwzględnić 0
-
-    current_y = list_panel_y + line_spacing
-    line_index = 0
-
-    while current_y < list_panel_y + list_panel_height:
-        # Cykliczny indeks (resetuje się po osiągnięciu cycle_length)
-        cyclic_index = line_index % cycle_length
-
-        # Oblicz nową jasność koloru
-        brightness_boost = cyclic_index * brightness_increment
-        line_color = (
-            min(255, dark_blue_gray[0] + brightness_boost),
-            min(255, dark_blue_gray[1] + brightness_boost),
-            min(255, dark_blue_gray[2] + brightness_boost)
-        )
-
-        # Oblicz grubość linii (zmniejsza się o 1 co iterację, potem resetuje)
-        line_thickness = initial_line_thickness - cyclic_index
-
-        # Rysuj linię tylko jeśli ma grubość > 0
-        if line_thickness > 0:
-            for i in range(line_thickness):
-                pygame.draw.line(screen, line_color,
-                               (list_panel_x + 10, current_y + i),
-                               (list_panel_x + list_panel_width - 10, current_y + i))
-
-        current_y += line_spacing
-        line_index += 1
+    # Liniowy gradient (paski) - wyrenderowany raz i zapamiętany
+    screen.blit(get_striped_panel(list_panel_width, list_panel_height, dark_blue_gray), (list_panel_x, list_panel_y))
 
     pygame.draw.rect(screen, LIGHT_BLUE, (list_panel_x, list_panel_y, list_panel_width, list_panel_height), 3, border_radius=10)
 
@@ -2335,55 +3135,12 @@ def draw_menu_tiles(frame):
 
     # Ucinamy 2/3 trójkąta (rysujemy tylko dolną 1/3)
     cut_offset = (triangle_height * 2) // 3
-    visible_height = triangle_height - cut_offset
-
-    # Oblicz wymiary powierzchni dla trójkąta
-    triangle_surface_width = list_panel_width
-    triangle_surface_height = visible_height
-
-    # Utwórz osobną powierzchnię dla trójkąta z alpha
-    triangle_surface = pygame.Surface((triangle_surface_width, triangle_surface_height), pygame.SRCALPHA)
 
-    # Rysujemy trójkąt linia po linii z gradientem alpha
-    for y_offset in range(visible_height):
-        # Oblicz współrzędną Y (od 2/3 wysokości do dołu)
-        current_y = triangle_top[1] + cut_offset + y_offset
-
-        # Jeśli jesteśmy poza obszarem ekranu, przerwij
-        if current_y >= list_panel_y + list_panel_height:
-            break
-
-        # Oblicz szerokość linii na tej wysokości (interpolacja liniowa)
-        # Im niżej, tym szersza linia - obliczamy od początku trójkąta
-        progress_from_top = (cut_offset + y_offset) / triangle_height
-        line_width = int(list_panel_width * progress_from_top)
-
-        # Gradient alpha: od dołu (255) do góry (0)
-        alpha_ratio = y_offset / visible_height
-        alpha = int(255 * alpha_ratio)
-
-        # Oblicz pozycję X względem lewego górnego rogu surface
-        line_x_start = (triangle_surface_width - line_width) // 2
-
-        # Rysuj linię na surface
-        line_color_with_alpha = (*triangle_base_color, alpha)
-        for x in range(line_width):
-            triangle_surface.set_at((line_x_start + x, y_offset), line_color_with_alpha)
-
-    # Zastosuj lekkie rozmycie Gaussowskie
-    # Używamy pygame.transform.smoothscale do symulacji rozmycia
-    blur_size = max(2, triangle_surface_width // 50)  # Dynamiczny rozmiar rozmycia
-    temp_small = pygame.transform.smoothscale(triangle_surface,
-                                              (triangle_surface_width // blur_size,
-                                               triangle_surface_height // blur_size))
-    triangle_surface_blurred = pygame.transform.smoothscale(temp_small,
-                                                            (triangle_surface_width,
-                                                             triangle_surface_height))
-
-    # Narysuj rozmyty trójkąt na ekranie
+    # Narysuj rozmyty trójkąt na ekranie (wyrenderowany raz i zapamiętany)
     triangle_blit_x = list_panel_x
     triangle_blit_y = triangle_top[1] + cut_offset
-    screen.blit(triangle_surface_blurred, (triangle_blit_x, triangle_blit_y))
+    screen.blit(get_menu_triangle(list_panel_width, triangle_height, cut_offset, triangle_base_color),
+                (triangle_blit_x, triangle_blit_y))
 
     # Sekcje po lewej stronie (pionowo, jedna pod drugą)
     sections = [
@@ -2496,23 +3253,8 @@ def draw_menu_tiles(frame):
             # Jasnoniebieski dla górnej 1/3
             light_blue = (100, 150, 255)
 
-            # Rysuj gradient - górna 1/3 z przejściem
-            gradient_height = rect_h // 3
-            for y_offset in range(rect_h):
-                if y_offset < gradient_height:
-                    # Gradient od jasnego do ciemnego
-                    ratio = y_offset / gradient_height
-                    r = int(light_blue[0] * (1 - ratio) + dark_navy[0] * ratio)
-                    g = int(light_blue[1] * (1 - ratio) + dark_navy[1] * ratio)
-                    b = int(light_blue[2] * (1 - ratio) + dark_navy[2] * ratio)
-                    color = (r, g, b)
-                else:
-                    # Ciemno granatowy dla reszty
-                    color = dark_navy
-
-                pygame.draw.line(screen, color,
-                               (rect_x, rect_y + 8 + y_offset),
-                               (rect_x + rect_w, rect_y + 8 + y_offset))
+            # Gradient - górna 1/3 z przejściem (wyrenderowany raz i zapamiętany)
+            screen.blit(get_selection_gradient(rect_w, rect_h, light_blue, dark_navy), (rect_x, rect_y + 8))
 
             # Obramowanie - pomarańczowe gdy edytujemy wartość, białe normalnie
             border_color = ORANGE if menu_value_editing else WHITE
@@ -2604,19 +3346,10 @@ def draw_menu_tiles(frame):
             has_polish = any(char in value_text_upper for char in polish_chars)
             y_offset = general_offset + (polish_offset if has_polish else 0)
 
-            # Rysuj outline
+            # Tekst z czarnym outline - jeden blit gotowego Surface z cache
             outline_width = 2
-            for dx in range(-outline_width, outline_width + 1):
-                for dy in range(-outline_width, outline_width + 1):
-                    if dx == 0 and dy == 0:
-                        continue
-                    text_surface_outline = menu_font.render(value_text_upper, True, BLACK)
-                    text_rect_outline = text_surface_outline.get_rect(topright=(value_x + dx, current_y + 20 + y_offset + dy))
-                    screen.blit(text_surface_outline, text_rect_outline)
-
-            # Rysuj tekst daty
-            text_surface = menu_font.render(value_text_upper, True, value_color)
-            text_rect = text_surface.get_rect(topright=(value_x, current_y + 20 + y_offset))
+            text_surface = get_text_surface(value_text_upper, menu_font, value_color, BLACK, outline_width)
+            text_rect = text_surface.get_rect(topright=(value_x + outline_width, current_y + 20 + y_offset - outline_width))
             screen.blit(text_surface, text_rect)
         else:
             # Standardowe rysowanie dla innych wartości
@@ -2629,19 +3362,10 @@ def draw_menu_tiles(frame):
             # Oblicz całkowity offset: ogólny offset + offset dla polskich znaków (jeśli są)
             y_offset = general_offset + (polish_offset if has_polish else 0)
 
-            # Rysuj czarny outline dla value
+            # Tekst z czarnym outline - jeden blit gotowego Surface z cache
             outline_width = 2
-            for dx in range(-outline_width, outline_width + 1):
-                for dy in range(-outline_width, outline_width + 1):
-                    if dx == 0 and dy == 0:
-                        continue
-                    text_surface_outline = menu_font.render(value_text_upper, True, BLACK)
-                    text_rect_outline = text_surface_outline.get_rect(topright=(value_x + dx, current_y + 20 + y_offset + dy))
-                    screen.blit(text_surface_outline, text_rect_outline)
-
-            # Rysuj właściwy tekst value
-            text_surface = menu_font.render(value_text_upper, True, value_color)
-            text_rect = text_surface.get_rect(topright=(value_x, current_y + 20 + y_offset))
+            text_surface = get_text_surface(value_text_upper, menu_font, value_color, BLACK, outline_width)
+            text_rect = text_surface.get_rect(topright=(value_x + outline_width, current_y + 20 + y_offset - outline_width))
             screen.blit(text_surface, text_rect)
 
     # Wskaźniki scrollowania dla listy opcji
@@ -2777,33 +3501,8 @@ def draw_selection_popup():
     dark_blue_gray = (40, 50, 60)
     pygame.draw.rect(screen, dark_blue_gray, (popup_x, popup_y, popup_width, popup_height))
 
-    # Dodaj liniowy gradient - algorytm jak w głównym kwadracie
-    line_spacing = 15
-    brightness_increment = 2
-    initial_line_thickness = 10
-    cycle_length = initial_line_thickness + 1
-
-    current_y = popup_y + line_spacing
-    line_index = 0
-
-    while current_y < popup_y + popup_height:
-        cyclic_index = line_index % cycle_length
-        brightness_boost = cyclic_index * brightness_increment
-        line_color = (
-            min(255, dark_blue_gray[0] + brightness_boost),
-            min(255, dark_blue_gray[1] + brightness_boost),
-            min(255, dark_blue_gray[2] + brightness_boost)
-        )
-        line_thickness = initial_line_thickness - cyclic_index
-
-        if line_thickness > 0:
-            for i in range(line_thickness):
-                pygame.draw.line(screen, line_color,
-                               (popup_x + 10, current_y + i),
-                               (popup_x + popup_width - 10, current_y + i))
-
-        current_y += line_spacing
-        line_index += 1
+    # Liniowy gradient (paski) - wyrenderowany raz i zapamiętany
+    screen.blit(get_striped_panel(popup_width, popup_height, dark_blue_gray), (popup_x, popup_y))
 
     # Białe obramowanie wokół całego okna
     pygame.draw.rect(screen, LIGHT_BLUE, (popup_x, popup_y, popup_width, popup_height), 3)
@@ -2892,23 +3591,8 @@ def draw_selection_popup():
             dark_navy = (15, 30, 60)
             light_blue = (100, 150, 255)
 
-            # Rysuj gradient - górna 1/3 z przejściem
-            gradient_height_grad = rect_h // 3
-            for y_offset in range(rect_h):
-                if y_offset < gradient_height_grad:
-                    # Gradient od jasnego do ciemnego
-                    ratio = y_offset / gradient_height_grad
-                    r = int(light_blue[0] * (1 - ratio) + dark_navy[0] * ratio)
-                    g = int(light_blue[1] * (1 - ratio) + dark_navy[1] * ratio)
-                    b = int(light_blue[2] * (1 - ratio) + dark_navy[2] * ratio)
-                    color = (r, g, b)
-                else:
-                    # Ciemno granatowy dla reszty
-                    color = dark_navy
-
-                pygame.draw.line(screen, color,
-                               (rect_x, rect_y + y_offset),
-                               (rect_x + rect_w, rect_y + y_offset))
+            # Gradient - górna 1/3 z przejściem (wyrenderowany raz i zapamiętany)
+            screen.blit(get_selection_gradient(rect_w, rect_h, light_blue, dark_navy), (rect_x, rect_y))
 
             # Białe obramowanie 5px
             pygame.draw.rect(screen, WHITE, (rect_x, rect_y, rect_w, rect_h), 5)
@@ -3179,6 +3863,28 @@ def update_battery_estimate():
         battery_last_check_time = current_time
 
 
+def get_battery_display_texts():
+    """Teksty obok ikony baterii: (procent z dokładnością 0.1%, czas pracy hh:mm lub --:-- gdy ładuje)"""
+    if battery_is_charging:
+        # Podczas ładowania pokaż --:--
+        time_text = "--:--"
+    else:
+        # Podczas rozładowania pokaż rzeczywisty czas
+        hours = battery_estimated_minutes // 60
+        minutes = battery_estimated_minutes % 60
+
+        # Ogranicz maksymalny czas do 99:59
+        if hours > 99:
+            hours = 99
+            minutes = 59
+
+        time_text = f"{hours:02d}:{minutes:02d}"
+
+    # Użyj śledzonego maksymalnego poziomu (który tylko maleje podczas rozładowania)
+    percent_text = f"{battery_max_displayed_level:.1f}%"
+    return percent_text, time_text
+
+
 def draw_battery_icon():
     """Rysuj ikonę baterii z 4 segmentami w lewym górnym rogu (biała/zielona z piorunkiem gdy ładuje)"""
     # Użyj stanu z histerezy zamiast sprawdzać prąd bezpośrednio
@@ -3306,26 +4012,8 @@ def draw_battery_icon():
         # Żółty wypełniony piorun
         pygame.draw.polygon(screen, YELLOW, lightning_points)
 
-    # Szacowany czas pracy baterii NA PRAWO od ikony baterii - FORMAT hh:mm lub --:-- gdy ładuje
-    if is_charging:
-        # Podczas ładowania pokaż --:--
-        time_text = "--:--"
-    else:
-        # Podczas rozładowania pokaż rzeczywisty czas
-        hours = battery_estimated_minutes // 60
-        minutes = battery_estimated_minutes % 60
-
-        # Ogranicz maksymalny czas do 99:59
-        if hours > 99:
-            hours = 99
-            minutes = 59
-
-        time_text = f"{hours:02d}:{minutes:02d}"
-
-    # Użyj śledzonego maksymalnego poziomu (który tylko maleje podczas rozładowania)
-    precise_percent = battery_max_displayed_level
-
-    percent_text = f"{precise_percent:.1f}%"
+    # Szacowany czas pracy i procent NA PRAWO od ikony baterii
+    percent_text, time_text = get_battery_display_texts()
 
     # NAPRAWIONE: Pozycja tekstów NA PRAWO od baterii w JEDNEJ LINII (poziomo)
     # Wyrównane do prawej krawędzi baterii
@@ -3337,7 +4025,7 @@ def draw_battery_icon():
     percent_x = text_start_x
 
     # Oblicz szerokość tekstu procentu
-    percent_text_surface = font_large.render(percent_text, True, WHITE)
+    percent_text_surface = get_text_surface(percent_text, font_large, WHITE)
     percent_text_width = percent_text_surface.get_width()
 
     # Czas po prawej stronie procentu (w jednej linii, odstęp 20px)
@@ -3371,7 +4059,7 @@ def draw_format_fps():
     fps_value = res_config["fps"]
 
     # Rysuj format w białym owalu z czarnym obramowaniem
-    format_text_surface = font_large.render(format_name, True, BLACK)
+    format_text_surface = get_text_surface(format_name, font_large, BLACK)
     format_text_width = format_text_surface.get_width()
     format_text_height = format_text_surface.get_height()
 
@@ -3383,7 +4071,7 @@ def draw_format_fps():
 
     # FPS po prawej stronie (obliczamy najpierw żeby znać całkowitą szerokość)
     fps_text = f"{fps_value}FPS"
-    fps_text_surface = font_large.render(fps_text, True, WHITE)
+    fps_text_surface = get_text_surface(fps_text, font_large, WHITE)
     fps_text_width = fps_text_surface.get_width()
 
     # Wyrównaj do prawej krawędzi
@@ -3463,7 +4151,7 @@ def draw_recording_indicator():
         timecode_text = f"TC {hours:02d}:{minutes:02d}:{seconds:02d}"
 
         # Oblicz szerokość napisu REC
-        rec_text_surface = menu_font.render("REC", True, RED)
+        rec_text_surface = get_text_surface("REC", menu_font, RED)
         rec_text_width = rec_text_surface.get_width()
 
         # Pozycja REC wyrównana do prawej
@@ -3477,7 +4165,7 @@ def draw_recording_indicator():
         draw_text_with_outline("REC", menu_font, RED, BLACK, rec_x, rec_y)
 
         # Oblicz szerokość timecode
-        tc_text_surface = menu_font.render(timecode_text, True, WHITE)
+        tc_text_surface = get_text_surface(timecode_text, menu_font, WHITE)
         tc_text_width = tc_text_surface.get_width()
 
         # TC na lewo od REC
@@ -3486,7 +4174,7 @@ def draw_recording_indicator():
         draw_text_with_outline(timecode_text, menu_font, WHITE, BLACK, tc_x, rec_y)
     else:
         # STBY wyrównane do prawej
-        stby_text_surface = menu_font.render("STBY", True, GREEN)
+        stby_text_surface = get_text_surface("STBY", menu_font, GREEN)
         stby_text_width = stby_text_surface.get_width()
         stby_x = SCREEN_WIDTH - right_margin - stby_text_width
 
@@ -3510,7 +4198,7 @@ def draw_error_message():
     padding = 30
 
     # Renderuj tekst aby poznać wymiary
-    text_surface = font_large.render(error_message, True, WHITE)
+    text_surface = get_text_surface(error_message, font_large, WHITE)
     text_width = text_surface.get_width()
     text_height = text_surface.get_height()
 
@@ -3554,56 +4242,104 @@ def draw_menu_button():
     draw_text("P-MENU", font_large, BLACK, button_x + button_width // 2, button_y + button_height // 2, center=True)
 
 
+def decode_keyframe_thumbnail(video_path, seconds):
+    """
+    Zdekoduj klatkę kluczową najbliższą pozycji seconds, od razu przeskalowaną do 320x180.
+    ffmpeg pomija klatki międzyobrazowe (-skip_frame nokey), więc nie dekoduje całego GOP.
+    Zwraca obraz BGR (numpy) lub None.
+    """
+    width, height = 320, 180
+    cmd = [
+        "ffmpeg", "-loglevel", "error", "-threads", "1",
+        "-skip_frame", "nokey",
+        "-ss", f"{seconds:.3f}",
+        "-noaccurate_seek",  # Klatka kluczowa przed pozycją, bez odrzucania klatek do celu
+        "-i", str(video_path),
+        "-an",
+        "-frames:v", "1",
+        "-vf", f"scale={width}:{height}:flags=fast_bilinear",
+        "-f", "rawvideo",
+        "-pix_fmt", "bgr24",
+        "-"
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=30)
+    except Exception as e:
+        print(f"[WARN] Błąd ffmpeg ({seconds:.1f} s): {e}")
+        return None
+
+    if result.returncode != 0 or len(result.stdout) < width * height * 3:
+        return None
+    return np.frombuffer(result.stdout, dtype=np.uint8, count=width * height * 3).reshape(height, width, 3)
+
+
+def score_thumbnail_frame(frame):
+    """Ocena kandydata na miniaturkę: ostrość (wariancja laplasjanu) z karą za ciemną lub prześwietloną klatkę"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
+    brightness = gray.mean()
+    if brightness < THUMBNAIL_MIN_BRIGHTNESS or brightness > THUMBNAIL_MAX_BRIGHTNESS:
+        sharpness *= 0.1
+    return sharpness
+
+
 def generate_thumbnail(video_path, max_retries=3):
-    """Generuj miniaturkę"""
+    """
+    Generuj miniaturkę z reprezentatywnej klatki: kilka klatek kluczowych z różnych
+    miejsc filmu (nie klatka 0 - tam ekspozycja dopiero się ustala), wybrana najostrzejsza
+    o poprawnej jasności.
+    """
     thumbnail_path = THUMBNAIL_DIR / f"{video_path.stem}.jpg"
-    
+
     for attempt in range(max_retries):
         try:
             print(f"[THUMB] Miniatura: {video_path.name} (próba {attempt + 1}/{max_retries})")
-            
+
             if not video_path.exists():
                 print(f"[WARN] Plik nie istnieje")
                 time.sleep(1)
                 continue
-            
+
             file_size = video_path.stat().st_size
             if file_size < 10000:
                 print(f"[WARN] Plik za mały: {file_size} B")
                 time.sleep(1)
                 continue
-            
-            cap = cv2.VideoCapture(str(video_path))
-            
-            if not cap.isOpened():
-                print(f"[WARN] Nie można otworzyć")
-                cap.release()
-                time.sleep(1)
-                continue
-            
-            ret, frame = cap.read()
-            cap.release()
-            
-            if not ret or frame is None:
+
+            # Kandydaci: ułamki długości filmu (krótki film lub brak długości - tylko początek)
+            # Długość z indeksu metadanych; świeże nagranie (znacznik .processing) nie jest
+            # jeszcze indeksowane - wtedy jednorazowe ffprobe bez zapisu do indeksu
+            metadata = get_video_metadata(video_path) or probe_video_metadata(video_path)
+            duration = metadata["duration"]
+            if duration > 1.0:
+                candidates = [duration * fraction for fraction in THUMBNAIL_CANDIDATE_POSITIONS]
+            else:
+                candidates = [0.0]
+
+            best_frame = None
+            best_score = -1.0
+            for seconds in candidates:
+                frame = decode_keyframe_thumbnail(video_path, seconds)
+                if frame is None:
+                    continue
+                score = score_thumbnail_frame(frame)
+                if score > best_score:
+                    best_frame, best_score = frame, score
+
+            if best_frame is None:
                 print(f"[WARN] Nie można pobrać klatki")
                 time.sleep(1)
                 continue
-            
-            if frame.shape[0] < 10 or frame.shape[1] < 10:
-                print(f"[WARN] Klatka zbyt mała")
-                time.sleep(1)
-                continue
-            
-            frame_resized = cv2.resize(frame, (320, 180))
-            success = cv2.imwrite(str(thumbnail_path), frame_resized)
-            
+
+            success = cv2.imwrite(str(thumbnail_path), best_frame)
+
             if not success:
                 print(f"[WARN] Nie można zapisać")
                 time.sleep(1)
                 continue
-            
+
             if thumbnail_path.exists() and thumbnail_path.stat().st_size > 1000:
-                print(f"[OK] Miniatura OK")
+                print(f"[OK] Miniatura OK (ocena {best_score:.0f}, kandydatów: {len(candidates)})")
                 return True
             else:
                 print(f"[WARN] Miniatura nieprawidłowa")
@@ -3611,24 +4347,400 @@ def generate_thumbnail(video_path, max_retries=3):
                     thumbnail_path.unlink()
                 time.sleep(1)
                 continue
-                
+
         except Exception as e:
             print(f"[WARN] Błąd (próba {attempt + 1}): {e}")
             if attempt < max_retries - 1:
                 time.sleep(2)
             continue
-    
+
     print(f"[ERROR] Nie udało się po {max_retries} próbach")
     return False
 
 
+def get_sprite_sheet_path(video_path):
+    """Ścieżka arkusza podglądów filmu (obok miniaturki)"""
+    return THUMBNAIL_DIR / f"{video_path.stem}{SPRITE_SUFFIX}"
+
+
+def generate_sprite_sheet(video_path, duration):
+    """
+    Wygeneruj arkusz podglądów: SPRITE_COLUMNS x SPRITE_ROWS równo rozłożonych klatek
+    w niskiej rozdzielczości, jednym przebiegiem ffmpeg (filtr tile).
+    Dekodowane są tylko klatki kluczowe (-skip_frame nokey) - koszt nie zależy od długości
+    GOP-ów ani liczby klatek, postprocessing nie dekoduje całego filmu drugi raz. Przy krótkich
+    filmach kilka sąsiednich kafli może pokazać tę samą klatkę kluczową.
+    """
+    sprite_path = get_sprite_sheet_path(video_path)
+    tile_count = SPRITE_COLUMNS * SPRITE_ROWS
+    if duration <= 0:
+        return False
+
+    cmd = [
+        "ffmpeg", "-loglevel", "error", "-y", "-threads", "1",
+        "-skip_frame", "nokey",
+        "-i", str(video_path),
+        "-an",
+        "-vf", (f"fps={tile_count}/{duration:.3f},"
+                f"scale={SPRITE_TILE_WIDTH}:{SPRITE_TILE_HEIGHT}:force_original_aspect_ratio=decrease,"
+                f"pad={SPRITE_TILE_WIDTH}:{SPRITE_TILE_HEIGHT}:(ow-iw)/2:(oh-ih)/2,"
+                f"tile={SPRITE_COLUMNS}x{SPRITE_ROWS}"),
+        "-frames:v", "1",
+        "-q:v", "5",
+        str(sprite_path)
+    ]
+
+    try:
+        start = time.time()
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        if result.returncode != 0 or not sprite_path.exists():
+            print(f"[SPRITE] Błąd ffmpeg ({video_path.name}): {result.stderr.strip()}")
+            if sprite_path.exists():
+                sprite_path.unlink()
+            return False
+        print(f"[SPRITE] Arkusz podglądów: {video_path.name} ({time.time() - start:.1f} s)")
+        return True
+    except Exception as e:
+        print(f"[SPRITE] Błąd generowania arkusza ({video_path.name}): {e}")
+        if sprite_path.exists():
+            sprite_path.unlink()
+        return False
+
+
+def get_preview_clip_path(video_path):
+    """Ścieżka mikroklipu podglądu filmu (obok miniaturki)"""
+    return THUMBNAIL_DIR / f"{video_path.stem}{PREVIEW_CLIP_SUFFIX}"
+
+
+def generate_preview_clip(video_path, duration):
+    """
+    Wygeneruj mikroklip podglądu: PREVIEW_CLIP_SECONDS z okolic 1/4 filmu jako MJPEG
+    w rozdzielczości miniaturki (sklejone JPEG-i - galeria nie otwiera pełnego MP4).
+    """
+    clip_path = get_preview_clip_path(video_path)
+    if duration <= 0:
+        return False
+
+    clip_seconds = min(PREVIEW_CLIP_SECONDS, duration)
+    start = max(0.0, min(duration * 0.25, duration - clip_seconds))
+    cmd = [
+        "ffmpeg", "-loglevel", "error", "-y", "-threads", "1",
+        "-ss", f"{start:.3f}",
+        "-t", f"{clip_seconds:.3f}",
+        "-i", str(video_path),
+        "-an",
+        "-vf", f"fps={PREVIEW_CLIP_FPS},scale={PREVIEW_CLIP_WIDTH}:{PREVIEW_CLIP_HEIGHT}",
+        "-c:v", "mjpeg",
+        "-q:v", "6",
+        "-f", "mjpeg",
+        str(clip_path)
+    ]
+
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+        if result.returncode != 0 or not clip_path.exists() or clip_path.stat().st_size == 0:
+            print(f"[PREVIEW] Błąd ffmpeg ({video_path.name}): {result.stderr.strip()}")
+            if clip_path.exists():
+                clip_path.unlink()
+            return False
+        print(f"[PREVIEW] Mikroklip: {video_path.name} ({clip_path.stat().st_size // 1024} KB)")
+    except Exception as e:
+        print(f"[PREVIEW] Błąd generowania mikroklipu ({video_path.name}): {e}")
+        if clip_path.exists():
+            clip_path.unlink()
+        return False
+
+    enforce_preview_clip_budget()
+    return True
+
+
+def enforce_preview_clip_budget():
+    """Usuń najdawniej używane mikroklipy (mtime odświeżany przy wczytaniu) ponad PREVIEW_CLIP_BUDGET"""
+    try:
+        with os.scandir(str(THUMBNAIL_DIR)) as entries:
+            clips = [(entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                     for entry in entries if entry.name.endswith(PREVIEW_CLIP_SUFFIX)]
+    except Exception as e:
+        print(f"[PREVIEW] Błąd skanowania mikroklipów: {e}")
+        return
+
+    total = sum(size for _, size, _ in clips)
+    for mtime, size, path in sorted(clips):
+        if total <= PREVIEW_CLIP_BUDGET:
+            break
+        try:
+            os.unlink(path)
+            total -= size
+            print(f"[PREVIEW] Usunięto (limit miejsca): {os.path.basename(path)}")
+        except Exception as e:
+            print(f"[PREVIEW] Błąd usuwania {path}: {e}")
+
+
+def load_preview_clip_frames(video_path, size):
+    """Wczytaj mikroklip do pamięci jako listę Surface przeskalowanych do rozmiaru kafelka"""
+    clip_path = get_preview_clip_path(video_path)
+    try:
+        data = clip_path.read_bytes()
+        os.utime(str(clip_path))  # Ostatnie użycie - dla limitu miejsca
+    except Exception:
+        return None
+
+    frames = []
+    # Strumień MJPEG to sklejone pliki JPEG - każdy zaczyna się znacznikiem SOI
+    starts = [m.start() for m in re.finditer(b"\xff\xd8\xff", data)]
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(data)
+        img = cv2.imdecode(np.frombuffer(data[start:end], dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            continue
+        img = cv2.resize(img, size)
+        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        frames.append(pygame.surfarray.make_surface(np.transpose(img_rgb, (1, 0, 2))))
+    return frames or None
+
+
+def request_preview_clip(video, size):
+    """Zleć wczytanie (a w razie braku - wygenerowanie) mikroklipu wybranego kafelka w tle"""
+    global preview_clip_wanted, preview_clip_thread
+
+    with preview_clip_lock:
+        preview_clip_wanted = (video, size)
+        if preview_clip_thread is not None:
+            return
+
+        def preview_clip_worker():
+            global preview_clip_thread, preview_clip_frames
+            while True:
+                with preview_clip_lock:
+                    wanted = preview_clip_wanted
+                    loaded = preview_clip_frames
+                    if loaded and (loaded[0], loaded[1]) == (wanted[0].stem, wanted[1]):
+                        preview_clip_thread = None
+                        return
+                video, size = wanted
+
+                frames = None
+                try:
+                    if not get_preview_clip_path(video).exists():
+                        metadata = get_video_metadata(video)
+                        if metadata:
+                            generate_preview_clip(video, metadata["duration"])
+                    frames = load_preview_clip_frames(video, size)
+                except Exception as e:
+                    print(f"[PREVIEW] Błąd mikroklipu {video.stem}: {e}")
+
+                with preview_clip_lock:
+                    if frames is None:
+                        # Brak podglądu - zostaw statyczną miniaturkę
+                        frames = []
+                    preview_clip_frames = (video.stem, size, frames, time.time())
+
+        preview_clip_thread = threading.Thread(target=preview_clip_worker, daemon=True)
+        preview_clip_thread.start()
+
+
+def get_preview_clip_frame(video, size):
+    """
+    Bieżąca klatka zapętlonego mikroklipu dla wybranego kafelka (None - pokaż miniaturkę).
+    Podgląd startuje po PREVIEW_CLIP_DELAY na tym samym kafelku.
+    """
+    global preview_clip_selected, preview_clip_selected_time, preview_clip_frames
+
+    now = time.time()
+    if preview_clip_selected != video.stem:
+        preview_clip_selected = video.stem
+        preview_clip_selected_time = now
+        with preview_clip_lock:
+            preview_clip_frames = None
+        return None
+
+    if now - preview_clip_selected_time < PREVIEW_CLIP_DELAY:
+        return None
+
+    with preview_clip_lock:
+        loaded = preview_clip_frames
+    if not loaded or (loaded[0], loaded[1]) != (video.stem, size):
+        request_preview_clip(video, size)
+        return None
+
+    stem, _, frames, start_time = loaded
+    if not frames:
+        return None
+    return frames[int((now - start_time) * PREVIEW_CLIP_FPS) % len(frames)]
+
+
+def scan_video_dir():
+    """
+    Przyrostowe skanowanie VIDEO_DIR (os.scandir, nazwa + rozmiar + mtime).
+    Porównuje z poprzednim stanem i zwraca (dodane, usunięte, zmienione) jako listy Path.
+    """
+    global video_dir_snapshot, video_dir_snapshot_root
+
+    if video_dir_snapshot_root != VIDEO_DIR:
+        # Inna karta SD - zacznij od zera
+        video_dir_snapshot = {}
+        video_dir_snapshot_root = VIDEO_DIR
+
+    current = {}
+    try:
+        with os.scandir(str(VIDEO_DIR)) as entries:
+            for entry in entries:
+                if entry.name.endswith(".mp4") and not entry.name.startswith(".") and entry.is_file():
+                    stat = entry.stat()
+                    current[entry.name] = (stat.st_size, stat.st_mtime)
+    except Exception as e:
+        print(f"[WARN] Błąd skanowania {VIDEO_DIR}: {e}")
+        return [], [], []
+
+    previous = video_dir_snapshot
+    added = [VIDEO_DIR / name for name in current.keys() - previous.keys()]
+    removed = [VIDEO_DIR / name for name in previous.keys() - current.keys()]
+    changed = [VIDEO_DIR / name for name in current.keys() & previous.keys() if current[name] != previous[name]]
+
+    video_dir_snapshot = current
+    return added, removed, changed
+
+
+def load_thumbnail_surface(video):
+    """Wczytaj miniaturkę filmu z THUMBNAIL_DIR jako pygame Surface (None jeśli brak)"""
+    thumbnail_path = THUMBNAIL_DIR / f"{video.stem}.jpg"
+    if not thumbnail_path.exists():
+        return None
+    img = cv2.imread(str(thumbnail_path))
+    if img is None:
+        return None
+    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return pygame.surfarray.make_surface(np.transpose(img_rgb, (1, 0, 2)))
+
+
+def cache_thumbnail(stem, surface):
+    """Dodaj miniaturkę do cache LRU - najdawniej używane są usuwane po przekroczeniu limitu"""
+    with thumbnails_lock:
+        if stem in thumbnails:
+            # Nowa wersja miniaturki - przeskalowane kopie starej są nieaktualne
+            evict_scaled_asset(("thumb", stem))
+        thumbnails[stem] = surface
+        thumbnails.move_to_end(stem)
+        while len(thumbnails) > THUMBNAIL_CACHE_SIZE:
+            evicted_stem, _ = thumbnails.popitem(last=False)
+            evict_scaled_asset(("thumb", evicted_stem))
+
+
+def invalidate_thumbnail(stem):
+    """Wymuś ponowne wczytanie miniaturki (np. po jej wygenerowaniu na nowo)"""
+    with thumbnails_lock:
+        thumbnails.pop(stem, None)
+        thumbnails_missing.discard(stem)
+    evict_scaled_asset(("thumb", stem))
+
+
+def get_thumbnail(video):
+    """Pobierz miniaturkę z cache LRU (None jeśli jeszcze nie wczytana)"""
+    with thumbnails_lock:
+        surface = thumbnails.get(video.stem)
+        if surface is not None:
+            thumbnails.move_to_end(video.stem)
+    return surface
+
+
+def request_thumbnails(wanted):
+    """
+    Zleć wczytanie miniaturek dla widocznych kafelków i okna prefetch.
+    Kolejność listy = priorytet; każde wywołanie zastępuje poprzednią kolejkę.
+    """
+    global thumbnail_load_queue, thumbnail_loader_thread
+
+    with thumbnails_lock:
+        thumbnail_load_queue = [v for v in wanted
+                                if v.stem not in thumbnails and v.stem not in thumbnails_missing]
+        if not thumbnail_load_queue or thumbnail_loader_thread is not None:
+            return
+
+        def thumbnail_loader():
+            global thumbnail_loader_thread
+            while True:
+                with thumbnails_lock:
+                    video = None
+                    while thumbnail_load_queue:
+                        candidate = thumbnail_load_queue.pop(0)
+                        if candidate.stem not in thumbnails and candidate.stem not in thumbnails_missing:
+                            video = candidate
+                            break
+                    if video is None:
+                        thumbnail_loader_thread = None
+                        return
+
+                try:
+                    surface = load_thumbnail_surface(video)
+                    if surface is not None:
+                        cache_thumbnail(video.stem, surface)
+                    else:
+                        # Brak pliku JPG - nie pytaj ponownie, wygeneruj w tle
+                        with thumbnails_lock:
+                            thumbnails_missing.add(video.stem)
+                        queue_thumbnail_generation(video)
+                except Exception as e:
+                    print(f"[WARN] Błąd {video.stem}: {e}")
+                    with thumbnails_lock:
+                        thumbnails_missing.add(video.stem)
+
+        thumbnail_loader_thread = threading.Thread(target=thumbnail_loader, daemon=True)
+        thumbnail_loader_thread.start()
+
+
+def queue_thumbnail_generation(video):
+    """Zleć wygenerowanie brakującej miniaturki w tle (bez duplikatów, maks. THUMBNAIL_WORKERS wątków)"""
+    global thumbnail_generate_workers
+
+    with thumbnails_lock:
+        if video.stem in thumbnails_generating:
+            return
+        thumbnails_generating.add(video.stem)
+        thumbnail_generate_queue.append(video)
+        if thumbnail_generate_workers >= THUMBNAIL_WORKERS:
+            return
+
+        def generate_missing_thumbnails():
+            global thumbnail_generate_workers
+            while True:
+                with thumbnails_lock:
+                    if not thumbnail_generate_queue:
+                        thumbnail_generate_workers -= 1
+                        return
+                    video = thumbnail_generate_queue.pop(0)
+
+                try:
+                    print(f"[THUMB] Generowanie: {video.name}")
+                    if video.exists() and generate_thumbnail(video):
+                        # Po wygenerowaniu, załaduj miniaturkę do pamięci
+                        surface = load_thumbnail_surface(video)
+                        if surface is not None:
+                            cache_thumbnail(video.stem, surface)
+                            with thumbnails_lock:
+                                thumbnails_missing.discard(video.stem)
+                            print(f"[THUMB] OK: {video.stem}")
+                except Exception as e:
+                    print(f"[THUMB] Błąd generowania {video.stem}: {e}")
+                finally:
+                    with thumbnails_lock:
+                        thumbnails_generating.discard(video.stem)
+
+        # Uruchom w osobnym wątku aby nie blokować UI
+        thumbnail_generate_workers += 1
+        threading.Thread(target=generate_missing_thumbnails, daemon=True).start()
+
+
 def refresh_videos():
-    """Odśwież listę filmów"""
-    global videos, selected_index, thumbnails, selected_videos, multi_select_mode
+    """Odśwież listę filmów - przetwarza tylko pliki dodane, usunięte lub zmienione od ostatniego skanu"""
+    global videos, selected_index, selected_videos, multi_select_mode
 
     if not VIDEO_DIR:
         videos = []
-        thumbnails = {}
+        with thumbnails_lock:
+            for stem in thumbnails:
+                evict_scaled_asset(("thumb", stem))
+            thumbnails.clear()
+            thumbnails_missing.clear()
         selected_videos.clear()
         multi_select_mode = False
         print("[WARN] VIDEO_DIR niedostępny")
@@ -3636,7 +4748,15 @@ def refresh_videos():
 
     old_selected = videos[selected_index] if videos and 0 <= selected_index < len(videos) else None
 
-    videos = sorted(VIDEO_DIR.glob("*.mp4"), reverse=True)
+    if video_dir_snapshot_root != VIDEO_DIR:
+        with thumbnails_lock:
+            for stem in thumbnails:
+                evict_scaled_asset(("thumb", stem))
+            thumbnails.clear()
+            thumbnails_missing.clear()
+
+    added, removed, changed = scan_video_dir()
+    videos = sorted((VIDEO_DIR / name for name in video_dir_snapshot), reverse=True)
 
     if old_selected and old_selected in videos:
         selected_index = videos.index(old_selected)
@@ -3647,51 +4767,204 @@ def refresh_videos():
     selected_videos.clear()
     multi_select_mode = False
 
-    print("[THUMB] Ładowanie miniatur...")
-    thumbnails = {}
-    missing_thumbnails = []
+    # Zapomnij miniaturki usuniętych i zmienionych plików - nowe wczyta galeria na żądanie
+    with thumbnails_lock:
+        for video in added + removed + changed:
+            thumbnails.pop(video.stem, None)
+            thumbnails_missing.discard(video.stem)
+            evict_scaled_asset(("thumb", video.stem))
+
+    if added or removed or changed:
+        print(f"[THUMB] Zmiany: +{len(added)} -{len(removed)} ~{len(changed)}")
+
+
+def get_vertical_gradient(size, top_color, bottom_color):
+    """Pionowy gradient tła (np. menu, galeria) - renderowany raz dla danego rozmiaru ekranu"""
+    cache_key = ("vertical_gradient", size, top_color, bottom_color)
+    surface = background_cache.get(cache_key)
+    if surface is None:
+        width, height = size
+        surface = pygame.Surface(size).convert()
+        for y in range(height):
+            ratio = y / height
+            r = int(top_color[0] * (1 - ratio) + bottom_color[0] * ratio)
+            g = int(top_color[1] * (1 - ratio) + bottom_color[1] * ratio)
+            b = int(top_color[2] * (1 - ratio) + bottom_color[2] * ratio)
+            pygame.draw.line(surface, (r, g, b), (0, y), (width, y))
+        background_cache[cache_key] = surface
+    return surface
+
+
+def get_striped_panel(width, height, base_color=(40, 50, 60)):
+    """
+    Liniowy gradient paneli - co 15 pikseli jasność +2, grubość linii -1 (start: 10px),
+    cykl powtarza się gdy grubość dojdzie do 0. Zwraca przezroczysty Surface z samymi paskami.
+    """
+    cache_key = ("striped_panel", width, height, base_color)
+    surface = background_cache.get(cache_key)
+    if surface is None:
+        line_spacing = 15
+        brightness_increment = 2
+        initial_line_thickness = 10
+        cycle_length = initial_line_thickness + 1  # +1 żeby uwzględnić 0
+
+        # Ostatni pasek może wystawać poza panel (jak przy rysowaniu bezpośrednio na ekranie)
+        surface = pygame.Surface((width, height + initial_line_thickness), pygame.SRCALPHA).convert_alpha()
+        surface.fill((0, 0, 0, 0))
+
+        current_y = line_spacing
+        line_index = 0
+
+        while current_y < height:
+            cyclic_index = line_index % cycle_length
+            brightness_boost = cyclic_index * brightness_increment
+            line_color = (
+                min(255, base_color[0] + brightness_boost),
+                min(255, base_color[1] + brightness_boost),
+                min(255, base_color[2] + brightness_boost)
+            )
+            line_thickness = initial_line_thickness - cyclic_index
+
+            if line_thickness > 0:
+                for i in range(line_thickness):
+                    pygame.draw.line(surface, line_color, (10, current_y + i), (width - 10, current_y + i))
+
+            current_y += line_spacing
+            line_index += 1
+
+        background_cache[cache_key] = surface
+    return surface
+
+
+def get_selection_gradient(width, height, top_color=(100, 150, 255), bottom_color=(15, 30, 60)):
+    """Tło zaznaczonego elementu listy - górna 1/3 z przejściem, reszta w kolorze dolnym"""
+    cache_key = ("selection_gradient", width, height, top_color, bottom_color)
+    surface = background_cache.get(cache_key)
+    if surface is None:
+        surface = pygame.Surface((width + 1, height)).convert()
+        gradient_height = max(1, height // 3)
+        for y_offset in range(height):
+            if y_offset < gradient_height:
+                ratio = y_offset / gradient_height
+                r = int(top_color[0] * (1 - ratio) + bottom_color[0] * ratio)
+                g = int(top_color[1] * (1 - ratio) + bottom_color[1] * ratio)
+                b = int(top_color[2] * (1 - ratio) + bottom_color[2] * ratio)
+                color = (r, g, b)
+            else:
+                color = bottom_color
+            pygame.draw.line(surface, color, (0, y_offset), (width, y_offset))
+        background_cache[cache_key] = surface
+    return surface
+
+
+def get_menu_triangle(width, triangle_height, cut_offset, base_color=(20, 25, 30)):
+    """Dekoracyjny, rozmyty trójkąt menu (dolna 1/3) z gradientem alpha - renderowany raz"""
+    cache_key = ("menu_triangle", width, triangle_height, cut_offset, base_color)
+    surface = background_cache.get(cache_key)
+    if surface is None:
+        visible_height = triangle_height - cut_offset
+        triangle_surface = pygame.Surface((width, visible_height), pygame.SRCALPHA)
+
+        # Rysujemy trójkąt linia po linii z gradientem alpha
+        for y_offset in range(visible_height):
+            # Im niżej, tym szersza linia - obliczamy od początku trójkąta
+            progress_from_top = (cut_offset + y_offset) / triangle_height
+            line_width = int(width * progress_from_top)
+
+            # Gradient alpha: od dołu (255) do góry (0)
+            alpha = int(255 * y_offset / visible_height)
+            line_x_start = (width - line_width) // 2
+            if line_width > 0:
+                triangle_surface.fill((*base_color, alpha), (line_x_start, y_offset, line_width, 1))
+
+        # Lekkie rozmycie - pygame.transform.smoothscale do symulacji rozmycia
+        blur_size = max(2, width // 50)
+        temp_small = pygame.transform.smoothscale(triangle_surface,
+                                                  (max(1, width // blur_size),
+                                                   max(1, visible_height // blur_size)))
+        surface = pygame.transform.smoothscale(temp_small, (width, visible_height)).convert_alpha()
+        background_cache[cache_key] = surface
+    return surface
+
+
+def get_scaled_asset(key, surface, size, flip_x=False):
+    """
+    Pobierz przeskalowaną wersję obrazka z cache (klucz: nazwa zasobu + rozmiar docelowy).
+    Skalowanie (i konwersja do formatu ekranu) odbywa się raz - kolejne klatki to sam blit.
+    Cache nie trzyma referencji do źródła - po zmianie źródła wpisy usuwa evict_scaled_asset(key).
+    """
+    cache_key = (key, size, flip_x)
+    with scaled_asset_lock:
+        scaled = scaled_asset_cache.get(cache_key)
+        if scaled is not None:
+            scaled_asset_cache.move_to_end(cache_key)
+            return scaled
 
-    for video in videos:
-        thumbnail_path = THUMBNAIL_DIR / f"{video.stem}.jpg"
-        if thumbnail_path.exists():
-            try:
-                img = cv2.imread(str(thumbnail_path))
-                if img is not None:
-                    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                    surface = pygame.surfarray.make_surface(np.transpose(img_rgb, (1, 0, 2)))
-                    thumbnails[video.stem] = surface
-            except Exception as e:
-                print(f"[WARN] Błąd {video.stem}: {e}")
-        else:
-            # Brak miniaturki - dodaj do listy do wygenerowania
-            missing_thumbnails.append(video)
+    scaled = pygame.transform.scale(surface, size)
+    if flip_x:
+        scaled = pygame.transform.flip(scaled, True, False)
+    scaled = scaled.convert_alpha() if surface.get_flags() & pygame.SRCALPHA else scaled.convert()
 
-    print(f"[OK] {len(thumbnails)} miniatur załadowanych")
+    with scaled_asset_lock:
+        scaled_asset_cache[cache_key] = scaled
+        while len(scaled_asset_cache) > SCALED_ASSET_CACHE_SIZE:
+            scaled_asset_cache.popitem(last=False)
+    return scaled
 
-    # Generuj brakujące miniaturki w tle
-    if missing_thumbnails:
-        print(f"[THUMB] Brak {len(missing_thumbnails)} miniaturek - generowanie...")
 
-        def generate_missing_thumbnails():
-            for video in missing_thumbnails:
-                try:
-                    print(f"[THUMB] Generowanie: {video.name}")
-                    if generate_thumbnail(video):
-                        # Po wygenerowaniu, załaduj miniaturkę do pamięci
-                        thumbnail_path = THUMBNAIL_DIR / f"{video.stem}.jpg"
-                        if thumbnail_path.exists():
-                            img = cv2.imread(str(thumbnail_path))
-                            if img is not None:
-                                img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                                surface = pygame.surfarray.make_surface(np.transpose(img_rgb, (1, 0, 2)))
-                                thumbnails[video.stem] = surface
-                                print(f"[THUMB] OK: {video.stem}")
-                except Exception as e:
-                    print(f"[THUMB] Błąd generowania {video.stem}: {e}")
+def evict_scaled_asset(key):
+    """Usuń wszystkie przeskalowane wersje zasobu key (np. miniaturki usuniętej z cache LRU)"""
+    with scaled_asset_lock:
+        for cache_key in [k for k in scaled_asset_cache if k[0] == key]:
+            del scaled_asset_cache[cache_key]
 
-        # Uruchom w osobnym wątku aby nie blokować UI
-        thumb_thread = threading.Thread(target=generate_missing_thumbnails, daemon=True)
-        thumb_thread.start()
+
+def get_text_surface(text, font, color, outline_color=None, outline_width=2):
+    """
+    Pobierz wyrenderowany tekst z cache (klucz: tekst, czcionka, kolor, kolor i grubość obrysu).
+    Obrys powstaje raz - jeden render w kolorze obrysu złożony z przesunięciami na jednym Surface.
+    Surface z obrysem jest większy o outline_width z każdej strony.
+    """
+    cache_key = (text, font, color, outline_color, outline_width if outline_color else 0)
+    surface = text_cache.get(cache_key)
+    if surface is not None:
+        text_cache.move_to_end(cache_key)
+        return surface
+
+    text_surface = font.render(text, True, color)
+    if outline_color is None:
+        surface = text_surface
+    else:
+        outline_surface = font.render(text, True, outline_color)
+        width = text_surface.get_width() + 2 * outline_width
+        height = text_surface.get_height() + 2 * outline_width
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        for dx in range(-outline_width, outline_width + 1):
+            for dy in range(-outline_width, outline_width + 1):
+                if dx == 0 and dy == 0:
+                    continue
+                surface.blit(outline_surface, (outline_width + dx, outline_width + dy))
+        surface.blit(text_surface, (outline_width, outline_width))
+
+    text_cache[cache_key] = surface
+    while len(text_cache) > TEXT_CACHE_SIZE:
+        text_cache.popitem(last=False)
+    return surface
+
+
+def get_text_y_offset(text):
+    """Offset pionowy zależny od czcionki (ogólny + dla polskich znaków diakrytycznych)"""
+    font_family = camera_settings.get("font_family", "HomeVideo")
+    font_config = FONT_DEFINITIONS.get(font_family, FONT_DEFINITIONS["HomeVideo"])
+    general_offset = font_config.get("general_offset", 0)
+    polish_offset = font_config.get("polish_offset", 0)
+
+    # Sprawdź czy tekst zawiera polskie znaki diakrytyczne
+    polish_chars = 'śćźżóńŚĆŹŻÓŃ'
+    has_polish = any(char in text for char in polish_chars)
+
+    # Oblicz całkowity offset: ogólny offset + offset dla polskich znaków (jeśli są)
+    return general_offset + (polish_offset if has_polish else 0)
 
 
 def draw_text(text, font, color, x, y, center=False, bg_color=None, padding=10):
@@ -3699,20 +4972,9 @@ def draw_text(text, font, color, x, y, center=False, bg_color=None, padding=10):
     if not text or not font:
         return
     try:
-        text_surface = font.render(str(text), True, color)
-
-        # Pobierz offsety dla aktualnej czcionki
-        font_family = camera_settings.get("font_family", "HomeVideo")
-        font_config = FONT_DEFINITIONS.get(font_family, FONT_DEFINITIONS["HomeVideo"])
-        general_offset = font_config.get("general_offset", 0)
-        polish_offset = font_config.get("polish_offset", 0)
-
-        # Sprawdź czy tekst zawiera polskie znaki diakrytyczne
-        polish_chars = 'śćźżóńŚĆŹŻÓŃ'
-        has_polish = any(char in str(text) for char in polish_chars)
-
-        # Oblicz całkowity offset: ogólny offset + offset dla polskich znaków (jeśli są)
-        y_offset = general_offset + (polish_offset if has_polish else 0)
+        text = str(text)
+        text_surface = get_text_surface(text, font, color)
+        y_offset = get_text_y_offset(text)
 
         if center:
             text_rect = text_surface.get_rect(center=(x, y + y_offset))
@@ -3728,41 +4990,19 @@ def draw_text(text, font, color, x, y, center=False, bg_color=None, padding=10):
 
 
 def draw_text_with_outline(text, font, color, outline_color, x, y, center=False):
-    """Rysuj tekst z obrysem i offsetami zależnymi od czcionki"""
+    """Rysuj tekst z obrysem i offsetami zależnymi od czcionki (jeden blit z cache)"""
     if not text or not font:
         return
     try:
         outline_width = 2
+        text = str(text)
+        text_surface = get_text_surface(text, font, color, outline_color, outline_width)
+        y_offset = get_text_y_offset(text)
 
-        # Pobierz offsety dla aktualnej czcionki
-        font_family = camera_settings.get("font_family", "HomeVideo")
-        font_config = FONT_DEFINITIONS.get(font_family, FONT_DEFINITIONS["HomeVideo"])
-        general_offset = font_config.get("general_offset", 0)
-        polish_offset = font_config.get("polish_offset", 0)
-
-        # Sprawdź czy tekst zawiera polskie znaki diakrytyczne
-        polish_chars = 'śćźżóńŚĆŹŻÓŃ'
-        has_polish = any(char in str(text) for char in polish_chars)
-
-        # Oblicz całkowity offset: ogólny offset + offset dla polskich znaków (jeśli są)
-        y_offset = general_offset + (polish_offset if has_polish else 0)
-
-        for dx in range(-outline_width, outline_width + 1):
-            for dy in range(-outline_width, outline_width + 1):
-                if dx == 0 and dy == 0:
-                    continue
-                outline_surface = font.render(str(text), True, outline_color)
-                if center:
-                    outline_rect = outline_surface.get_rect(center=(x + dx, y + y_offset + dy))
-                else:
-                    outline_rect = outline_surface.get_rect(topleft=(x + dx, y + y_offset + dy))
-                screen.blit(outline_surface, outline_rect)
-
-        text_surface = font.render(str(text), True, color)
         if center:
             text_rect = text_surface.get_rect(center=(x, y + y_offset))
         else:
-            text_rect = text_surface.get_rect(topleft=(x, y + y_offset))
+            text_rect = text_surface.get_rect(topleft=(x - outline_width, y + y_offset - outline_width))
         screen.blit(text_surface, text_rect)
     except:
         pass
@@ -3813,19 +5053,9 @@ def draw_date_overlay():
 
     date_text = get_display_date()
 
-    # Mapowanie nazw kolorów na wartości RGB
-    color_map = {
-        "yellow": YELLOW,
-        "white": WHITE,
-        "red": RED,
-        "green": GREEN,
-        "blue": BLUE,
-        "orange": ORANGE
-    }
-
     # Pobierz kolor z ustawień
     color_name = camera_settings.get("date_color", "yellow")
-    date_color = color_map.get(color_name, YELLOW)
+    date_color = DATE_COLORS.get(color_name, YELLOW)
 
     # NA PODGLĄDZIE ZAWSZE UŻYWAMY EXTRA_LARGE (niezależnie od ustawienia)
     date_font = font_large
@@ -3927,6 +5157,9 @@ def load_fonts():
     """Załaduj wszystkie czcionki na podstawie wybranej font_family"""
     global font_large, font_medium, font_small, font_tiny, menu_font, font_mediumXL, font_70
 
+    # Nowe obiekty czcionek - teksty wyrenderowane starymi są już nieaktualne
+    text_cache.clear()
+
     font_family = camera_settings.get("font_family", "HomeVideo")
 
     # Sprawdź czy czcionka istnieje w definicjach
@@ -4122,31 +5355,585 @@ def init_pygame():
     # NAPRAWIONE: Inicjalizuj pygame.mixer dla odtwarzania dźwięku
     try:
         pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=2048)
+        # Kanał 0 tylko dla strumienia audio odtwarzacza
+        pygame.mixer.set_reserved(1)
         print("[MIXER] Pygame mixer zainicjalizowany")
     except Exception as e:
         print(f"[WARN] Nie można zainicjalizować pygame.mixer: {e}")
 
-    info = pygame.display.Info()
-    SCREEN_WIDTH = info.current_w
-    SCREEN_HEIGHT = info.current_h
+    info = pygame.display.Info()
+    SCREEN_WIDTH = info.current_w
+    SCREEN_HEIGHT = info.current_h
+
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
+    pygame.display.set_caption("Kamera System")
+    pygame.mouse.set_visible(False)
+
+    # Wczytaj konfigurację PRZED załadowaniem czcionek
+    load_config()
+
+    # Załaduj czcionki (korzysta z camera_settings["font_family"])
+    load_fonts()
+
+    # Załaduj obrazki interfejsu
+    load_images()
+
+    screen.fill(BLACK)
+    pygame.display.flip()
+
+    print("[OK] Pygame OK")
+
+
+# ============================================================================
+# PREZENTACJA KLATEK (kamera, odtwarzacz -> Surface bez alokacji na klatkę)
+# ============================================================================
+
+def convert_frame_into(frame, buffer, source_format, get_scratch):
+    """
+    Przeskaluj i skonwertuj klatkę wprost do bufora RGBX (H x W x 4) bez alokacji.
+    source_format: "RGBX" (lores XBGR8888), "YUV420" (lores I420), "BGR" (RGB888 / OpenCV).
+    get_scratch(shape) zwraca prealokowany bufor pośredni danego kształtu.
+    """
+    height, width = buffer.shape[:2]
+    size = (width, height)
+
+    if source_format == "YUV420":
+        frame_h, frame_w = frame.shape[0] * 2 // 3, frame.shape[1]
+        if (frame_w, frame_h) == size:
+            cv2.cvtColor(frame, cv2.COLOR_YUV2RGBA_I420, dst=buffer)
+            return
+        frame = cv2.cvtColor(frame, cv2.COLOR_YUV2RGBA_I420, dst=get_scratch((frame_h, frame_w, 4)))
+        source_format = "RGBX"
+
+    # Skalowanie przed konwersją kolorów - konwersja działa już na mniejszej klatce
+    if frame.shape[1] != width or frame.shape[0] != height:
+        target = buffer if source_format == "RGBX" else get_scratch((height, width, frame.shape[2]))
+        cv2.resize(frame, size, dst=target, interpolation=cv2.INTER_LINEAR)
+        if target is buffer:
+            return
+        frame = target
+
+    if source_format == "RGBX":
+        np.copyto(buffer, frame)
+    else:
+        # Zamiana BGR -> RGB połączona z rozszerzeniem do 4 kanałów (jedno przejście)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA, dst=buffer)
+
+
+class FramePresenter:
+    """
+    Zamienia klatki na Surface pygame bez alokacji w gorącej ścieżce.
+    Surface jest tworzony raz przez pygame.image.frombuffer na prealokowanym buforze RGBX,
+    kolejne klatki są skalowane/konwertowane wprost do tego bufora (cv2 z dst=...).
+    Zwracany Surface jest współdzielony - zawiera zawsze ostatnią klatkę.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.size = None
+        self.buffer = None
+        self.surface = None
+        self.scratch = {}  # kształt -> bufor pośredni (skalowanie przed konwersją)
+
+    def _get_scratch(self, shape):
+        buffer = self.scratch.get(shape)
+        if buffer is None:
+            buffer = np.empty(shape, dtype=np.uint8)
+            self.scratch[shape] = buffer
+        return buffer
+
+    def _ensure_size(self, size):
+        if self.size == size:
+            return
+        width, height = size
+        self.buffer = np.empty((height, width, 4), dtype=np.uint8)
+        self.surface = pygame.image.frombuffer(self.buffer, (width, height), "RGBX")
+        self.scratch = {}
+        self.size = size
+        print(f"[PRESENT] {self.name}: bufor {width}x{height}")
+
+    def present(self, frame, size, source_format="BGR"):
+        """
+        Wstaw klatkę do bufora w rozmiarze size i zwróć Surface.
+        source_format: "RGBX" (lores XBGR8888), "YUV420" (lores I420), "BGR" (RGB888 / OpenCV).
+        """
+        self._ensure_size(size)
+        convert_frame_into(frame, self.buffer, source_format, self._get_scratch)
+        return self.surface
+
+
+preview_presenter = FramePresenter("podgląd")
+
+
+def fit_frame_size(frame):
+    """Rozmiar klatki dopasowany do ekranu z zachowaniem proporcji"""
+    video_h, video_w = frame.shape[:2]
+    aspect = video_w / video_h
+    screen_aspect = SCREEN_WIDTH / SCREEN_HEIGHT
+
+    if aspect > screen_aspect:
+        new_w = SCREEN_WIDTH
+        new_h = int(SCREEN_WIDTH / aspect)
+    else:
+        new_h = SCREEN_HEIGHT
+        new_w = int(SCREEN_HEIGHT * aspect)
+    return new_w, new_h
+
+
+class PlaybackDecoder:
+    """
+    Dekoder odtwarzania z wyprzedzeniem: wątek czyta klatki z cv2.VideoCapture, skaluje je
+    do ekranu i wstawia do ograniczonej kolejki prealokowanych buforów RGBX.
+    Wątek UI tylko odbiera klatkę dla bieżącej pozycji zegara (frame_for).
+    Klatki, które są już za zegarem, dekoder pomija przez grab() - bez konwersji i skalowania.
+    """
+
+    def __init__(self, capture, queue_size=None):
+        self.capture = capture
+        self.queue_size = queue_size or PLAYBACK_QUEUE_SIZE
+        self.cond = threading.Condition()
+        self.frames = deque()  # (numer klatki, slot) gotowe do wyświetlenia
+        self.free_slots = []
+        self.slots = []
+        self.current_slot = None  # Slot aktualnie wyświetlany - nie może być nadpisany
+        self.size = None
+        self.scratch = {}
+        self.next_index = 0  # Numer następnej klatki do zdekodowania
+        self.wanted_index = -1  # Pozycja zegara UI (numer klatki)
+        self.seek_target = None
+        self.seek_generation = 0  # Zwiększane przy każdym seek() - unieważnia dekodowanie w toku
+        self.eof = False
+        self.running = False
+        self.thread = None
+
+    def _get_scratch(self, shape):
+        buffer = self.scratch.get(shape)
+        if buffer is None:
+            buffer = np.empty(shape, dtype=np.uint8)
+            self.scratch[shape] = buffer
+        return buffer
+
+    def _allocate_slots(self, size):
+        # Kolejka + slot wyświetlany + slot w trakcie dekodowania
+        width, height = size
+        self.slots = [{"array": np.empty((height, width, 4), dtype=np.uint8), "surface": None}
+                      for _ in range(self.queue_size + 2)]
+        self.free_slots = list(self.slots)
+        self.size = size
+        print(f"[DECODE] Bufory {self.queue_size + 2}x {width}x{height}")
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.running and self.seek_target is None and (
+                        self.eof or len(self.frames) >= self.queue_size or
+                        (self.size is not None and not self.free_slots)):
+                    self.cond.wait(0.1)
+                if not self.running:
+                    return
+
+                # Cel seeka odbierany pod blokadą, samo przewijanie (set) już bez niej -
+                # przewinięcie potrafi trwać długo i blokowałoby frame_for() w wątku UI
+                seek_to = None
+                if self.seek_target is not None:
+                    seek_to = self.seek_target
+                    self.seek_target = None
+                    self._drop_queued()
+                    self.next_index = seek_to
+                    self.eof = False
+
+                generation = self.seek_generation
+                index = self.next_index
+                # Klatka już za zegarem UI (i nie ostatnia w kolejce do nadrobienia) - pomiń
+                skip = index < self.wanted_index
+                slot = self.free_slots.pop() if (not skip and self.free_slots) else None
+
+            try:
+                if seek_to is not None:
+                    self.capture.set(cv2.CAP_PROP_POS_FRAMES, seek_to)
+                if skip:
+                    ok = self.capture.grab()
+                    frame = None
+                else:
+                    ok, frame = self.capture.read()
+                    if ok and frame is not None:
+                        if self.size is None:
+                            with self.cond:
+                                self._allocate_slots(fit_frame_size(frame))
+                                slot = self.free_slots.pop()
+                        convert_frame_into(frame, slot["array"], "BGR", self._get_scratch)
+            except Exception as e:
+                print(f"[DECODE] Błąd dekodowania klatki {index}: {e}")
+                ok = False
+
+            with self.cond:
+                if (self.seek_target is not None or generation != self.seek_generation or
+                        index != self.next_index):
+                    # Seek w trakcie dekodowania - wynik nieaktualny
+                    if slot is not None:
+                        self.free_slots.append(slot)
+                    continue
+                if not ok:
+                    self.eof = True
+                    if slot is not None:
+                        self.free_slots.append(slot)
+                    self.cond.notify_all()
+                    continue
+                self.next_index = index + 1
+                if slot is not None:
+                    self.frames.append((index, slot))
+                    self.cond.notify_all()
+
+    def _drop_queued(self):
+        # Wywoływane pod cond
+        while self.frames:
+            self.free_slots.append(self.frames.popleft()[1])
+
+    def seek(self, frame_index):
+        """Przewiń dekoder - kolejka jest czyszczona, dekodowanie rusza od frame_index"""
+        with self.cond:
+            self.seek_target = max(0, frame_index)
+            self.seek_generation += 1
+            self.wanted_index = self.seek_target
+            self._drop_queued()
+            self.eof = False
+            self.cond.notify_all()
+
+    def frame_for(self, frame_index):
+        """
+        Odbierz najnowszą zdekodowaną klatkę o numerze <= frame_index (starsze są zwalniane).
+        Zwraca (numer, Surface, szerokość, wysokość) albo None gdy brak nowej klatki.
+        """
+        with self.cond:
+            self.wanted_index = frame_index
+            chosen = None
+            while self.frames and self.frames[0][0] <= frame_index:
+                if chosen is not None:
+                    self.free_slots.append(chosen[1])
+                chosen = self.frames.popleft()
+            if chosen is None:
+                return None
+            if self.current_slot is not None:
+                self.free_slots.append(self.current_slot)
+            self.current_slot = chosen[1]
+            self.cond.notify_all()
+
+        index, slot = chosen
+        if slot["surface"] is None:
+            width, height = self.size
+            slot["surface"] = pygame.image.frombuffer(slot["array"], (width, height), "RGBX")
+        return index, slot["surface"], self.size[0], self.size[1]
+
+    def finished(self, frame_index):
+        """Czy dekoder doszedł do końca pliku i nie ma już klatek do pokazania dla frame_index"""
+        with self.cond:
+            return self.eof and self.seek_target is None and not self.frames and frame_index >= self.next_index
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+        self.capture.release()
+
+
+class PlaybackAudioStream:
+    """
+    Dźwięk odtwarzania strumieniowo: ffmpeg dekoduje ścieżkę AAC z MP4 do PCM na potok,
+    wątek zasilający wstawia kolejne kawałki PCM do kolejki zarezerwowanego kanału miksera.
+    Bez pliku WAV - start po pierwszym kawałku, stałe zużycie pamięci i dysku.
+    Zegar (get_clock) liczony jest z długości odegranych kawałków, z pominięciem pauz.
+    """
+
+    CHUNK_SECONDS = 0.2
+
+    def __init__(self, video_path, start_seconds=0.0, volume=1.0):
+        self.video_path = video_path
+        self.start_seconds = start_seconds
+        self.volume = volume
+        self.process = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.started = threading.Event()
+        self.running = False
+        self.paused = False
+        self.failed = False
+        self.channel = None
+        # Zegar: suma zakończonych kawałków + bieżący kawałek od chunk_started_at
+        self.played_seconds = 0.0
+        self.current_seconds = 0.0
+        self.pending_seconds = None
+        self.chunk_started_at = None
+        self.paused_at = None
+
+    def start(self):
+        frequency, size, channels = pygame.mixer.get_init()
+        self.frequency = frequency
+        self.channels = channels
+        self.frame_bytes = 2 * channels
+        self.chunk_bytes = int(frequency * self.CHUNK_SECONDS) * self.frame_bytes
+
+        cmd = [
+            "ffmpeg",
+            "-loglevel", "error",
+            "-ss", f"{self.start_seconds:.3f}",
+            "-i", str(self.video_path),
+            "-vn",
+            "-f", "s16le",
+            "-acodec", "pcm_s16le",
+            "-ar", str(frequency),
+            "-ac", str(channels),
+            "-"
+        ]
+        self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        stdin=subprocess.DEVNULL, bufsize=0)
+
+        # Kanał 0 zarezerwowany dla odtwarzacza (pygame.mixer.set_reserved)
+        self.channel = pygame.mixer.Channel(0)
+        self.channel.set_volume(self.volume)
+
+        self.running = True
+        self.thread = threading.Thread(target=self._feed, daemon=True)
+        self.thread.start()
+        print(f"[AUDIO] Strumień audio od {self.start_seconds:.2f}s")
+
+    def _read_chunk(self):
+        data = b""
+        while len(data) < self.chunk_bytes:
+            part = self.process.stdout.read(self.chunk_bytes - len(data))
+            if not part:
+                break
+            data += part
+        # Tylko pełne próbki wszystkich kanałów
+        return data[:len(data) - len(data) % self.frame_bytes]
+
+    def _feed(self):
+        try:
+            while self.running:
+                data = self._read_chunk()
+                if not data:
+                    break
+                sound = pygame.mixer.Sound(buffer=data)
+                seconds = len(data) / self.frame_bytes / self.frequency
+
+                # Czekaj na wolne miejsce w kolejce kanału (jeden kawałek gra, jeden czeka)
+                while self.running:
+                    with self.lock:
+                        self._update_clock()
+                        if not self.channel.get_busy() and not self.paused:
+                            self._play(sound, seconds)
+                            break
+                        if self.pending_seconds is None and self.channel.get_busy():
+                            self.channel.queue(sound)
+                            self.pending_seconds = seconds
+                            break
+                    time.sleep(0.01)
+        except Exception as e:
+            print(f"[AUDIO] Błąd strumienia audio: {e}")
+
+        if not self.started.is_set():
+            # Brak ścieżki audio lub błąd ffmpeg - nie blokuj obrazu
+            self.failed = True
+            self.started.set()
+
+    def _play(self, sound, seconds):
+        # Wywoływane pod lock - kanał stał (start albo niedobór danych)
+        if self.chunk_started_at is not None:
+            self.played_seconds += self.current_seconds
+        self.channel.play(sound)
+        self.current_seconds = seconds
+        self.pending_seconds = None
+        self.chunk_started_at = time.time()
+        if not self.started.is_set():
+            self.started.set()
+
+    def _update_clock(self):
+        # Wywoływane pod lock - kawałek z kolejki zaczął grać gdy get_queue() zwraca None
+        if self.pending_seconds is not None and self.channel.get_queue() is None and not self.paused:
+            self.played_seconds += self.current_seconds
+            self.chunk_started_at += self.current_seconds
+            self.current_seconds = self.pending_seconds
+            self.pending_seconds = None
+
+    def wait_started(self, timeout):
+        """Poczekaj aż zagra pierwszy kawałek. Zwraca False jeśli audio niedostępne."""
+        self.started.wait(timeout)
+        return self.started.is_set() and not self.failed
+
+    def get_clock(self):
+        """Pozycja odtwarzanego dźwięku w sekundach (None przed startem)"""
+        with self.lock:
+            if self.chunk_started_at is None:
+                return None
+            self._update_clock()
+            now = self.paused_at if self.paused else time.time()
+            within_chunk = min(max(0.0, now - self.chunk_started_at), self.current_seconds)
+            return self.start_seconds + self.played_seconds + within_chunk
+
+    def pause(self):
+        with self.lock:
+            if self.paused:
+                return
+            self.paused = True
+            self.paused_at = time.time()
+            if self.channel:
+                self.channel.pause()
+
+    def resume(self):
+        with self.lock:
+            if not self.paused:
+                return
+            self.paused = False
+            if self.chunk_started_at is not None:
+                self.chunk_started_at += time.time() - self.paused_at
+            self.paused_at = None
+            if self.channel:
+                self.channel.unpause()
+
+    def set_volume(self, volume):
+        self.volume = volume
+        if self.channel:
+            self.channel.set_volume(volume)
+
+    def stop(self):
+        self.running = False
+        if self.process:
+            try:
+                self.process.kill()
+                self.process.wait(timeout=2)
+            except Exception:
+                pass
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        if self.channel:
+            self.channel.stop()
+
+
+def get_preview_size(res_config):
+    """Rozmiar strumienia podglądu (lores) - ekran, ale nie większy niż strumień nagrania"""
+    main_w, main_h = res_config["size"]
+    width = min(SCREEN_WIDTH or main_w, main_w)
+    height = min(SCREEN_HEIGHT or main_h, main_h)
+    # ISP wymaga parzystych wymiarów
+    return (width - width % 2, height - height % 2)
+
+
+def create_camera_config(res_config):
+    """
+    Konfiguracja dwustrumieniowa: main (rozdzielczość nagrania) tylko dla enkodera,
+    lores (rozmiar ekranu) dla wizjera i menu.
+    Pi 5 obsługuje lores w RGB - XBGR8888 (w pamięci R, G, B, X) trafia do Surface bez
+    zamiany kanałów; starsze ISP tylko YUV420 - wtedy fallback.
+    """
+    global camera_preview_format
+
+    preview_size = get_preview_size(res_config)
+    for preview_format in ("XBGR8888", "YUV420"):
+        try:
+            config = camera.create_video_configuration(
+                main={"size": res_config["size"], "format": "RGB888"},
+                lores={"size": preview_size, "format": preview_format},
+                controls={"FrameRate": res_config["fps"]}
+            )
+            camera.configure(config)
+            camera_preview_format = preview_format
+            print(f"[CAMERA] Podgląd lores {preview_size[0]}x{preview_size[1]} {preview_format}")
+            return
+        except Exception as e:
+            print(f"[WARN] Strumień lores {preview_format} niedostępny: {e}")
+
+    # Ostateczny fallback - tylko main (podgląd skalowany z klatki nagrania)
+    config = camera.create_video_configuration(
+        main={"size": res_config["size"], "format": "RGB888"},
+        controls={"FrameRate": res_config["fps"]}
+    )
+    camera.configure(config)
+    camera_preview_format = None
+    print("[WARN] Podgląd ze strumienia main")
+
+
+def capture_preview_frame():
+    """Pobierz klatkę podglądu (lores jeśli dostępny, inaczej main)"""
+    if camera_preview_format is None:
+        return camera.capture_array()
+    return camera.capture_array("lores")
+
+
+def present_preview_frame(frame):
+    """Klatka podglądu -> współdzielony Surface w rozmiarze ekranu"""
+    source_format = {"XBGR8888": "RGBX", "YUV420": "YUV420"}.get(camera_preview_format, "BGR")
+    return preview_presenter.present(frame, (SCREEN_WIDTH, SCREEN_HEIGHT), source_format)
+
+
+def camera_capture_loop():
+    """Wątek przechwytywania: czeka na klatki z kamery i publikuje tylko najnowszą"""
+    global camera_latest_frame, camera_frames_dropped
+
+    while camera_capture_active:
+        # Podgląd potrzebny tylko na ekranie głównym
+        if current_state != STATE_MAIN or not camera:
+            with camera_frame_lock:
+                camera_latest_frame = None
+            time.sleep(0.05)
+            continue
+
+        try:
+            frame = capture_preview_frame()
+        except Exception as e:
+            print(f"[CAPTURE] Błąd przechwytywania klatki: {e}")
+            time.sleep(0.1)
+            continue
+
+        with camera_frame_lock:
+            # Poprzednia klatka nieodebrana przez UI - odrzucona (nieaktualna)
+            if camera_latest_frame is not None:
+                camera_frames_dropped += 1
+            camera_latest_frame = frame
+
+
+def start_camera_capture():
+    """Uruchom wątek przechwytywania klatek podglądu"""
+    global camera_capture_active, camera_capture_thread
+
+    if camera_capture_active:
+        return
+
+    camera_capture_active = True
+    camera_capture_thread = threading.Thread(target=camera_capture_loop, daemon=True)
+    camera_capture_thread.start()
+    print("[CAPTURE] Wątek przechwytywania uruchomiony")
 
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
-    pygame.display.set_caption("Kamera System")
-    pygame.mouse.set_visible(False)
 
-    # Wczytaj konfigurację PRZED załadowaniem czcionek
-    load_config()
+def stop_camera_capture():
+    """Zatrzymaj wątek przechwytywania (np. przed rekonfiguracją kamery)"""
+    global camera_capture_active, camera_capture_thread, camera_latest_frame
 
-    # Załaduj czcionki (korzysta z camera_settings["font_family"])
-    load_fonts()
+    camera_capture_active = False
 
-    # Załaduj obrazki interfejsu
-    load_images()
+    # capture_array() wraca najpóźniej po jednej klatce
+    if camera_capture_thread and camera_capture_thread.is_alive():
+        camera_capture_thread.join(timeout=2.0)
+    camera_capture_thread = None
 
-    screen.fill(BLACK)
-    pygame.display.flip()
+    with camera_frame_lock:
+        camera_latest_frame = None
+    print("[CAPTURE] Wątek przechwytywania zatrzymany")
 
-    print("[OK] Pygame OK")
+
+def take_latest_frame():
+    """Odbierz najnowszą klatkę ze skrzynki (bez blokowania). None = brak nowej klatki."""
+    global camera_latest_frame
+
+    with camera_frame_lock:
+        frame = camera_latest_frame
+        camera_latest_frame = None
+    return frame
 
 
 def init_camera():
@@ -4158,16 +5945,14 @@ def init_camera():
     res_config = RESOLUTION_MAP[resolution]
 
     camera = Picamera2()
-    config = camera.create_video_configuration(
-        main={"size": res_config["size"], "format": "RGB888"},
-        controls={"FrameRate": res_config["fps"]}
-    )
-    camera.configure(config)
+    create_camera_config(res_config)
     camera.start()
 
     # Konfiguracja została już wczytana w init_pygame()
     apply_camera_settings()
 
+    start_camera_capture()
+
     print(f"[OK] Kamera OK: {resolution}")
 
 
@@ -4175,9 +5960,211 @@ def init_camera():
 # NAGRYWANIE
 # ============================================================================
 
+class LiveMuxOutput(Output):
+    """
+    Wyjście Picamera2 muxujące na żywo: strumień H264 z encodera idzie na stdin ffmpeg,
+    a PCM z PyAudio przez FIFO (lokalny dysk) - plik MP4 ma dźwięk od razu po stop_encoder().
+    """
+
+    def __init__(self, output_filename, fps, audio_channels, audio_rate):
+        super().__init__()
+        self.output_filename = str(output_filename)
+        self.fps = fps
+        self.audio_channels = audio_channels
+        self.audio_rate = audio_rate
+        self.ffmpeg = None
+        self.audio_fifo_dir = None
+        self.audio_fifo_path = None
+        self.audio_fd = None
+        self.audio_lock = threading.Lock()  # Stan (fd, pending, closed) - nigdy nie trzymany podczas zapisu
+        self.write_lock = threading.Lock()  # Kolejność zapisów do FIFO i zamknięcie fd
+        self.audio_write_failed = False
+        self.audio_open_thread = None
+        self.audio_pending = []  # Audio zebrane zanim ffmpeg otworzył FIFO
+        self.audio_closed = False
+        self.first_frame_time = None
+        self.audio_started = False
+        self.audio_latency = 0.0  # Opóźnienie toru audio (ALC) - początek audio przesuwany wcześniej
+
+    def start(self):
+        # FIFO w prywatnym katalogu tymczasowym - poza katalogami aplikacji
+        self.audio_fifo_dir = tempfile.mkdtemp(prefix="live_mux_")
+        self.audio_fifo_path = Path(self.audio_fifo_dir) / "audio.pcm"
+        os.mkfifo(str(self.audio_fifo_path))
+
+        # Timestampy video z zegara (czas nadejścia klatek z encodera - zmienny FPS i zgubione
+        # klatki nie rozjeżdżają osi czasu), audio z liczby próbek - obie osie startują od 0
+        cmd = [
+            "ffmpeg",
+            "-loglevel", "warning",
+            "-y",
+            "-use_wallclock_as_timestamps", "1",
+            "-thread_queue_size", "64",
+            "-f", "h264",
+            "-i", "-",
+            "-thread_queue_size", "512",
+            "-f", "s16le",
+            "-ar", str(self.audio_rate),
+            "-ac", str(self.audio_channels),
+            "-i", str(self.audio_fifo_path),
+            "-map", "0:v:0",
+            "-map", "1:a:0",
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-b:a", "128k",
+            "-af", "aresample=async=1:first_pts=0",
+            "-f", "mp4",
+            self.output_filename
+        ]
+        self.ffmpeg = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            preexec_fn=lambda: signal.signal(signal.SIGINT, signal.SIG_IGN)
+        )
+
+        # open() na FIFO blokuje do momentu otwarcia przez ffmpeg - rób to w tle
+        self.audio_open_thread = threading.Thread(target=self._open_audio_fifo, daemon=True)
+        self.audio_open_thread.start()
+
+        super().start()
+        print(f"[LIVE-MUX] Start: {self.output_filename}")
+
+    def _open_audio_fifo(self):
+        try:
+            fd = os.open(str(self.audio_fifo_path), os.O_WRONLY)
+            # Zapis nieblokujący - zawieszony ffmpeg nie może zablokować wątku nagrania ani stop()
+            fcntl.fcntl(fd, fcntl.F_SETFL, fcntl.fcntl(fd, fcntl.F_GETFL) | os.O_NONBLOCK)
+        except Exception as e:
+            print(f"[LIVE-MUX] Nie można otworzyć FIFO audio: {e}")
+            return
+
+        with self.write_lock:
+            with self.audio_lock:
+                self.audio_fd = fd
+                pending = self.audio_pending
+                self.audio_pending = []
+            for data in pending:
+                self._write_fifo(data)
+            # Nagranie zakończyło się zanim ffmpeg otworzył FIFO - zamknij (EOF)
+            with self.audio_lock:
+                if self.audio_closed and self.audio_fd is not None:
+                    os.close(self.audio_fd)
+                    self.audio_fd = None
+
+    def _write_fifo(self, data):
+        # Wywoływane pod write_lock (bez audio_lock) - zapis z limitem czasu LIVE_MUX_WRITE_TIMEOUT
+        if self.audio_fd is None or self.audio_write_failed:
+            return
+        view = memoryview(data)
+        deadline = time.monotonic() + LIVE_MUX_WRITE_TIMEOUT
+        try:
+            while view:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"ffmpeg nie odbiera audio od {LIVE_MUX_WRITE_TIMEOUT:.1f} s")
+                _, writable, _ = select.select([], [self.audio_fd], [], remaining)
+                if not writable:
+                    continue
+                try:
+                    written = os.write(self.audio_fd, view)
+                except BlockingIOError:
+                    continue
+                view = view[written:]
+        except Exception as e:
+            # Dalsze bloki są odrzucane - lepsza dziura w audio niż zawieszone nagrywanie
+            self.audio_write_failed = True
+            print(f"[LIVE-MUX] Błąd zapisu audio: {e}")
+
+    def write_audio(self, data):
+        """Przekaż blok PCM (int16, przeplatany) do muxera"""
+        blocks = []
+        with self.audio_lock:
+            if self.audio_closed:
+                return
+
+            if not self.audio_started:
+                self.audio_started = True
+                # Wyrównaj początek audio do pierwszej klatki video ciszą (lub przycięciem,
+                # gdy audio po kompensacji opóźnienia ALC zaczyna się przed pierwszą klatką)
+                if self.first_frame_time is not None:
+                    frame_bytes = 2 * self.audio_channels
+                    chunk_seconds = len(data) / frame_bytes / self.audio_rate
+                    lead = time.monotonic() - self.first_frame_time - chunk_seconds - self.audio_latency
+                    if lead > 0:
+                        silence = bytes(int(lead * self.audio_rate) * frame_bytes)
+                        print(f"[LIVE-MUX] Wyrównanie audio: {lead * 1000:.0f} ms ciszy")
+                        blocks.append(silence)
+                    elif lead < 0:
+                        trim = min(len(data), int(-lead * self.audio_rate) * frame_bytes)
+                        print(f"[LIVE-MUX] Wyrównanie audio: obcięto {-lead * 1000:.0f} ms")
+                        data = data[trim:]
+            blocks.append(data)
+
+            if self.audio_fd is None:
+                # ffmpeg jeszcze nie otworzył FIFO - zapis nastąpi w _open_audio_fifo
+                self.audio_pending.extend(blocks)
+                return
+
+        # Zapis poza audio_lock - stop() może w tym czasie oznaczyć koniec nagrania
+        with self.write_lock:
+            for block in blocks:
+                self._write_fifo(block)
+
+    def outputframe(self, frame, keyframe=True, timestamp=None, *args, **kwargs):
+        if not self.recording or self.ffmpeg is None:
+            return
+        if self.first_frame_time is None:
+            self.first_frame_time = time.monotonic()
+        try:
+            self.ffmpeg.stdin.write(frame)
+            self.ffmpeg.stdin.flush()
+        except Exception as e:
+            print(f"[LIVE-MUX] Błąd zapisu video: {e}")
+
+    def stop(self):
+        super().stop()
+
+        with self.audio_lock:
+            self.audio_closed = True
+        # Trwający zapis kończy się najpóźniej po LIVE_MUX_WRITE_TIMEOUT
+        with self.write_lock:
+            with self.audio_lock:
+                if self.audio_fd is not None:
+                    os.close(self.audio_fd)
+                    self.audio_fd = None
+
+        if self.ffmpeg:
+            try:
+                self.ffmpeg.stdin.close()
+            except Exception:
+                pass
+            try:
+                self.ffmpeg.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                print("[LIVE-MUX] ffmpeg nie zakończył się - zabijam")
+                self.ffmpeg.kill()
+            self.ffmpeg = None
+
+        if self.audio_open_thread and self.audio_open_thread.is_alive():
+            # ffmpeg zakończył się bez otwarcia FIFO - odblokuj open() po stronie zapisu
+            try:
+                fd = os.open(str(self.audio_fifo_path), os.O_RDONLY | os.O_NONBLOCK)
+                self.audio_open_thread.join(timeout=1.0)
+                os.close(fd)
+            except Exception:
+                pass
+
+        if self.audio_fifo_dir:
+            shutil.rmtree(self.audio_fifo_dir, ignore_errors=True)
+            self.audio_fifo_dir = None
+
+        print(f"[LIVE-MUX] Stop: {self.output_filename}")
+
+
 def start_recording():
     """Start nagrywania - FPS w nazwie pliku"""
     global recording, current_file, encoder, recording_start_time, current_recording_fps
+    global current_recording_date_stamped
 
     if not recording:
         if not VIDEO_DIR:
@@ -4199,24 +6186,34 @@ def start_recording():
             # NAPRAWIONE: Przekaż current_recording_fps do encodera
             # H264Encoder używa framerate do kontroli FPS w strumieniu wideo
             encoder = H264Encoder(bitrate=bitrate, framerate=current_recording_fps)
-            output = FfmpegOutput(str(current_file))
+
+            # Muxowanie audio na żywo - plik gotowy z dźwiękiem od razu po zatrzymaniu
+            live_mux = (camera_settings.get("live_audio_mux", True)
+                        and camera_settings.get("audio_recording", True)
+                        and audio is not None)
+            if live_mux:
+                output = LiveMuxOutput(current_file, current_recording_fps, AUDIO_CHANNELS, AUDIO_RATE)
+            else:
+                output = FfmpegOutput(str(current_file))
 
             # NAPRAWIONE: Upewnij się że kamera używa poprawnego FPS
             camera.set_controls({"FrameRate": current_recording_fps})
 
+            # Data wypalana w klatkach przed enkoderem - bez reenkodowania po nagraniu
+            current_recording_date_stamped = enable_date_stamp()
+
             camera.start_encoder(encoder, output)
             recording = True
             recording_start_time = time.time()
 
-            # NAPRAWIONE: Zatrzymaj monitoring audio przed rozpoczęciem nagrywania
-            stop_audio_monitoring()
-
-            # Rozpocznij nagrywanie audio
-            start_audio_recording(current_file)
+            # Rozpocznij nagrywanie audio (subskrypcja otwartego strumienia mikrofonu)
+            start_audio_recording(current_file, output if live_mux else None)
 
             print(f"[OK] Nagrywanie @ {current_recording_fps} FPS")
         except Exception as e:
             print(f"[ERROR] Błąd start: {e}")
+            disable_date_stamp()
+            current_recording_date_stamped = False
             recording = False
             current_file = None
             current_recording_fps = None
@@ -4226,6 +6223,7 @@ def start_recording():
 def stop_recording():
     """Stop nagrywania"""
     global recording, current_file, encoder, recording_start_time, current_recording_fps
+    global current_recording_date_stamped
 
     if recording:
         print("[STOP] STOP...")
@@ -4233,20 +6231,18 @@ def stop_recording():
         saved_file = current_file
         saved_fps = current_recording_fps
         saved_audio_file = audio_file
+        saved_audio_latency = audio_recording_latency
+        saved_date_stamped = current_recording_date_stamped
 
         try:
             # NAPRAWIONE: Najpierw zatrzymaj video encoder, potem audio (aby długości się zgadzały)
             camera.stop_encoder()
+            disable_date_stamp()
             print("[OK] Encoder zatrzymany")
 
-            # Zatrzymaj nagrywanie audio
+            # Zatrzymaj nagrywanie audio (strumień mikrofonu zostaje otwarty)
             stop_audio_recording()
 
-            # NAPRAWIONE: Wznów monitoring audio po zakończeniu nagrywania
-            # Dodaj małe opóźnienie aby urządzenie audio się zwolniło
-            time.sleep(0.3)
-            start_audio_monitoring()
-
             # Przetwarzanie wideo w wątku w tle (nie blokuj głównego wątku)
             def process_video():
                 processing_marker = None
@@ -4266,31 +6262,28 @@ def stop_recording():
                         else:
                             print(f"[OK] Zapisano: {size:.1f} MB @ {saved_fps} FPS")
 
-                            verify_cap = cv2.VideoCapture(str(saved_file))
-                            recorded_fps = verify_cap.get(cv2.CAP_PROP_FPS)
-                            verify_cap.release()
-                            print(f"[FPS] OpenCV wykrył FPS: {recorded_fps:.2f}")
-
                             print("[THUMB] Generowanie miniatury...")
                             generate_thumbnail(saved_file)
-
-                            # Połącz audio i video
-                            if saved_audio_file and saved_audio_file.exists():
-                                print("[MERGE] Łączenie audio z video...")
-                                merge_success = merge_audio_video(saved_file, saved_audio_file)
-                                if not merge_success:
-                                    print("[ERROR] Nie udało się połączyć audio z video!")
-                                    # Usuń plik audio, jeśli merge się nie udał
-                                    if saved_audio_file.exists():
-                                        saved_audio_file.unlink()
-                                        print("[CLEANUP] Usunięto nieudany plik audio")
-
-                            # Dodaj datę jeśli włączona (tylko jeśli plik wideo nadal istnieje)
-                            if saved_file.exists() and camera_settings.get("show_date", False):
-                                print("[DATE] Dodawanie daty...")
-                                date_success = add_date_overlay_to_video(saved_file)
-                                if not date_success:
-                                    print("[ERROR] Nie udało się dodać daty do video!")
+                            invalidate_thumbnail(saved_file.stem)
+
+                            # Połącz audio i dodaj datę w jednym przebiegu ffmpeg
+                            print("[POST] Postprocessing (audio + data)...")
+                            burn_date = camera_settings.get("show_date", False) and not saved_date_stamped
+                            post_success = postprocess_video(saved_file, saved_audio_file, burn_date,
+                                                             saved_audio_latency)
+                            if not post_success:
+                                # Plik WAV zostaje obok nagrania - dźwięk można jeszcze odzyskać
+                                print("[ERROR] Postprocessing nie powiódł się!")
+
+                            # Zapisz metadane gotowego pliku w indeksie (czytane przez ekrany UI)
+                            # razem z indeksem klatek kluczowych (szybkie przewijanie)
+                            metadata = update_video_metadata(saved_file, keyframes=probe_keyframe_times(saved_file))
+                            if metadata:
+                                print(f"[FPS] Zapisany FPS: {metadata['fps']:.2f}, czas: {metadata['duration']:.1f} s")
+                                # Arkusz podglądów do przewijania (z gotowego pliku - z wypaloną datą)
+                                generate_sprite_sheet(saved_file, metadata["duration"])
+                                # Mikroklip animowanego podglądu w galerii
+                                generate_preview_clip(saved_file, metadata["duration"])
 
                             print("[OK] Przetwarzanie zakończone")
 
@@ -4325,6 +6318,7 @@ def stop_recording():
             encoder = None
             current_file = None
             current_recording_fps = None
+            current_recording_date_stamped = False
             recording_start_time = None
 
 
@@ -4336,7 +6330,7 @@ def start_video_playback(video_path):
     """Rozpocznij odtwarzanie - FPS z nazwy pliku, ograniczenie 50fps do 30fps"""
     global video_capture, video_current_frame, video_total_frames, video_fps
     global video_path_playing, video_paused, current_state, video_last_frame_time, video_last_surface
-    global video_audio_ready, playback_loading_start_time, last_ui_interaction_time  
+    global video_audio_ready, playback_loading_start_time, last_ui_interaction_time, video_decoder
 
     # Sprawdź czy film jest w trakcie przetwarzania
     processing_marker = video_path.with_suffix('.processing')
@@ -4362,28 +6356,16 @@ def start_video_playback(video_path):
     # Najpierw spróbuj wyciągnąć FPS z nazwy pliku (najniezawodniejsze)
     original_fps = extract_fps_from_filename(video_path.name)
 
-    # Jeśli nie ma w nazwie, użyj ffprobe (dokładniejsze niż OpenCV)
+    # Metadane z indeksu (ffprobe tylko raz na plik, wynik zapisany na dysku)
+    metadata = get_video_metadata(video_path) or {}
+
+    # Jeśli nie ma w nazwie, użyj FPS z metadanych
     if not original_fps:
-        try:
-            result = subprocess.run(
-                ["ffprobe", "-v", "error", "-select_streams", "v:0",
-                 "-show_entries", "stream=r_frame_rate", "-of", "default=noprint_wrappers=1:nokey=1",
-                 str(video_path)],
-                capture_output=True, text=True, timeout=5
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                # ffprobe zwraca FPS jako ułamek (np. "30/1" lub "50/1")
-                fps_str = result.stdout.strip()
-                if '/' in fps_str:
-                    num, denom = fps_str.split('/')
-                    original_fps = float(num) / float(denom)
-                else:
-                    original_fps = float(fps_str)
-                print(f"[FPS] ffprobe FPS: {original_fps}")
-        except Exception as e:
-            print(f"[WARN] Błąd ffprobe: {e}")
+        original_fps = metadata.get("fps", 0)
+        if original_fps:
+            print(f"[FPS] FPS z indeksu metadanych: {original_fps}")
 
-    # Jeśli ffprobe też zawiodło, użyj OpenCV jako ostateczność
+    # Jeśli metadane też zawiodły, użyj OpenCV jako ostateczność
     if not original_fps or original_fps <= 0:
         original_fps = video_capture.get(cv2.CAP_PROP_FPS)
         print(f"[FPS] OpenCV FPS (fallback): {original_fps}")
@@ -4397,21 +6379,12 @@ def start_video_playback(video_path):
     # Niektóre filmy mają nieprawidłowe metadane FPS, więc sprawdzamy rzeczywisty FPS
     video_total_frames_temp = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
 
-    # Pobierz rzeczywisty czas trwania wideo z ffprobe
+    # Rzeczywisty czas trwania wideo z indeksu metadanych
     calculated_fps = None
-    try:
-        result = subprocess.run(
-            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
-             "-of", "default=noprint_wrappers=1:nokey=1", str(video_path)],
-            capture_output=True, text=True, timeout=5
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            duration_seconds = float(result.stdout.strip())
-            if duration_seconds > 0 and video_total_frames_temp > 0:
-                calculated_fps = video_total_frames_temp / duration_seconds
-                print(f"[FPS] Obliczony FPS (klatki/czas): {calculated_fps:.2f}")
-    except Exception as e:
-        print(f"[WARN] Nie można obliczyć FPS z czasu trwania: {e}")
+    duration_seconds = metadata.get("duration", 0)
+    if duration_seconds > 0 and video_total_frames_temp > 0:
+        calculated_fps = video_total_frames_temp / duration_seconds
+        print(f"[FPS] Obliczony FPS (klatki/czas): {calculated_fps:.2f}")
 
     # Diagnostyka - pokaż wszystkie źródła FPS
     print(f"[FPS] Metadane FPS: {original_fps:.2f}")
@@ -4439,82 +6412,53 @@ def start_video_playback(video_path):
     print(f"[OK] UŻYWAM FPS: {video_fps:.2f}")
 
     video_total_frames = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
-    video_current_frame = 0
+
+    # Indeks klatek kluczowych z metadanych - dla starszych nagrań budowany raz w tle
+    load_playback_keyframes(video_path, metadata.get("keyframes"))
+    # Arkusz podglądów przewijania - dla starszych nagrań generowany raz w tle
+    load_playback_sprite_sheet(video_path, duration_seconds)
       # NAPRAWIONE: Zapauzuj od razu - odpauzuj dopiero gdy audio będzie gotowe
     video_path_playing = video_path
     video_last_frame_time = time.time()
     video_last_surface = None
 
-    # NAPRAWIONE: Odczytaj pierwszą klatkę aby pokazać ją od razu (zamiast czarnego ekranu)
-    try:
-        ret, first_frame = video_capture.read()
-        if ret and first_frame is not None:
-            frame_rgb = cv2.cvtColor(first_frame, cv2.COLOR_BGR2RGB)
-            video_h, video_w = first_frame.shape[:2]
-            aspect = video_w / video_h
-            screen_aspect = SCREEN_WIDTH / SCREEN_HEIGHT
-
-            if aspect > screen_aspect:
-                new_w = SCREEN_WIDTH
-                new_h = int(SCREEN_WIDTH / aspect)
-            else:
-                new_h = SCREEN_HEIGHT
-                new_w = int(SCREEN_HEIGHT * aspect)
-
-            frame_resized = cv2.resize(frame_rgb, (new_w, new_h))
-            frame_surface = pygame.surfarray.make_surface(np.transpose(frame_resized, (1, 0, 2)))
-            video_last_surface = (frame_surface, new_w, new_h)
-            video_current_frame = 1  # Pierwsza ramka już odczytana
-            print("[VIDEO] Pierwsza ramka załadowana")
-    except Exception as e:
-        print(f"[WARN] Nie można odczytać pierwszej ramki: {e}")
+    # Dekoder z wyprzedzeniem - od tej chwili tylko jego wątek używa video_capture.
+    # Pierwsza klatka pojawi się na ekranie zaraz po zdekodowaniu (zamiast czarnego ekranu)
+    video_decoder = PlaybackDecoder(video_capture)
+    video_decoder.start()
+    video_current_frame = 1  # video_current_frame - 1 = numer klatki do wyświetlenia
 
-    # NAPRAWIONE: Ekstraktuj audio w wątku w tle aby nie blokować GUI
-    def extract_and_play_audio():
+    # Dźwięk strumieniowo (ffmpeg -> potok PCM -> kanał miksera) - start w wątku w tle
+    def start_playback_audio():
         global video_audio_ready, video_paused, video_last_frame_time, video_current_frame
+        global playback_audio, video_current_volume
         try:
-            # Ścieżka do tymczasowego pliku audio (lokalny dysk, nie karta SD)
-            temp_audio_path = THUMBNAIL_DIR / f"temp_playback_audio_{video_path.stem}.wav"
-
-            # Usuń stary plik tymczasowy jeśli istnieje
-            if temp_audio_path.exists():
-                temp_audio_path.unlink()
-
-            # Użyj ffmpeg do ekstrahowania audio do WAV
-            print(f"[AUDIO] Ekstrakcja audio w tle z MP4...")
-            extract_cmd = [
-                "ffmpeg",
-                "-i", str(video_path),
-                "-vn",  # Bez video
-                "-acodec", "pcm_s16le",  # Kodek WAV
-                "-ar", "44100",  # Sample rate
-                "-ac", "2",  # Stereo
-                "-y",  # Nadpisz jeśli istnieje
-                str(temp_audio_path)
-            ]
-
-            result = subprocess.run(extract_cmd, capture_output=True, text=True, timeout=120)  # ZWIĘKSZONY timeout dla dużych plików
-
-            if result.returncode == 0 and temp_audio_path.exists():
-                pygame.mixer.music.load(str(temp_audio_path))
-                pygame.mixer.music.set_volume(1.0)
-                
+            print(f"[AUDIO] Strumieniowe dekodowanie audio z MP4...")
+            video_current_volume = 1.0
+            stream = PlaybackAudioStream(video_path, 0.0, video_current_volume)
+            stream.start()
+            playback_audio = stream
+
+            started = stream.wait_started(PLAYBACK_AUDIO_START_TIMEOUT)
+            if video_path_playing != video_path:
+                # Odtwarzanie zakończono zanim dźwięk wystartował
+                stream.stop()
+                return
+
+            if started:
                 # --- KLUCZOWA POPRAWKA ---
-                # 1. Przewiń wideo fizycznie na klatkę 0
-                video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                # 1. Start od klatki 0 (dekoder ma ją już w kolejce - wideo stało na pauzie)
                 # 2. Zresetuj licznik klatek interfejsu
-                video_current_frame = 0
-                # 3. Zsynchronizuj czas bazowy z momentem startu
+                video_current_frame = 1
+                # 3. Zsynchronizuj czas bazowy z momentem startu dźwięku
                 video_last_frame_time = time.time()
-                
-                # Uruchom dźwięk od zera
-                pygame.mixer.music.play(start=0.0)
-                
+                reset_av_sync()
+
                 video_audio_ready = True
                 video_paused = False  # Odblokuj obraz
                 print(f"[OK] Start od 0:00 - Audio i Video zsynchronizowane")
             else:
-                print(f"[WARN] Nie można wyekstrahować audio: {result.stderr}")
+                print(f"[WARN] Brak ścieżki audio lub błąd dekodowania")
                 # NOWY: Nawet jeśli audio się nie powiodło, ustaw flagę i odpauzuj (aby nie czekać w nieskończoność)
                 video_audio_ready = True
                 video_paused = False
@@ -4525,8 +6469,8 @@ def start_video_playback(video_path):
             video_audio_ready = True
             video_paused = False
 
-    # Uruchom ekstrakcję audio w wątku w tle
-    audio_thread = threading.Thread(target=extract_and_play_audio, daemon=True)
+    # Uruchom dźwięk w wątku w tle
+    audio_thread = threading.Thread(target=start_playback_audio, daemon=True)
     audio_thread.start()
 
     current_state = STATE_PLAYING
@@ -4537,37 +6481,87 @@ def start_video_playback(video_path):
 def stop_video_playback():
     """Zatrzymaj odtwarzanie"""
     global video_capture, current_state, video_path_playing, video_last_surface, video_audio_ready
+    global video_decoder, playback_audio, video_scrubbing, video_scrub_frame, video_sprite_sheet
 
     # NOWY: Resetuj flagę audio
     video_audio_ready = False
 
-    if video_capture:
+    # Dekoder zatrzymuje swój wątek i zwalnia video_capture
+    if video_decoder:
+        video_decoder.stop()
+        video_decoder = None
+    elif video_capture:
         video_capture.release()
-        video_capture = None
+    video_capture = None
 
-    # Zatrzymaj dźwięk
-    try:
-        pygame.mixer.music.stop()
+    # Zatrzymaj dźwięk (ffmpeg + kanał miksera)
+    if playback_audio:
+        playback_audio.stop()
+        playback_audio = None
         print("[AUDIO] Zatrzymano dźwięk")
-    except:
-        pass
-
-    # Usuń tymczasowy plik audio jeśli istnieje
-    if video_path_playing:
-        try:
-            temp_audio_path = THUMBNAIL_DIR / f"temp_playback_audio_{video_path_playing.stem}.wav"
-            if temp_audio_path.exists():
-                temp_audio_path.unlink()
-                print(f"[AUDIO] Usunięto tymczasowy plik: {temp_audio_path.name}")
-        except Exception as e:
-            print(f"[WARN] Nie można usunąć pliku tymczasowego: {e}")
 
+    video_scrubbing = False
+    video_scrub_frame = None
+    video_sprite_sheet = None
     video_path_playing = None
     video_last_surface = None
     current_state = STATE_VIDEOS
     print("[STOP] Zatrzymano")
 
 
+def reset_av_sync():
+    """Wyzeruj pomiar przesunięcia A/V (start lub przewinięcie dźwięku)"""
+    global video_av_offset, video_av_measured_offset, video_av_last_log_time
+    video_av_offset = 0.0
+    video_av_measured_offset = 0.0
+    video_av_last_log_time = time.time()
+
+
+def get_playback_audio_clock():
+    """
+    Pozycja odtwarzanego dźwięku w sekundach (zegar nadrzędny dla obrazu).
+    Zwraca None gdy dźwięk nie gra (brak ścieżki audio, start w toku).
+    """
+    if not video_audio_ready or not playback_audio or playback_audio.failed:
+        return None
+    return playback_audio.get_clock()
+
+
+def sync_video_to_audio(current_time, frame_interval):
+    """
+    Korekta dryfu: zegar wideo biegnie płynnie od video_last_frame_time, a zmierzone
+    (uśrednione) przesunięcie względem audio przesuwa jego bazę - obraz przed dźwiękiem
+    powtarza klatki, obraz spóźniony pomija klatki (dekoder ich nie konwertuje).
+    """
+    global video_last_frame_time, video_av_offset, video_av_measured_offset, video_av_last_log_time
+
+    audio_clock = get_playback_audio_clock()
+    if audio_clock is None:
+        return
+
+    video_clock = (video_current_frame - 1) * frame_interval + (current_time - video_last_frame_time)
+    drift = video_clock - audio_clock
+
+    # Duży skok (np. tuż po przewinięciu) - koryguj od razu, mały dryf - uśredniaj (zegar audio ma ziarnistość kawałków)
+    if abs(drift) > AV_SYNC_RESYNC:
+        video_av_offset = drift
+    else:
+        video_av_offset += (drift - video_av_offset) * AV_SYNC_SMOOTHING
+    # video_av_offset jest zerowane po korekcie - diagnostyka pokazuje ostatni pomiar
+    video_av_measured_offset = video_av_offset
+
+    if abs(video_av_offset) > AV_SYNC_THRESHOLD:
+        video_last_frame_time += video_av_offset
+        print(f"[SYNC] Korekta A/V: {video_av_offset * 1000:+.0f} ms "
+              f"({'powtórzenie' if video_av_offset > 0 else 'pominięcie'} klatek)")
+        video_av_offset = 0.0
+
+    if current_time - video_av_last_log_time >= AV_SYNC_LOG_INTERVAL:
+        video_av_last_log_time = current_time
+        print(f"[SYNC] Przesunięcie A/V: {video_av_measured_offset * 1000:+.0f} ms "
+              f"(chwilowe {drift * 1000:+.0f} ms, audio {audio_clock:.2f}s)")
+
+
 def toggle_pause():
     """Przełącz pauzę"""
     global video_paused, video_last_frame_time, last_ui_interaction_time
@@ -4579,10 +6573,12 @@ def toggle_pause():
     # NAPRAWIONE: Pauzuj/wznów dźwięk
     try:
         if video_paused:
-            pygame.mixer.music.pause()
+            if playback_audio:
+                playback_audio.pause()
             print("[AUDIO] Zapauzowano dźwięk")
         else:
-            pygame.mixer.music.unpause()
+            if playback_audio:
+                playback_audio.resume()
             video_last_frame_time = time.time()
             print("[AUDIO] Wznowiono dźwięk")
     except:
@@ -4593,19 +6589,134 @@ def toggle_pause():
     print(f"{'[PAUSE] Pauza' if video_paused else '[PLAY] Wznowiono'}")
 
 
-def seek_video(seconds):
-    """Przewiń wideo"""
-    global video_current_frame, video_capture, video_last_frame_time
-    global video_path_playing, video_last_surface, video_paused, video_current_volume, last_ui_interaction_time
+def load_playback_keyframes(video_path, keyframe_times):
+    """Ustaw indeks klatek kluczowych odtwarzanego filmu (brak w metadanych - zbuduj w tle)"""
+    global video_keyframes
+
+    video_keyframes = []
+    if keyframe_times is not None:
+        video_keyframes = sorted({int(round(t * video_fps)) for t in keyframe_times})
+        print(f"[SEEK] Indeks klatek kluczowych: {len(video_keyframes)}")
+        return
+
+    def build_keyframe_index():
+        global video_keyframes
+        keyframe_times = probe_keyframe_times(video_path)
+        set_video_metadata_fields(video_path, keyframes=keyframe_times)
+        if video_path_playing == video_path:
+            video_keyframes = sorted({int(round(t * video_fps)) for t in keyframe_times})
+        print(f"[SEEK] Zbudowano indeks klatek kluczowych: {len(keyframe_times)} ({video_path.name})")
+
+    threading.Thread(target=build_keyframe_index, daemon=True).start()
+
+
+def load_playback_sprite_sheet(video_path, duration):
+    """Wczytaj w tle arkusz podglądów odtwarzanego filmu (brak pliku - najpierw go wygeneruj)"""
+    global video_sprite_sheet
+
+    video_sprite_sheet = None
+
+    def load_sprite_sheet():
+        global video_sprite_sheet
+        sprite_path = get_sprite_sheet_path(video_path)
+        if not sprite_path.exists() and not generate_sprite_sheet(video_path, duration):
+            return
+        try:
+            sheet = pygame.image.load(str(sprite_path))
+        except Exception as e:
+            print(f"[SPRITE] Nie można wczytać arkusza: {e}")
+            return
+        if sheet.get_width() < SPRITE_COLUMNS * SPRITE_TILE_WIDTH or sheet.get_height() < SPRITE_ROWS * SPRITE_TILE_HEIGHT:
+            print(f"[SPRITE] Arkusz ma nieprawidłowy rozmiar: {sheet.get_size()}")
+            return
+        if video_path_playing == video_path:
+            video_sprite_sheet = sheet
+            print(f"[SPRITE] Podgląd przewijania gotowy ({video_path.name})")
+
+    threading.Thread(target=load_sprite_sheet, daemon=True).start()
+
 
-    if not video_capture:
+def get_sprite_tile(frame_index):
+    """Kafel arkusza podglądów dla klatki (subsurface - bez kopiowania). Zwraca (numer kafla, Surface)."""
+    tile_count = SPRITE_COLUMNS * SPRITE_ROWS
+    tile = int(frame_index * tile_count / video_total_frames) if video_total_frames > 0 else 0
+    tile = max(0, min(tile, tile_count - 1))
+    return tile, get_sprite_tile_surface(tile)
+
+
+def get_sprite_tile_surface(tile):
+    """Surface kafla arkusza podglądów o danym numerze"""
+    column = tile % SPRITE_COLUMNS
+    row = tile // SPRITE_COLUMNS
+    return video_sprite_sheet.subsurface((column * SPRITE_TILE_WIDTH, row * SPRITE_TILE_HEIGHT,
+                                          SPRITE_TILE_WIDTH, SPRITE_TILE_HEIGHT))
+
+
+def snap_to_keyframe(frame_index):
+    """Najbliższa klatka kluczowa (bez indeksu - klatka bez zmian)"""
+    if not video_keyframes:
+        return frame_index
+    position = bisect.bisect_left(video_keyframes, frame_index)
+    candidates = video_keyframes[max(0, position - 1):position + 1]
+    return min(candidates, key=lambda keyframe: abs(keyframe - frame_index))
+
+
+def scrub_video(seconds):
+    """
+    Przewijanie z przytrzymanym LEFT/RIGHT: pozycja przesuwa się o seconds.
+    Z arkuszem podglądów obraz pochodzi z arkusza (dekoder stoi), bez arkusza skacze
+    po klatkach kluczowych (dekoder nie dekoduje od keyframe do celu).
+    Dźwięk stoi do puszczenia przycisku - wtedy finish_scrub() przewija dokładnie.
+    """
+    global video_scrubbing, video_scrub_frame, video_current_frame, last_ui_interaction_time
+
+    if not video_decoder:
         return
 
     frames_to_move = int(seconds * video_fps)
     if frames_to_move == 0:
         return
 
-    target_frame = video_current_frame + frames_to_move
+    if not video_scrubbing:
+        video_scrubbing = True
+        video_scrub_frame = video_current_frame - 1
+        if playback_audio:
+            playback_audio.pause()
+
+    video_scrub_frame = max(0, min(video_scrub_frame + frames_to_move, video_total_frames - 1))
+    last_ui_interaction_time = time.time()
+
+    if video_sprite_sheet is not None:
+        # Podgląd z arkusza - pasek postępu idzie za pozycją, dekodowanie dopiero po puszczeniu
+        video_current_frame = video_scrub_frame + 1
+        return
+
+    display_frame = snap_to_keyframe(video_scrub_frame)
+    if display_frame != video_current_frame - 1:
+        video_decoder.seek(display_frame)
+        video_current_frame = display_frame + 1
+
+
+def finish_scrub():
+    """Puszczenie przycisku przewijania - dokładne przewinięcie obrazu i dźwięku do pozycji docelowej"""
+    global video_scrubbing, video_scrub_frame
+
+    if not video_scrubbing:
+        return
+    target_frame = video_scrub_frame
+    video_scrubbing = False
+    video_scrub_frame = None
+    seek_video_to_frame(target_frame)
+
+
+def seek_video_to_frame(target_frame):
+    """Przewiń obraz i dźwięk dokładnie do klatki target_frame"""
+    global video_current_frame, video_capture, video_last_frame_time, playback_audio
+    global video_path_playing, video_last_surface, video_paused, video_current_volume, last_ui_interaction_time
+
+    if not video_decoder:
+        return
+
     target_frame = max(0, min(target_frame, video_total_frames - 1))
 
     # Odnotuj interakcję z UI
@@ -4614,12 +6725,8 @@ def seek_video(seconds):
     was_paused = video_paused
 
     try:
-        video_capture.set(cv2.CAP_PROP_POS_FRAMES, target_frame)
-
-        ret, frame = video_capture.read()
-        if not ret or frame is None:
-            return
-
+        # Dekoder przewija się w swoim wątku - klatka docelowa pojawi się po zdekodowaniu
+        video_decoder.seek(target_frame)
         video_current_frame = target_frame + 1
 
         # NAPRAWIONE: Synchronizacja audio podczas przewijania
@@ -4629,55 +6736,164 @@ def seek_video(seconds):
             # Oblicz pozycję w sekundach
             target_time_seconds = target_frame / video_fps if video_fps > 0 else 0
 
-            # Ścieżka do tymczasowego pliku audio (lokalny dysk, nie karta SD)
-            temp_audio_path = THUMBNAIL_DIR / f"temp_playback_audio_{video_path_playing.stem}.wav"
-
-            if video_audio_ready and temp_audio_path.exists():
-                # Zatrzymaj obecne audio
-                pygame.mixer.music.stop()
+            if video_audio_ready and playback_audio and not playback_audio.failed:
+                # Zatrzymaj obecny strumień i uruchom nowy od pozycji docelowej (ffmpeg -ss)
+                playback_audio.stop()
 
-                # Załaduj ponownie
-                pygame.mixer.music.load(str(temp_audio_path))
                 # NAPRAWIONE: Zachowaj poprzednią głośność zamiast resetować do 1.0
-                pygame.mixer.music.set_volume(video_current_volume)
-
-                # Uruchom z dokładnej pozycji (set_pos PRZED play dla lepszej synchronizacji)
-                pygame.mixer.music.play(start=target_time_seconds)
-
-                # Jeśli było zapauzowane, zapauzuj ponownie
+                playback_audio = PlaybackAudioStream(video_path_playing, target_time_seconds, video_current_volume)
+                # Jeśli było zapauzowane, strumień startuje zapauzowany
                 if was_paused:
-                    pygame.mixer.music.pause()
+                    playback_audio.pause()
+                playback_audio.start()
+                reset_av_sync()
 
                 print(f"[AUDIO] Przewinięto audio do: {target_time_seconds:.2f}s")
             else:
-                print(f"[WARN] Brak pliku audio do przewinięcia")
+                print(f"[WARN] Brak strumienia audio do przewinięcia")
         except Exception as e:
             print(f"[WARN] Nie można przewinąć audio: {e}")
 
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        video_last_frame_time = time.time()
+        video_paused = was_paused
 
-        h, w = frame.shape[:2]
-        aspect = w / h
-        screen_aspect = SCREEN_WIDTH / SCREEN_HEIGHT
+    except Exception as e:
+        print(f"[ERROR] Błąd seek: {e}")
+        video_paused = was_paused
 
-        if aspect > screen_aspect:
-            new_w = SCREEN_WIDTH
-            new_h = int(SCREEN_WIDTH / aspect)
-        else:
-            new_h = SCREEN_HEIGHT
-            new_w = int(SCREEN_HEIGHT * aspect)
 
-        frame_resized = cv2.resize(frame_rgb, (new_w, new_h))
-        frame_surface = pygame.surfarray.make_surface(np.transpose(frame_resized, (1, 0, 2)))
+# ============================================================================
+# KOMPOZYTOR HUD EKRANU GŁÓWNEGO (warstwy + odświeżanie prostokątów)
+# ============================================================================
 
-        video_last_surface = (frame_surface, new_w, new_h)
+def render_hud_layer(draw_function):
+    """
+    Wyrenderuj element HUD do osobnej warstwy RGBA.
+    Funkcja rysująca działa bez zmian - globalny screen jest na czas rysowania
+    podmieniony na przezroczystą warstwę, z której wycinany jest zajęty prostokąt.
+    Zwraca (Surface, Rect w układzie ekranu) lub (None, None) jeśli nic nie narysowano.
+    """
+    global screen, hud_scratch_surface
 
-        video_last_frame_time = time.time()
-        video_paused = was_paused
+    if hud_scratch_surface is None or hud_scratch_surface.get_size() != screen.get_size():
+        hud_scratch_surface = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
+    hud_scratch_surface.fill((0, 0, 0, 0))
 
+    display_surface = screen
+    screen = hud_scratch_surface
+    try:
+        draw_function()
     except Exception as e:
-        print(f"[ERROR] Błąd seek: {e}")
-        video_paused = was_paused
+        print(f"[HUD] Błąd rysowania warstwy: {e}")
+    finally:
+        screen = display_surface
+
+    rect = hud_scratch_surface.get_bounding_rect()
+    if rect.width == 0 or rect.height == 0:
+        return None, None
+    return hud_scratch_surface.subsurface(rect).copy(), rect
+
+
+def get_hud_static_layer():
+    """Warstwa statyczna (siatka, ramka środkowa, P-MENU) - przebudowywana tylko po zmianie ustawień"""
+    global hud_static_layer
+
+    key = (
+        camera_settings.get("show_grid", True),
+        camera_settings.get("show_center_frame", True),
+        recording,
+        font_large,
+        screen.get_size(),
+    )
+    if hud_static_layer is not None and hud_static_layer[0] == key:
+        return hud_static_layer[1], hud_static_layer[2]
+
+    def draw_static():
+        draw_grid_overlay()
+        draw_center_frame()
+        if not recording:
+            draw_menu_button()
+
+    surface, rect = render_hud_layer(draw_static)
+    hud_static_layer = (key, surface, rect)
+    return surface, rect
+
+
+def get_hud_time_remaining():
+    """Szacowany czas nagrywania - statystyki dysku odświeżane co HUD_TIME_ESTIMATE_INTERVAL"""
+    now = time.time()
+    if hud_time_estimate["text"] is None or now - hud_time_estimate["time"] >= HUD_TIME_ESTIMATE_INTERVAL:
+        hud_time_estimate["text"] = get_recording_time_estimate()
+        hud_time_estimate["time"] = now
+    return hud_time_estimate["text"]
+
+
+def get_hud_widget_keys():
+    """Klucze stanu dynamicznych widżetów - warstwa jest renderowana ponownie tylko gdy klucz się zmieni"""
+    global error_message
+
+    # Wygaszenie komunikatu błędu musi nastąpić tu - warstwa nie jest rysowana co klatkę
+    if error_message is not None and time.time() - error_message_time > ERROR_DISPLAY_DURATION:
+        error_message = None
+
+    meter_segments = get_meter_segments(audio_meter_snapshot)
+
+    if recording and recording_start_time:
+        rec_key = (int(time.time() - recording_start_time), int(pygame.time.get_ticks() / 500) % 2)
+    else:
+        rec_key = None
+
+    fonts = (font_large, menu_font, font_mediumXL, font_70, font_small)
+    return [
+        (draw_date_overlay, (camera_settings.get("show_date", False) and get_display_date(),
+                             camera_settings.get("date_color", "yellow"), camera_settings.get("date_position", "top_left"),
+                             camera_settings.get("date_font_size", "medium"), recording, fonts)),
+        (draw_battery_icon, (battery_is_charging, min(4, max(1, int(battery_max_displayed_level // 25) + 1)),
+                             get_battery_display_texts(), camera_settings.get("date_position", "top_left"), fonts)),
+        (draw_zoom_indicator, (recording, camera_settings.get("brightness", 0.0),
+                               camera_settings.get("iso_mode", "auto"), camera_settings.get("awb_mode", "auto"),
+                               camera_settings.get("zoom", 0.0), fonts)),
+        (draw_audio_level_indicator, (bool(audio), current_state, recording, meter_segments,
+                                      camera_settings.get("audio_alc", True), fonts)),
+        (draw_recording_indicator, (recording, rec_key, fonts)),
+        (draw_recording_time_remaining, (get_hud_time_remaining(),
+                                         camera_settings.get("video_resolution", "1080p30"), fonts)),
+        (draw_error_message, (error_message, fonts)),
+    ]
+
+
+def update_hud_widgets():
+    """Odśwież warstwy widżetów, których stan się zmienił. Zwraca listę prostokątów do odświeżenia."""
+    dirty_rects = []
+    for draw_function, key in get_hud_widget_keys():
+        cached = hud_widget_layers.get(draw_function)
+        if cached is not None and cached[0] == key:
+            continue
+        surface, rect = render_hud_layer(draw_function)
+        if cached is not None and cached[2] is not None:
+            dirty_rects.append(cached[2])
+        if rect is not None:
+            dirty_rects.append(rect)
+        hud_widget_layers[draw_function] = (key, surface, rect)
+    return dirty_rects
+
+
+def blit_hud_widgets(area=None):
+    """Nałóż warstwy widżetów na ekran (opcjonalnie tylko te przecinające area)"""
+    for key, surface, rect in hud_widget_layers.values():
+        if surface is None:
+            continue
+        if area is not None and not rect.colliderect(area):
+            continue
+        screen.blit(surface, rect)
+
+
+def invalidate_hud():
+    """Wymuś pełne przerysowanie ekranu głównego (np. po powrocie z innego ekranu)"""
+    global hud_screen_valid
+    hud_screen_valid = False
+    # Ustawienia mogły się zmienić w menu - warstwy widżetów renderuj od nowa
+    hud_widget_layers.clear()
 
 
 # ============================================================================
@@ -4685,38 +6901,54 @@ def seek_video(seconds):
 # ============================================================================
 
 def draw_main_screen(frame):
-    """Ekran główny"""
-    screen.fill(BLACK)
+    """
+    Ekran główny: klatka podglądu + warstwa statyczna + warstwy widżetów.
+    Zwraca None gdy trzeba odświeżyć cały ekran (nowa klatka) albo listę prostokątów
+    zmienionych widżetów, gdy klatka podglądu się nie zmieniła.
+    """
+    global hud_preview_surface, hud_screen_valid
 
     if frame is not None:
         try:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_resized = cv2.resize(frame_rgb, (SCREEN_WIDTH, SCREEN_HEIGHT))
-            frame_surface = pygame.surfarray.make_surface(np.transpose(frame_resized, (1, 0, 2)))
-            screen.blit(frame_surface, (0, 0))
+            hud_preview_surface = present_preview_frame(frame)
         except:
+            hud_preview_surface = None
+
+    # Brak nowej klatki - odśwież tylko prostokąty widżetów, których stan się zmienił
+    # (zmiana warstwy statycznej, np. start nagrywania, wymaga pełnej kompozycji)
+    previous_static_layer = hud_static_layer
+    static_surface, static_rect = get_hud_static_layer()
+    if (frame is None and hud_screen_valid and hud_preview_surface is not None
+            and hud_static_layer is previous_static_layer):
+        dirty_rects = update_hud_widgets()
+        if not dirty_rects:
+            return []
+        for rect in dirty_rects:
+            screen.blit(hud_preview_surface, rect, rect)
+            if static_surface is not None and static_rect.colliderect(rect):
+                clip = static_rect.clip(rect)
+                screen.blit(static_surface, clip, clip.move(-static_rect.x, -static_rect.y))
+        for rect in dirty_rects:
+            screen.set_clip(rect)
+            blit_hud_widgets(rect)
+        screen.set_clip(None)
+        return dirty_rects
+
+    # Pełna kompozycja
+    if hud_preview_surface is not None:
+        screen.blit(hud_preview_surface, (0, 0))
+    else:
+        screen.fill(BLACK)
+        if frame is not None:
             draw_text("[CAM] Kamera", font_large, WHITE, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, center=True)
 
-    draw_grid_overlay()
-    draw_center_frame()  # NOWY: Ramka środkowa
-    draw_date_overlay()
-    draw_battery_icon()
-    draw_zoom_indicator()  # Wskaźnik zoomu zawsze widoczny
-
-    # NAPRAWIONE: Wskaźnik mikrofonu pokazuj PODCZAS nagrywania
-    draw_audio_level_indicator()  # Wskaźnik mikrofonu - funkcja sama sprawdza czy nagrywamy
-
-    # Ukryj elementy UI podczas nagrywania
-    if not recording:
-        draw_menu_button()
-        # draw_text("Record: START/STOP | Videos: Menu | Menu: Ustawienia | +/-: Zoom",
-                #  font_tiny, WHITE, SCREEN_WIDTH // 2, SCREEN_HEIGHT - 30, center=True, bg_color=BLACK, padding=8)
+    if static_surface is not None:
+        screen.blit(static_surface, static_rect)
 
-    # draw_zoom_bar()  # USUNIĘTE - nie pokazuj zoom bara
-    draw_recording_indicator()
-    # draw_sd_indicator()
-    draw_recording_time_remaining()
-    draw_error_message()  # Komunikaty błędów na wierzchu
+    update_hud_widgets()
+    blit_hud_widgets()
+    hud_screen_valid = True
+    return None
 
 
 def draw_videos_screen(hide_buttons=False):
@@ -4729,17 +6961,7 @@ def draw_videos_screen(hide_buttons=False):
 
     # Gradient tła jak w menu
     blue_gray_top = (70, 90, 110)
-    gradient_height = SCREEN_HEIGHT
-    start_color = BLACK
-    end_color = blue_gray_top
-
-    for y in range(gradient_height):
-        ratio = y / gradient_height
-        r = int(start_color[0] * (1 - ratio) + end_color[0] * ratio)
-        g = int(start_color[1] * (1 - ratio) + end_color[1] * ratio)
-        b = int(start_color[2] * (1 - ratio) + end_color[2] * ratio)
-        color = (r, g, b)
-        pygame.draw.line(screen, color, (0, y), (SCREEN_WIDTH, y))
+    screen.blit(get_vertical_gradient((SCREEN_WIDTH, SCREEN_HEIGHT), BLACK, blue_gray_top), (0, 0))
 
     header_height = 95
 
@@ -4779,18 +7001,15 @@ def draw_videos_screen(hide_buttons=False):
             date_str = "??/??/????"
             time_str = "??:??:??"
 
-        # Oblicz długość filmu
+        # Długość filmu z indeksu metadanych (brak wpisu - badanie w tle)
         try:
-            cap = cv2.VideoCapture(str(selected_video))
-            if cap.isOpened():
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                duration = frame_count / fps if fps > 0 else 0
+            metadata = get_video_metadata(selected_video, probe=False)
+            if metadata:
+                duration = metadata["duration"]
                 duration_hours = int(duration // 3600)
                 duration_minutes = int((duration % 3600) // 60)
                 duration_seconds = int(duration % 60)
                 duration_str = f"{duration_hours}:{duration_minutes:02d}:{duration_seconds:02d}"
-                cap.release()
             else:
                 duration_str = "?:??:??"
         except:
@@ -4806,11 +7025,11 @@ def draw_videos_screen(hide_buttons=False):
             draw_text_with_outline("F.:", font_large, WHITE, BLACK, label_x, header_y)
 
             # Oblicz szerokość napisu "WYBRANY FILM:"
-            label_text_surface = font_large.render("F.:", True, WHITE)
+            label_text_surface = get_text_surface("F.:", font_large, WHITE)
             label_text_width = label_text_surface.get_width()
 
             # Oblicz szerokość daty
-            date_text_surface = font_large.render(date_str, True, WHITE)
+            date_text_surface = get_text_surface(date_str, font_large, WHITE)
             date_text_width = date_text_surface.get_width()
 
             # Data po prawej od napisu (odstęp 20px)
@@ -4827,7 +7046,7 @@ def draw_videos_screen(hide_buttons=False):
             battery_right_margin_temp = 40
             battery_x_temp = SCREEN_WIDTH - battery_right_margin_temp - battery_width_temp
 
-            duration_text_surface = font_large.render(duration_str, True, WHITE)
+            duration_text_surface = get_text_surface(duration_str, font_large, WHITE)
             duration_text_width = duration_text_surface.get_width()
             duration_x = battery_x_temp - duration_text_width - 30
 
@@ -4837,7 +7056,7 @@ def draw_videos_screen(hide_buttons=False):
                 icon_height = 43
                 icon_aspect = film_icon.get_width() / film_icon.get_height()
                 icon_width = int(icon_height * icon_aspect)
-                scaled_film_icon = pygame.transform.scale(film_icon, (icon_width, icon_height))
+                scaled_film_icon = get_scaled_asset("film_icon", film_icon, (icon_width, icon_height))
 
                 # Pozycja ikony - na lewo od tekstu długości (odstęp 10px)
                 icon_x = duration_x - icon_width - 10
@@ -5005,8 +7224,17 @@ def draw_videos_screen(hide_buttons=False):
 
         videos_scroll_offset = max(0, min(videos_scroll_offset, max(0, total_rows - items_per_screen)))
 
-        # Rysuj miniaturki w siatce
-        for i in range(len(videos)):
+        # Zleć wczytanie miniaturek: najpierw widoczne wiersze, potem okno prefetch wokół widoku
+        visible_start = videos_scroll_offset * cols
+        visible_end = min(len(videos), (videos_scroll_offset + items_per_screen + 1) * cols)
+        prefetch_start = max(0, visible_start - THUMBNAIL_PREFETCH_ROWS * cols)
+        prefetch_end = min(len(videos), visible_end + THUMBNAIL_PREFETCH_ROWS * cols)
+        request_thumbnails(videos[visible_start:visible_end]
+                           + videos[visible_end:prefetch_end]
+                           + videos[prefetch_start:visible_start][::-1])
+
+        # Rysuj miniaturki w siatce (tylko zakres widocznych wierszy)
+        for i in range(visible_start, visible_end):
             row = i // cols
             col = i % cols
 
@@ -5027,12 +7255,17 @@ def draw_videos_screen(hide_buttons=False):
             bg_color = BLUE if i == selected_index else DARK_GRAY
             pygame.draw.rect(screen, bg_color, (x - 5, y - 5, thumb_width + 10, thumb_height + 10), border_radius=10)
 
-            # Miniaturka
-            if video.stem in thumbnails:
+            # Wybrany kafelek: zapętlony mikroklip z pamięci (już w rozmiarze kafelka)
+            preview_frame = get_preview_clip_frame(video, (thumb_width, thumb_height)) if i == selected_index else None
+
+            # Miniaturka (z cache LRU - jeśli jeszcze nie wczytana, pokaż zastępczy kafelek)
+            thumb_surface = get_thumbnail(video)
+            if preview_frame is not None:
+                screen.blit(preview_frame, (x, y))
+            elif thumb_surface is not None:
                 try:
                     # Skaluj miniaturkę do aktualnego rozmiaru ramki
-                    thumb_surface = thumbnails[video.stem]
-                    scaled_thumb = pygame.transform.scale(thumb_surface, (thumb_width, thumb_height))
+                    scaled_thumb = get_scaled_asset(("thumb", video.stem), thumb_surface, (thumb_width, thumb_height))
                     screen.blit(scaled_thumb, (x, y))
                 except:
                     pygame.draw.rect(screen, GRAY, (x, y, thumb_width, thumb_height), border_radius=5)
@@ -5076,33 +7309,8 @@ def draw_videos_screen(hide_buttons=False):
     dark_blue_gray = (40, 50, 60)
     pygame.draw.rect(screen, dark_blue_gray, (0, panel_y, SCREEN_WIDTH, panel_height))
 
-    # Dodaj liniowy gradient - co 15 pikseli jasność +2, grubość linii -1 (start: 10px)
-    line_spacing = 15
-    brightness_increment = 2
-    initial_line_thickness = 10
-    cycle_length = initial_line_thickness + 1
-
-    current_y = panel_y + line_spacing
-    line_index = 0
-
-    while current_y < panel_y + panel_height:
-        cyclic_index = line_index % cycle_length
-        brightness_boost = cyclic_index * brightness_increment
-        line_color = (
-            min(255, dark_blue_gray[0] + brightness_boost),
-            min(255, dark_blue_gray[1] + brightness_boost),
-            min(255, dark_blue_gray[2] + brightness_boost)
-        )
-        line_thickness = initial_line_thickness - cyclic_index
-
-        if line_thickness > 0:
-            for i in range(line_thickness):
-                pygame.draw.line(screen, line_color,
-                               (10, current_y + i),
-                               (SCREEN_WIDTH - 10, current_y + i))
-
-        current_y += line_spacing
-        line_index += 1
+    # Liniowy gradient (paski) - wyrenderowany raz i zapamiętany
+    screen.blit(get_striped_panel(SCREEN_WIDTH, panel_height, dark_blue_gray), (0, panel_y))
 
     # Ramka panelu - tylko górna krawędź
     pygame.draw.line(screen, LIGHT_BLUE, (0, panel_y), (SCREEN_WIDTH, panel_y), 3)
@@ -5195,33 +7403,8 @@ def draw_video_context_menu():
     dark_blue_gray = (40, 50, 60)
     pygame.draw.rect(screen, dark_blue_gray, (popup_x, popup_y, popup_width, popup_height))
 
-    # Dodaj liniowy gradient - algorytm jak w głównym kwadracie
-    line_spacing = 15
-    brightness_increment = 2
-    initial_line_thickness = 10
-    cycle_length = initial_line_thickness + 1
-
-    current_y = popup_y + line_spacing
-    line_index = 0
-
-    while current_y < popup_y + popup_height:
-        cyclic_index = line_index % cycle_length
-        brightness_boost = cyclic_index * brightness_increment
-        line_color = (
-            min(255, dark_blue_gray[0] + brightness_boost),
-            min(255, dark_blue_gray[1] + brightness_boost),
-            min(255, dark_blue_gray[2] + brightness_boost)
-        )
-        line_thickness = initial_line_thickness - cyclic_index
-
-        if line_thickness > 0:
-            for i in range(line_thickness):
-                pygame.draw.line(screen, line_color,
-                               (popup_x + 10, current_y + i),
-                               (popup_x + popup_width - 10, current_y + i))
-
-        current_y += line_spacing
-        line_index += 1
+    # Liniowy gradient (paski) - wyrenderowany raz i zapamiętany
+    screen.blit(get_striped_panel(popup_width, popup_height, dark_blue_gray), (popup_x, popup_y))
 
     # Białe obramowanie wokół całego okna
     pygame.draw.rect(screen, LIGHT_BLUE, (popup_x, popup_y, popup_width, popup_height), 3)
@@ -5256,23 +7439,8 @@ def draw_video_context_menu():
             dark_navy = (15, 30, 60)
             light_blue = (100, 150, 255)
 
-            # Rysuj gradient - górna 1/3 z przejściem
-            gradient_height_grad = rect_h // 3
-            for y_offset in range(rect_h):
-                if y_offset < gradient_height_grad:
-                    # Gradient od jasnego do ciemnego
-                    ratio = y_offset / gradient_height_grad
-                    r = int(light_blue[0] * (1 - ratio) + dark_navy[0] * ratio)
-                    g = int(light_blue[1] * (1 - ratio) + dark_navy[1] * ratio)
-                    b = int(light_blue[2] * (1 - ratio) + dark_navy[2] * ratio)
-                    color = (r, g, b)
-                else:
-                    # Ciemno granatowy dla reszty
-                    color = dark_navy
-
-                pygame.draw.line(screen, color,
-                               (rect_x, rect_y + y_offset),
-                               (rect_x + rect_w, rect_y + y_offset))
+            # Gradient - górna 1/3 z przejściem (wyrenderowany raz i zapamiętany)
+            screen.blit(get_selection_gradient(rect_w, rect_h, light_blue, dark_navy), (rect_x, rect_y))
 
             # Białe obramowanie 5px
             pygame.draw.rect(screen, WHITE, (rect_x, rect_y, rect_w, rect_h), 5)
@@ -5349,33 +7517,8 @@ def draw_video_info_dialog():
     dark_blue_gray = (40, 50, 60)
     pygame.draw.rect(screen, dark_blue_gray, (popup_x, popup_y, popup_width, popup_height))
 
-    # Dodaj liniowy gradient - algorytm jak w głównym kwadracie
-    line_spacing = 15
-    brightness_increment = 2
-    initial_line_thickness = 10
-    cycle_length = initial_line_thickness + 1
-
-    current_y = popup_y + line_spacing
-    line_index = 0
-
-    while current_y < popup_y + popup_height:
-        cyclic_index = line_index % cycle_length
-        brightness_boost = cyclic_index * brightness_increment
-        line_color = (
-            min(255, dark_blue_gray[0] + brightness_boost),
-            min(255, dark_blue_gray[1] + brightness_boost),
-            min(255, dark_blue_gray[2] + brightness_boost)
-        )
-        line_thickness = initial_line_thickness - cyclic_index
-
-        if line_thickness > 0:
-            for i in range(line_thickness):
-                pygame.draw.line(screen, line_color,
-                               (popup_x + 10, current_y + i),
-                               (popup_x + popup_width - 10, current_y + i))
-
-        current_y += line_spacing
-        line_index += 1
+    # Liniowy gradient (paski) - wyrenderowany raz i zapamiętany
+    screen.blit(get_striped_panel(popup_width, popup_height, dark_blue_gray), (popup_x, popup_y))
 
     # Białe obramowanie wokół całego okna
     pygame.draw.rect(screen, LIGHT_BLUE, (popup_x, popup_y, popup_width, popup_height), 3)
@@ -5417,24 +7560,22 @@ def draw_video_info_dialog():
         print(f"[WARN] Nie można odczytać daty: {e}")
         draw_text_with_outline(f"DATA NAGRANIA: ---", font_large, GRAY, BLACK, info_x, info_y + info_spacing * 2)
 
-    # Dlugosc filmu (jesli mozliwe)
+    # Dlugosc filmu (jesli mozliwe) - z indeksu metadanych
     try:
-        cap = cv2.VideoCapture(str(video))
-        if cap.isOpened():
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            duration = frame_count / fps if fps > 0 else 0
+        metadata = get_video_metadata(video, probe=False)
+        if metadata:
+            duration = metadata["duration"]
             minutes = int(duration // 60)
             seconds = int(duration % 60)
             draw_text_with_outline(f"DŁUGOŚĆ: {minutes}:{seconds:02d}", font_large, WHITE, BLACK, info_x, info_y + info_spacing * 3)
 
             # Format i FPS
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            width = metadata["width"]
+            height = metadata["height"]
+            fps = metadata["fps"]
             draw_text_with_outline(f"FORMAT: {width}x{height} @ {int(fps)} FPS", font_large, WHITE, BLACK, info_x, info_y + info_spacing * 4)
-            cap.release()
         else:
-            draw_text_with_outline("Nie mozna odczytac dlugosci", font_large, GRAY, BLACK, info_x, info_y + info_spacing * 3)
+            draw_text_with_outline("Odczytywanie informacji...", font_large, GRAY, BLACK, info_x, info_y + info_spacing * 3)
     except Exception:
         draw_text_with_outline("Blad odczytu informacji", font_large, RED, BLACK, info_x, info_y + info_spacing * 3)
 
@@ -5472,65 +7613,93 @@ def draw_video_info_dialog():
     draw_text_with_outline("ZAMKNIJ", font_large, WHITE, BLACK, zamknij_x, button_bar_y - 15)
 
 
+def draw_scrub_preview():
+    """Podgląd przewijania: kafel arkusza dla pozycji docelowej powiększony do rozmiaru ekranu"""
+    global video_sprite_preview
+
+    tile, tile_surface = get_sprite_tile(video_scrub_frame)
+    scale = min(SCREEN_WIDTH / SPRITE_TILE_WIDTH, SCREEN_HEIGHT / SPRITE_TILE_HEIGHT)
+    size = (int(SPRITE_TILE_WIDTH * scale), int(SPRITE_TILE_HEIGHT * scale))
+
+    if video_sprite_preview is None or video_sprite_preview.get_size() != size:
+        # Ten sam format co arkusz - wymóg transform.scale z powierzchnią docelową
+        video_sprite_preview = pygame.Surface(size, 0, tile_surface)
+    pygame.transform.scale(tile_surface, size, video_sprite_preview)
+    screen.blit(video_sprite_preview, ((SCREEN_WIDTH - size[0]) // 2, (SCREEN_HEIGHT - size[1]) // 2))
+
+
+def draw_scrub_filmstrip(progress_y):
+    """Pasek filmowy nad paskiem postępu - sąsiednie kafle arkusza, bieżący podświetlony"""
+    tile_count = SPRITE_COLUMNS * SPRITE_ROWS
+    current_tile, _ = get_sprite_tile(video_scrub_frame)
+
+    spacing = 8
+    strip_width = SPRITE_FILMSTRIP_TILES * SPRITE_TILE_WIDTH + (SPRITE_FILMSTRIP_TILES - 1) * spacing
+    strip_x = (SCREEN_WIDTH - strip_width) // 2
+    strip_y = progress_y - SPRITE_TILE_HEIGHT - 30
+
+    strip_bg = pygame.Rect(strip_x - 10, strip_y - 10, strip_width + 20, SPRITE_TILE_HEIGHT + 20)
+    pygame.draw.rect(screen, BLACK, strip_bg, border_radius=8)
+
+    first_tile = current_tile - SPRITE_FILMSTRIP_TILES // 2
+    for i in range(SPRITE_FILMSTRIP_TILES):
+        tile = first_tile + i
+        if tile < 0 or tile >= tile_count:
+            continue
+        tile_x = strip_x + i * (SPRITE_TILE_WIDTH + spacing)
+        screen.blit(get_sprite_tile_surface(tile), (tile_x, strip_y))
+        if tile == current_tile:
+            pygame.draw.rect(screen, YELLOW, (tile_x - 3, strip_y - 3, SPRITE_TILE_WIDTH + 6, SPRITE_TILE_HEIGHT + 6), 3)
+
+
 def draw_playing_screen():
     """Ekran odtwarzania"""
     global video_current_frame, video_last_frame_time, video_last_surface
 
-    if not video_capture:
+    if not video_decoder:
         screen.fill(BLACK)
         draw_text("[ERROR] Blad odtwarzania", font_large, RED, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, center=True)
         return
 
     # NOWY: Odtwarzaj video tylko gdy audio jest gotowe (lub gdy audio jest wyłączone w ustawieniach)
     audio_enabled = camera_settings.get("audio_recording", True)
-    can_play = (not video_paused) and (video_audio_ready or not audio_enabled)
+    can_play = (not video_paused) and (not video_scrubbing) and (video_audio_ready or not audio_enabled)
 
     if can_play:
         current_time = time.time()
         frame_interval = 1.0 / video_fps
+
+        # Dźwięk jest zegarem nadrzędnym - dosuń zegar wideo do pozycji audio
+        sync_video_to_audio(current_time, frame_interval)
         elapsed = current_time - video_last_frame_time
 
         # Oblicz ile klatek powinno zostać wyświetlonych na podstawie czasu
         frames_to_advance = int(elapsed / frame_interval)
 
         if frames_to_advance > 0:
-            for i in range(frames_to_advance):
-                ret, frame = video_capture.read()
-
-                if not ret or frame is None:
-                    stop_video_playback()
-                    return
-
-                if i == frames_to_advance - 1:  # Rysujemy tylko ostatnią klatkę
-                    try:
-                        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-                        video_h, video_w = frame.shape[:2]
-                        aspect = video_w / video_h
-                        screen_aspect = SCREEN_WIDTH / SCREEN_HEIGHT
-
-                        if aspect > screen_aspect:
-                            new_w = SCREEN_WIDTH
-                            new_h = int(SCREEN_WIDTH / aspect)
-                        else:
-                            new_h = SCREEN_HEIGHT
-                            new_w = int(SCREEN_HEIGHT * aspect)
+            # Zegar idzie dalej niezależnie od dekodera - zaległe klatki dekoder pominie
+            video_current_frame += frames_to_advance
 
-                        frame_resized = cv2.resize(frame_rgb, (new_w, new_h))
-                        frame_surface = pygame.surfarray.make_surface(np.transpose(frame_resized, (1, 0, 2)))
-
-                        video_last_surface = (frame_surface, new_w, new_h)
-
-                    except Exception as e:
-                        print(f"[WARN] Błąd klatki: {e}")
-
-                video_current_frame += 1
+            if video_decoder.finished(video_current_frame - 1):
+                stop_video_playback()
+                return
 
             # Zaktualizuj czas bazowy - dodaj dokładny czas ramek, nie aktualny czas
             video_last_frame_time += frames_to_advance * frame_interval
 
+    # Przewijanie z arkuszem podglądów - dekoder stoi do puszczenia przycisku
+    sprite_scrub = video_scrubbing and video_sprite_sheet is not None
+
+    # Pokaż najnowszą gotową klatkę dla bieżącej pozycji (także na pauzie, np. po przewinięciu)
+    decoded = None if sprite_scrub else video_decoder.frame_for(video_current_frame - 1)
+    if decoded:
+        frame_index, frame_surface, new_w, new_h = decoded
+        video_last_surface = (frame_surface, new_w, new_h)
+
     screen.fill(BLACK)
-    if video_last_surface:
+    if sprite_scrub:
+        draw_scrub_preview()
+    elif video_last_surface:
         try:
             frame_surface, new_w, new_h = video_last_surface
             x_offset = (SCREEN_WIDTH - new_w) // 2
@@ -5598,6 +7767,9 @@ def draw_playing_screen():
         time_text = f"{format_time(current_time_sec)} / {format_time(total_time_sec)}"
         draw_text(time_text, font_small, WHITE, SCREEN_WIDTH // 2, progress_y + 30, center=True)
 
+        if sprite_scrub:
+            draw_scrub_filmstrip(progress_y)
+
     # === SYMBOL PAUZY - na środku ekranu (tylko gdy zapauzowane I audio jest gotowe) ===
     if video_paused and video_audio_ready:
         if pause_icon is not None:
@@ -5610,7 +7782,7 @@ def draw_playing_screen():
             center_y = SCREEN_HEIGHT // 2
 
             # Przeskaluj ikonę do odpowiedniego rozmiaru
-            scaled_pause = pygame.transform.scale(pause_icon, (icon_size, icon_size))
+            scaled_pause = get_scaled_asset("pause_icon", pause_icon, (icon_size, icon_size))
 
             # Pozycja do wyrysowania (wyśrodkowana)
             icon_x = center_x - icon_size // 2
@@ -5724,33 +7896,8 @@ def draw_confirm_dialog():
     dark_blue_gray = (40, 50, 60)
     pygame.draw.rect(screen, dark_blue_gray, (popup_x, popup_y, popup_width, popup_height))
 
-    # Dodaj liniowy gradient - algorytm jak w głównym kwadracie
-    line_spacing = 15
-    brightness_increment = 2
-    initial_line_thickness = 10
-    cycle_length = initial_line_thickness + 1
-
-    current_y = popup_y + line_spacing
-    line_index = 0
-
-    while current_y < popup_y + popup_height:
-        cyclic_index = line_index % cycle_length
-        brightness_boost = cyclic_index * brightness_increment
-        line_color = (
-            min(255, dark_blue_gray[0] + brightness_boost),
-            min(255, dark_blue_gray[1] + brightness_boost),
-            min(255, dark_blue_gray[2] + brightness_boost)
-        )
-        line_thickness = initial_line_thickness - cyclic_index
-
-        if line_thickness > 0:
-            for i in range(line_thickness):
-                pygame.draw.line(screen, line_color,
-                               (popup_x + 10, current_y + i),
-                               (popup_x + popup_width - 10, current_y + i))
-
-        current_y += line_spacing
-        line_index += 1
+    # Liniowy gradient (paski) - wyrenderowany raz i zapamiętany
+    screen.blit(get_striped_panel(popup_width, popup_height, dark_blue_gray), (popup_x, popup_y))
 
     # Białe obramowanie wokół całego okna
     pygame.draw.rect(screen, LIGHT_BLUE, (popup_x, popup_y, popup_width, popup_height), 3)
@@ -5812,23 +7959,8 @@ def draw_confirm_dialog():
             dark_navy = (15, 30, 60)
             light_blue = (100, 150, 255)
 
-            # Rysuj gradient - górna 1/3 z przejściem
-            gradient_height_grad = rect_h // 3
-            for y_offset in range(rect_h):
-                if y_offset < gradient_height_grad:
-                    # Gradient od jasnego do ciemnego
-                    ratio = y_offset / gradient_height_grad
-                    r = int(light_blue[0] * (1 - ratio) + dark_navy[0] * ratio)
-                    g = int(light_blue[1] * (1 - ratio) + dark_navy[1] * ratio)
-                    b = int(light_blue[2] * (1 - ratio) + dark_navy[2] * ratio)
-                    color = (r, g, b)
-                else:
-                    # Ciemno granatowy dla reszty
-                    color = dark_navy
-
-                pygame.draw.line(screen, color,
-                               (rect_x, rect_y + y_offset),
-                               (rect_x + rect_w, rect_y + y_offset))
+            # Gradient - górna 1/3 z przejściem (wyrenderowany raz i zapamiętany)
+            screen.blit(get_selection_gradient(rect_w, rect_h, light_blue, dark_navy), (rect_x, rect_y))
 
             # Białe obramowanie 5px
             pygame.draw.rect(screen, WHITE, (rect_x, rect_y, rect_w, rect_h), 5)
@@ -5959,6 +8091,10 @@ def handle_ok():
                         thumb = THUMBNAIL_DIR / f"{video.stem}.jpg"
                         if thumb.exists():
                             thumb.unlink()
+                        for extra in (get_sprite_sheet_path(video), get_preview_clip_path(video)):
+                            if extra.exists():
+                                extra.unlink()
+                        remove_video_metadata(video)
                         print(f"[DELETE] Usunięto: {video.name}")
                 selected_videos.clear()
             else:
@@ -5969,6 +8105,10 @@ def handle_ok():
                     thumb = THUMBNAIL_DIR / f"{video.stem}.jpg"
                     if thumb.exists():
                         thumb.unlink()
+                    for extra in (get_sprite_sheet_path(video), get_preview_clip_path(video)):
+                        if extra.exists():
+                            extra.unlink()
+                    remove_video_metadata(video)
                     print(f"[DELETE] Usunięto: {video.name}")
             refresh_videos()
         current_state = STATE_VIDEOS
@@ -6008,13 +8148,15 @@ def handle_ok():
                 tile_id = tile["id"]
 
                 # Toggle dla opcji boolean
-                if tile_id in ["grid", "show_date", "show_time", "center_frame", "audio_rec"]:
+                if tile_id in ["grid", "show_date", "show_time", "center_frame", "audio_rec", "live_audio_mux", "audio_alc"]:
                     key_map = {
                         "grid": "show_grid",
                         "show_date": "show_date",
                         "show_time": "show_time",
                         "center_frame": "show_center_frame",
-                        "audio_rec": "audio_recording"
+                        "audio_rec": "audio_recording",
+                        "live_audio_mux": "live_audio_mux",
+                        "audio_alc": "audio_alc"
                     }
                     key = key_map[tile_id]
                     camera_settings[key] = not camera_settings.get(key, False)
@@ -6171,9 +8313,10 @@ def handle_up():
             videos_navigate_up()
             last_videos_scroll = current_time
     elif current_state == STATE_PLAYING:
-        current_volume = pygame.mixer.music.get_volume()
+        current_volume = video_current_volume
         new_volume = min(1.0, current_volume + 0.05)
-        pygame.mixer.music.set_volume(new_volume)
+        if playback_audio:
+            playback_audio.set_volume(new_volume)
         # Zapisz aktualną głośność i czas zmiany
         video_current_volume = new_volume
         last_volume_change_time = time.time()
@@ -6194,9 +8337,10 @@ def handle_down():
             videos_navigate_down()
             last_videos_scroll = current_time
     elif current_state == STATE_PLAYING:
-        current_volume = pygame.mixer.music.get_volume()
+        current_volume = video_current_volume
         new_volume = max(0.0, current_volume - 0.05)
-        pygame.mixer.music.set_volume(new_volume)
+        if playback_audio:
+            playback_audio.set_volume(new_volume)
         # Zapisz aktualną głośność i czas zmiany
         video_current_volume = new_volume
         last_volume_change_time = time.time()
@@ -6389,12 +8533,15 @@ def cleanup(signum=None, frame=None):
     print("\n[CLEANUP] Zamykanie...")
     running = False
 
-    if video_capture:
+    if video_decoder:
+        video_decoder.stop()
+    elif video_capture:
         video_capture.release()
 
     # NAPRAWIONE: Zatrzymaj pygame.mixer
     try:
-        pygame.mixer.music.stop()
+        if playback_audio:
+            playback_audio.stop()
         pygame.mixer.quit()
         print("[OK] Mixer cleanup OK")
     except:
@@ -6418,6 +8565,7 @@ def cleanup(signum=None, frame=None):
 
     if recording:
         stop_recording()
+    stop_camera_capture()
     if camera:
         try:
             camera.stop()
@@ -6446,6 +8594,9 @@ def cleanup(signum=None, frame=None):
 # ============================================================================
 
 if __name__ == '__main__':
+    if "--benchmark-alc" in sys.argv:
+        sys.exit(0 if benchmark_alc() else 1)
+
     signal.signal(signal.SIGINT, cleanup)
 
     # Wykryj i ustaw kartę SD
@@ -6477,7 +8628,7 @@ if __name__ == '__main__':
         # NOWY: Uruchom ciągły monitoring poziomu audio
         start_audio_monitoring()
     else:
-        print("[WARN] Audio nie zainicjalizowane - aplikacja będzie działać bez dźwięku")
+        print("[WARN] Audio jeszcze niedostępne - wykrywanie mikrofonu w tle")
     print("="*70 + "\n")
 
     # Inicjalizacja INA219 Battery Monitor
@@ -6505,7 +8656,8 @@ if __name__ == '__main__':
     button_handlers['MINUS'] = handle_zoom_out
     button_handlers['IR'] = toggle_ir_cut
 
-    # Synchronizuj miniaturki z filmami
+    # Wczytaj indeks metadanych filmów i synchronizuj miniaturki z filmami
+    load_video_index()
     sync_thumbnails_with_videos()
 
     print("\n" + "="*70)
@@ -6596,7 +8748,7 @@ if __name__ == '__main__':
                     speed_multiplier = 1.0 + (hold_duration * 0.15)  # 15% za sekundę
                     speed_multiplier = min(speed_multiplier, 2.0)  # Maksymalnie 2x prędkości bazowej
                     seek_speed = base_speed * speed_multiplier
-                    seek_video(seek_speed)
+                    scrub_video(seek_speed)
                     last_continuous_seek = current_time
 
                 elif is_button_pressed('LEFT'):
@@ -6609,9 +8761,13 @@ if __name__ == '__main__':
                     speed_multiplier = 1.0 + (hold_duration * 0.15)  # 15% za sekundę
                     speed_multiplier = min(speed_multiplier, 2.0)  # Maksymalnie 2x prędkości bazowej
                     seek_speed = base_speed * speed_multiplier
-                    seek_video(-seek_speed)
+                    scrub_video(-seek_speed)
                     last_continuous_seek = current_time
 
+                elif video_scrubbing:
+                    # Przycisk puszczony - dokładne przewinięcie (obraz + dźwięk) jeden raz
+                    finish_scrub()
+
             if current_state == STATE_MAIN:
                 if is_button_pressed('PLUS') and current_time - last_zoom_time >= 0.05:
                     adjust_zoom(ZOOM_STEP)
@@ -6624,15 +8780,14 @@ if __name__ == '__main__':
             # STATE_VIDEOS: Nawigacja obsługiwana przez handle_up/down poprzez check_matrix_buttons()
             # Usunięto ciągłe sprawdzanie is_button_pressed dla STATE_VIDEOS aby uniknąć duplikacji
 
+            # Najnowsza klatka z wątku przechwytywania (None = bez zmian od ostatniego rysowania)
             frame = None
-            if current_state in [STATE_MAIN, STATE_MENU]:
-                try:
-                    frame = camera.capture_array()
-                except:
-                    frame = None
+            if current_state == STATE_MAIN:
+                frame = take_latest_frame()
             
+            dirty_rects = None
             if current_state == STATE_MAIN:
-                draw_main_screen(frame)
+                dirty_rects = draw_main_screen(frame)
             elif current_state == STATE_VIDEOS:
                 draw_videos_screen()
             elif current_state == STATE_CONFIRM:
@@ -6641,10 +8796,10 @@ if __name__ == '__main__':
             elif current_state == STATE_PLAYING:
                 draw_playing_screen()
             elif current_state == STATE_MENU:
-                draw_menu_tiles(frame)
+                draw_menu_tiles()
                 draw_menu_bottom_buttons()  # Przyciski na wierzchu (wysoki z-index)
             elif current_state == STATE_SELECTION_POPUP:
-                draw_menu_tiles(frame)
+                draw_menu_tiles()
                 draw_selection_popup()
                 draw_menu_bottom_buttons()  # Przyciski na wierzchu (wysoki z-index)
             elif current_state == STATE_VIDEO_CONTEXT_MENU:
@@ -6654,7 +8809,14 @@ if __name__ == '__main__':
                 draw_videos_screen(hide_buttons=True)
                 draw_video_info_dialog()
 
-            pygame.display.flip()
+            if current_state != STATE_MAIN:
+                invalidate_hud()
+
+            if dirty_rects is None:
+                pygame.display.flip()
+            elif dirty_rects:
+                # Klatka podglądu bez zmian - tylko prostokąty zmienionych widżetów
+                pygame.display.update(dirty_rects)
             clock.tick(30)
     
     except KeyboardInterrupt: